@@ -0,0 +1,2 @@
+""" Performance benchmarks for Yota. These aren't part of the installed
+package; run them from a source checkout with ``python -m benchmarks``. """
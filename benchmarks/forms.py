@@ -0,0 +1,106 @@
+""" Builders for synthetic Forms of arbitrary size, and matching submission
+data, used by the benchmark and load test suites. """
+import json
+
+import yota
+from yota.nodes import EntryNode, ListNode, CheckGroupNode, TextareaNode
+from yota.renderers import JinjaRenderer
+from yota.validators import (Check, MinLengthValidator, MaxLengthValidator,
+                             RequiredValidator, EmailValidator,
+                             MatchingValidator)
+
+SIZES = (5, 50, 500, 5000)
+""" The default form sizes, in Nodes """
+
+ITEMS = [(str(i), 'Option {0}'.format(i)) for i in range(20)]
+
+
+class Bs2Renderer(JinjaRenderer):
+    templ_type = 'bs2'
+    search_path = []
+
+
+class Bs3Renderer(JinjaRenderer):
+    templ_type = 'bs3'
+    search_path = []
+
+
+RENDERERS = {'bs2': Bs2Renderer, 'bs3': Bs3Renderer}
+
+
+def _node(i):
+    """ The i'th Node of a synthetic form, its Checks and a valid value. The
+    mix is mostly entries, as real forms are, with some of everything else """
+    kind = i % 10
+    if kind < 6:
+        if kind == 0:
+            checks = [RequiredValidator(), EmailValidator()]
+            value = 'user{0}@example.com'.format(i)
+        elif kind in (1, 2):
+            checks = [RequiredValidator(), MinLengthValidator(3),
+                      MaxLengthValidator(64)]
+            value = 'Some value {0}'.format(i)
+        else:
+            checks = [MaxLengthValidator(128)]
+            value = 'optional {0}'.format(i)
+        return EntryNode(validators=checks), value
+    if kind in (6, 7):
+        return ListNode(items=ITEMS, validators=RequiredValidator()), '3'
+    if kind == 8:
+        boxes = [('f{0}_box{1}'.format(i, j), 'Box {0}'.format(j))
+                 for j in range(5)]
+        return CheckGroupNode(boxes=boxes), ['f{0}_box1'.format(i)]
+    return TextareaNode(validators=MaxLengthValidator(2000)), 'Text ' * 40
+
+
+def build_form(size, theme='bs2'):
+    """ Builds a Form class with size Nodes along with a dictionary of valid
+    submission data for it. Every fiftieth entry is cross-checked against the
+    one before it with a MatchingValidator. """
+    attrs = {'_renderer': RENDERERS[theme]}
+    data = {}
+    for i in range(size):
+        name = 'f{0}'.format(i)
+        node, value = _node(i)
+        attrs[name] = node
+        if isinstance(node, CheckGroupNode):
+            for box in value:
+                data[box] = 'true'
+        else:
+            data[name] = value
+        if i % 50 == 49:
+            attrs['_match_{0}'.format(i)] = Check(
+                MatchingValidator(), 'f{0}'.format(i), 'f{0}'.format(i - 1))
+            data[name] = data.get('f{0}'.format(i - 1), value)
+    cls = type('Synthetic{0}'.format(size), (yota.Form, ), attrs)
+    return cls, data
+
+
+def build_dynamic(size):
+    """ Builds a Form of size Nodes at runtime the way a survey builder would,
+    each question inserted after the one before it, and one block of size
+    Nodes inserted in a single call at the top """
+    form = yota.Form()
+    prev = 'start'
+    for i in range(size):
+        node, _ = _node(i)
+        node._attr_name = 'q{0}'.format(i)
+        form.insert_after(prev, node)
+        prev = node._attr_name
+    block = []
+    for i in range(size):
+        node, _ = _node(i)
+        node._attr_name = 'b{0}'.format(i)
+        block.append(node)
+    form.insert(1, block)
+    return form
+
+
+def piecewise_data(data, size, fraction=0.1):
+    """ Submission data for a piecewise call in which only the first fraction
+    of fields have been visited """
+    visited = dict(('f{0}'.format(i), True)
+                   for i in range(max(1, int(size * fraction))))
+    ret = dict(data)
+    ret['_visited_names'] = json.dumps(visited)
+    return ret
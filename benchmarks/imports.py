@@ -0,0 +1,114 @@
+""" Measures the cost of importing Yota in a fresh interpreter: wall time
+under ``python -X importtime``, the modules pulled in, and the resident
+memory of the process afterwards, less that of a bare interpreter.
+
+    python -m benchmarks imports --runs 20
+
+With ``--max-ms`` it exits with a failure when the median import time of any
+statement exceeds the budget, so it can guard against regressions in CI.
+"""
+import os
+import subprocess
+import sys
+
+SCRIPT = ("import sys\n"
+          "{0}\n"
+          "try:\n"
+          "    import os\n"
+          "    with open('/proc/self/statm') as f:\n"
+          "        kb = int(f.read().split()[1]) * os.sysconf('SC_PAGESIZE')"
+          " // 1024\n"
+          "except (IOError, OSError, ValueError):\n"
+          "    import resource\n"
+          "    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+          "sys.stdout.write('%d %d' % (kb, 'jinja2' in sys.modules))\n")
+
+
+def _environ():
+    src = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), 'src')
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [src, os.environ.get('PYTHONPATH', '')]))
+
+
+def measure(statement):
+    """ Runs statement in a new interpreter, returning the microseconds each
+    module took to import cumulatively and by itself, the resident set size
+    in kilobytes and whether Jinja2 was imported """
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT.format(statement)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=_environ())
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise RuntimeError(err.decode('utf-8', 'replace'))
+    modules = {}
+    for line in err.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(cumulative), int(self_us))
+    rss, jinja = out.split()
+    return modules, int(rss), jinja == b'1'
+
+
+def run(statement, runs, top, out=sys.stdout):
+    baseline = [measure('pass') for _ in range(runs)]
+    base = set(baseline[0][0])
+    base_rss = sorted(kb for _, kb, _ in baseline)
+    totals = []
+    rss = []
+    selfs = {}
+    for _ in range(runs):
+        modules, kb, jinja = measure(statement)
+        # only count what is imported beyond the bare interpreter
+        added = dict((name, self_us) for name, (_, self_us)
+                     in modules.items() if name not in base)
+        totals.append(sum(added.values()))
+        rss.append(kb)
+        for name, self_us in added.items():
+            selfs.setdefault(name, []).append(self_us)
+    totals.sort()
+    rss.sort()
+    median = lambda values: values[len(values) // 2]
+
+    out.write('{0}\n'.format(statement))
+    out.write('  import time:    {0:>8.1f} ms median, {1:.1f} ms min\n'.format(
+        median(totals) / 1000.0, totals[0] / 1000.0))
+    out.write('  resident delta: {0:>8,} kB\n'.format(
+        median(rss) - median(base_rss)))
+    out.write('  modules:        {0:>8}\n'.format(len(selfs)))
+    out.write('  jinja2 loaded:  {0:>8}\n'.format(str(jinja)))
+    out.write('  slowest modules by self time:\n')
+    ranked = sorted(selfs.items(), key=lambda item: -median(sorted(item[1])))
+    for name, values in ranked[:top]:
+        out.write('    {0:>8.2f} ms  {1}\n'.format(
+            median(sorted(values)) / 1000.0, name))
+    return {'statement': statement, 'median_us': median(totals),
+            'rss_kb': median(rss) - median(base_rss), 'jinja2': jinja}
+
+
+def add_arguments(parser):
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--statement', action='append',
+                        help='import statements to measure, defaults to '
+                        'importing yota and to importing and rendering')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the median import time of a statement '
+                        'is over this many milliseconds')
+
+
+def command(args, out=sys.stdout):
+    statements = args.statement or [
+        'import yota',
+        'import yota\nfrom yota.nodes import EntryNode\n'
+        'class F(yota.Form):\n    e = EntryNode()\nF().render()',
+    ]
+    failed = False
+    for statement in statements:
+        result = run(statement, args.runs, args.top, out)
+        if args.max_ms is not None and \
+                result['median_us'] > args.max_ms * 1000:
+            out.write('  over budget of {0:.1f} ms\n'.format(args.max_ms))
+            failed = True
+    return 1 if failed else 0
@@ -0,0 +1,359 @@
+""" A concurrent load test of Yota behind a local stand-in application. No
+external services are needed; the app is served from this process either
+directly (wsgi), over real sockets by a threaded wsgiref server (http), or
+as an ASGI WebSocket :class:`yota.asgi.ValidationChannel` (websocket).
+
+Each simulated user replays a session the way yota.js drives a piecewise
+form: the form is rendered, every field is filled in and blurred in turn,
+each blur posting the whole form with the names visited so far, and finally
+the form is submitted.
+
+    python -m benchmarks load --size 50 --concurrency 16 --transport http
+    python -m benchmarks load --record sessions.json --sessions 20
+    python -m benchmarks load --replay sessions.json --concurrency 64
+
+Recorded files keep the size and theme of the form they were recorded
+against, and replaying builds the same form again. Replaying with a
+different --size is refused.
+"""
+import asyncio
+import json
+import sys
+import threading
+
+from http.client import HTTPConnection
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlencode
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+from benchmarks.forms import build_form
+from yota.asgi import ValidationChannel, LocalWebSocket
+from yota.instrumentation import clock
+
+
+class StandInApp(object):
+    """ A WSGI application serving each Form class in forms at /<name>. GET
+    renders the form and POST runs piecewise :meth:`Form.json_validate` on an
+    urlencoded body, as the AJAX transport of yota.js expects. A new Form is
+    built for every request, as it would be in a real view. """
+
+    def __init__(self, forms):
+        self.forms = forms
+
+    def __call__(self, environ, start_response):
+        name = environ.get('PATH_INFO', '/').strip('/')
+        try:
+            cls = self.forms[name]
+        except KeyError:
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'Unknown form']
+
+        form = cls(g_context={'ajax': True, 'piecewise': True})
+        if environ['REQUEST_METHOD'] == 'POST':
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            body = environ['wsgi.input'].read(length).decode('utf-8')
+            data = _decode_post(body)
+            valid, out = form.json_validate(data, piecewise=True)
+            content_type = 'application/json'
+        else:
+            out = form.render()
+            content_type = 'text/html'
+        out = out.encode('utf-8')
+        start_response('200 OK', [('Content-Type', content_type),
+                                  ('Content-Length', str(len(out)))])
+        return [out]
+
+
+def _decode_post(body):
+    """ Decodes an urlencoded body into the dictionary a framework would hand
+    a view, with repeated keys collected into lists """
+    data = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        if key in data:
+            if not isinstance(data[key], list):
+                data[key] = [data[key]]
+            data[key].append(value)
+        else:
+            data[key] = value
+    return data
+
+
+def record_sessions(name, data, count=1):
+    """ Generates yota.js style request sequences for a form. Each session is
+    a list of requests, dictionaries with a kind (render, blur or submit), a
+    method, a path and the fields that were sent. """
+    fields = [key for key in data if not key.startswith('_')]
+    session = [{'kind': 'render', 'method': 'GET', 'path': '/' + name,
+                'fields': {}}]
+    filled = {}
+    visited = {}
+    for key in fields:
+        filled[key] = data[key]
+        visited[key] = True
+        sent = dict((k, filled.get(k, '')) for k in fields)
+        sent['_visited_names'] = json.dumps(visited)
+        session.append({'kind': 'blur', 'method': 'POST', 'path': '/' + name,
+                        'fields': sent, 'name': key})
+    sent = dict(data)
+    sent['_visited_names'] = json.dumps(visited)
+    sent['submit_action'] = 'true'
+    session.append({'kind': 'submit', 'method': 'POST', 'path': '/' + name,
+                    'fields': sent})
+    return [session] * count
+
+
+class WSGITransport(object):
+    """ Calls the WSGI application directly, measuring Yota without any
+    networking overhead """
+    threaded = True
+
+    def __init__(self, app):
+        self.app = app
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def request(self, req):
+        body = urlencode(req['fields'], doseq=True).encode('utf-8')
+        environ = {'REQUEST_METHOD': req['method'], 'PATH_INFO': req['path'],
+                   'CONTENT_LENGTH': str(len(body)),
+                   'wsgi.input': _Input(body)}
+        status = []
+        out = self.app(environ, lambda s, headers: status.append(s))
+        b''.join(out)
+        return status[0].startswith('200')
+
+
+class _Input(object):
+    def __init__(self, body):
+        self.body = body
+
+    def read(self, length):
+        return self.body[:length]
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class HTTPTransport(WSGITransport):
+    """ Serves the application from a threaded wsgiref server on an
+    ephemeral local port and talks to it over real sockets """
+
+    def start(self):
+        self.server = make_server('127.0.0.1', 0, self.app,
+                                  server_class=_ThreadingWSGIServer,
+                                  handler_class=_QuietHandler)
+        self.server.request_queue_size = 1024
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, req):
+        conn = HTTPConnection('127.0.0.1', self.port)
+        try:
+            body = None
+            headers = {}
+            if req['method'] == 'POST':
+                body = urlencode(req['fields'], doseq=True)
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            conn.request(req['method'], req['path'], body, headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status == 200
+        finally:
+            conn.close()
+
+
+class WebSocketTransport(object):
+    """ Replays blurs as messages on one :class:`yota.asgi.ValidationChannel`
+    connection per session, all sessions sharing one event loop. Renders are
+    skipped and the submit is sent as a final message. """
+    threaded = False
+
+    def __init__(self, forms):
+        self.forms = forms
+
+    async def session(self, session, timings):
+        name = session[0]['path'].strip('/')
+        async with LocalWebSocket(ValidationChannel(self.forms[name])) as ws:
+            for n, req in enumerate(session):
+                if req['kind'] == 'render':
+                    continue
+                update = dict((k, v) for k, v in req['fields'].items()
+                              if not k.startswith('_'))
+                visited = [req['name']] if 'name' in req else list(update)
+                start = clock()
+                reply = await ws.send_json({'id': n, 'update': update,
+                                            'visited': visited})
+                timings.append((req['kind'], clock() - start,
+                                'error' not in reply))
+
+
+class LoadResult(object):
+    """ Latencies in seconds grouped by request kind, along with the wall
+    clock time the run took """
+
+    def __init__(self, timings, elapsed):
+        self.elapsed = elapsed
+        self.count = len(timings)
+        self.failures = sum(1 for _, _, ok in timings if not ok)
+        self.latencies = {'all': sorted(t for _, t, _ in timings)}
+        for kind, t, _ in timings:
+            self.latencies.setdefault(kind, []).append(t)
+        for values in self.latencies.values():
+            values.sort()
+
+    @property
+    def throughput(self):
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, kind, q):
+        values = self.latencies.get(kind)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self):
+        ret = {'requests': self.count, 'failures': self.failures,
+               'elapsed': self.elapsed, 'throughput': self.throughput,
+               'latency': {}}
+        for kind in sorted(self.latencies):
+            ret['latency'][kind] = dict(
+                ('p{0}'.format(int(q * 100)), self.percentile(kind, q))
+                for q in (0.5, 0.9, 0.99))
+            ret['latency'][kind]['max'] = self.latencies[kind][-1]
+        return ret
+
+
+def run_load(transport, sessions, concurrency):
+    """ Replays every session once, with at most concurrency sessions in
+    flight at a time, returning a :class:`LoadResult` """
+    timings = []
+    if not transport.threaded:
+        async def main():
+            limit = asyncio.Semaphore(concurrency)
+
+            async def one(session):
+                async with limit:
+                    await transport.session(session, timings)
+            await asyncio.gather(*[one(s) for s in sessions])
+        start = clock()
+        asyncio.run(main())
+        return LoadResult(timings, clock() - start)
+
+    queue = list(reversed(sessions))
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        while True:
+            with lock:
+                if not queue:
+                    break
+                session = queue.pop()
+            for req in session:
+                begin = clock()
+                ok = transport.request(req)
+                local.append((req['kind'], clock() - begin, ok))
+        with lock:
+            timings.extend(local)
+
+    transport.start()
+    try:
+        threads = [threading.Thread(target=worker)
+                   for _ in range(concurrency)]
+        start = clock()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = clock() - start
+    finally:
+        transport.stop()
+    return LoadResult(timings, elapsed)
+
+
+DEFAULT_SIZE = 50
+DEFAULT_THEME = 'bs2'
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', type=int, default=None,
+                        help='number of nodes in the sample form, {0} by '
+                        'default or as recorded when replaying'
+                        .format(DEFAULT_SIZE))
+    parser.add_argument('--theme', default=None,
+                        help='{0} by default or as recorded when replaying'
+                        .format(DEFAULT_THEME))
+    parser.add_argument('--sessions', type=int, default=50,
+                        help='number of user sessions to replay')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--transport', default='wsgi',
+                        choices=('wsgi', 'http', 'websocket'))
+    parser.add_argument('--record', help='write the sessions to this file '
+                        'instead of running them')
+    parser.add_argument('--replay', help='replay sessions from this file')
+    parser.add_argument('--output', help='write the summary to this file')
+
+
+def command(args, out=sys.stdout):
+    size, theme = args.size, args.theme
+    if args.replay:
+        with open(args.replay) as f:
+            recorded = json.load(f)
+        if size is not None and size != recorded['size']:
+            out.write('{0} was recorded with --size {1}, not {2}\n'.format(
+                args.replay, recorded['size'], size))
+            return 2
+        size = recorded['size']
+        theme = theme or recorded['theme']
+    size = DEFAULT_SIZE if size is None else size
+    theme = theme or DEFAULT_THEME
+
+    cls, data = build_form(size, theme)
+    name = cls.__name__
+    if args.replay:
+        sessions = recorded['sessions']
+    else:
+        sessions = record_sessions(name, data, args.sessions)
+    if args.record:
+        with open(args.record, 'w') as f:
+            json.dump({'size': size, 'theme': theme, 'sessions': sessions},
+                      f)
+        return 0
+
+    forms = {name: cls}
+    if args.transport == 'websocket':
+        transport = WebSocketTransport(forms)
+    elif args.transport == 'http':
+        transport = HTTPTransport(StandInApp(forms))
+    else:
+        transport = WSGITransport(StandInApp(forms))
+
+    summary = run_load(transport, sessions, args.concurrency).summary()
+    out.write('{0} requests in {1:.2f}s, {2:.1f} req/s, {3} failed\n'.format(
+        summary['requests'], summary['elapsed'], summary['throughput'],
+        summary['failures']))
+    for kind, stats in sorted(summary['latency'].items()):
+        out.write('{0:<8} p50 {1:>9.2f} ms  p90 {2:>9.2f} ms  '
+                  'p99 {3:>9.2f} ms  max {4:>9.2f} ms\n'.format(
+                      kind, stats['p50'] * 1e3, stats['p90'] * 1e3,
+                      stats['p99'] * 1e3, stats['max'] * 1e3))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+    return 1 if summary['failures'] else 0
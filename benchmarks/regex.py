@@ -0,0 +1,71 @@
+""" Compares the regex validators against the way they used to run: pattern
+strings passed to ``re.match`` on every call, one regex per password strength
+rule and one match per pattern. The validators are given no max_length, so
+every input is matched.
+
+    python -m benchmarks regex --lengths 10,100,1000
+"""
+import re
+import sys
+
+from yota.validators import PasswordStrengthValidator, RegexValidator
+
+LENGTHS = (10, 100, 1000)
+USERNAME = '^[a-zA-Z0-9-_]+$'
+ANY_OF = [r'^\d+$', r'^[a-f0-9]+$', r'^[a-z]+\.[a-z]+$']
+
+
+def _password(length):
+    # mostly lowercase, which makes the '.*[A-Z].*[A-Z]' lookahead backtrack
+    # over the whole input before finding its uppercase letters at the end
+    return 'a' * (length - 4) + '1!AB'
+
+
+def cases(length):
+    """ Yields (name, before, after) for inputs of the given length """
+    username = 'u' * length
+    validator = RegexValidator(USERNAME, max_length=None)
+    yield ('regex', lambda: re.match(USERNAME, username),
+           lambda: validator._pattern.match(username))
+
+    password = _password(length)
+    strength = PasswordStrengthValidator(max_length=None)
+    rules = PasswordStrengthValidator.default_regex
+    yield ('password_strength',
+           lambda: sum(1 for rule in rules if re.match(rule, password)),
+           lambda: strength.strength(password))
+
+    token = 'z' * length
+    any_of = RegexValidator(ANY_OF, max_length=None)
+    yield ('alternation',
+           lambda: any(re.match(regex, token) for regex in ANY_OF),
+           lambda: any_of._pattern.match(token))
+
+
+def run(lengths, rounds, min_time, out=sys.stdout):
+    from benchmarks.run import time_case
+    results = {}
+    out.write('{0:<20} {1:>8} {2:>12} {3:>12} {4:>8}\n'.format(
+        'case', 'length', 'before (us)', 'after (us)', 'speedup'))
+    for length in lengths:
+        for name, before, after in cases(length):
+            old = time_case(before, rounds, min_time)[0]
+            new = time_case(after, rounds, min_time)[0]
+            results['{0}/{1}'.format(name, length)] = {'before': old,
+                                                       'after': new}
+            out.write('{0:<20} {1:>8} {2:>12.2f} {3:>12.2f} {4:>7.1f}x\n'
+                      .format(name, length, old * 1e6, new * 1e6, old / new))
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument('--lengths', default=','.join(map(str, LENGTHS)),
+                        help='comma separated input lengths')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2)
+
+
+def command(args, out=sys.stdout):
+    lengths = [int(length) for length in args.lengths.split(',')]
+    run(lengths, args.rounds, args.min_time, out)
+    return 0
@@ -0,0 +1,155 @@
+""" Times Form construction, validation, piecewise JSON validation and
+rendering across a range of form sizes and both bundled themes.
+
+    python -m benchmarks run --output before.json
+    python -m benchmarks run --output after.json
+    python -m benchmarks compare before.json after.json
+
+Each case is run in several rounds; a round repeats the operation until it
+has taken at least --min-time seconds and reports the time per operation.
+The median and minimum across rounds are recorded. compare exits with status
+1 if any case's median got slower by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks import imports, load, regex, soak
+from benchmarks.forms import (SIZES, RENDERERS, build_form, build_dynamic,
+                              piecewise_data)
+from yota.instrumentation import clock
+
+
+def time_case(func, rounds=5, min_time=0.2):
+    """ Returns (median, min) seconds per call of func across rounds """
+    func()  # warm caches so the first round isn't an outlier
+    results = []
+    for _ in range(rounds):
+        number = 0
+        start = clock()
+        while True:
+            func()
+            number += 1
+            elapsed = clock() - start
+            if elapsed >= min_time:
+                break
+        results.append(elapsed / number)
+    results.sort()
+    return results[len(results) // 2], results[0]
+
+
+def cases(size, themes):
+    """ Yields (name, func) pairs of the operations measured for a form size
+    """
+    cls, data = build_form(size)
+    piecewise = piecewise_data(data, size)
+
+    form = cls()
+    yield 'construct', cls
+    yield 'validate', lambda: form.validate(data)
+    yield 'json_validate_piecewise', lambda: form.json_validate(
+        piecewise, piecewise=True)
+    yield 'insert_dynamic', lambda: build_dynamic(size)
+
+    for theme in themes:
+        themed, _ = build_form(size, theme)
+        themed_form = themed()
+        yield 'render/' + theme, themed_form.render
+        yield 'validate_render/' + theme, lambda: themed_form.validate_render(
+            data)
+
+
+def run(sizes, themes, rounds, min_time, out=sys.stdout):
+    results = {}
+    for size in sizes:
+        for name, func in cases(size, themes):
+            key = '{0}/{1}'.format(name, size)
+            median, best = time_case(func, rounds, min_time)
+            results[key] = {'median': median, 'min': best, 'rounds': rounds}
+            out.write('{0:<40} {1:>12.1f} us\n'.format(key, median * 1e6))
+            out.flush()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(old, new, threshold, out=sys.stdout):
+    """ Prints the change in median time for every case present in both
+    result sets and returns the keys of those that regressed """
+    regressions = []
+    for key in sorted(set(old['results']) & set(new['results'])):
+        before = old['results'][key]['median']
+        after = new['results'][key]['median']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        out.write('{0:<40} {1:>12.1f} {2:>12.1f} {3:>+8.1%}{4}\n'.format(
+            key, before * 1e6, after * 1e6, change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    sub = parser.add_subparsers(dest='command')
+
+    run_parser = sub.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--output', help='write results to this file')
+    run_parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                            help='comma separated form sizes')
+    run_parser.add_argument('--themes', default=','.join(sorted(RENDERERS)))
+    run_parser.add_argument('--rounds', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.2)
+
+    cmp_parser = sub.add_parser('compare', help='compare two result files')
+    cmp_parser.add_argument('old')
+    cmp_parser.add_argument('new')
+    cmp_parser.add_argument('--threshold', type=float, default=0.1,
+                            help='fractional slowdown flagged as a regression')
+
+    load_parser = sub.add_parser('load', help='run a concurrent load test')
+    load.add_arguments(load_parser)
+
+    soak_parser = sub.add_parser('soak', help='run a memory soak test')
+    soak.add_arguments(soak_parser)
+
+    imports_parser = sub.add_parser('imports', help='measure import time')
+    imports.add_arguments(imports_parser)
+
+    regex_parser = sub.add_parser('regex', help='compare regex validation')
+    regex.add_arguments(regex_parser)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        sizes = [int(s) for s in args.sizes.split(',')]
+        themes = [t for t in args.themes.split(',') if t]
+        results = run(sizes, themes, args.rounds, args.min_time)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+    if args.command == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.threshold) else 0
+    if args.command == 'load':
+        return load.command(args)
+    if args.command == 'soak':
+        return soak.command(args)
+    if args.command == 'imports':
+        return imports.command(args)
+    if args.command == 'regex':
+        return regex.command(args)
+    parser.print_help()
+    return 2
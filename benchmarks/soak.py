@@ -0,0 +1,129 @@
+""" A memory soak test: builds, validates and renders forms over and over
+while tracing allocations with tracemalloc, to catch memory that is retained
+from one request to the next.
+
+    python -m benchmarks soak --iterations 1000000 --render-every 100
+
+Reported are the bytes allocated at peak within a single request, the memory
+retained after the run compared to a baseline taken after warming up, the
+growth per thousand requests between checkpoints, the number of objects the
+cycle collector had to free, and the allocation sites that grew the most.
+"""
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.forms import build_form
+
+
+def _request(cls, data, render):
+    form = cls()
+    form.validate(data)
+    if render:
+        form.render()
+
+
+def _traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def soak(size=20, iterations=100000, render_every=100, checkpoints=10,
+         warmup=200, top=10, theme='bs2', frames=1, out=sys.stdout):
+    """ Runs the soak and returns a dictionary summarizing it """
+    cls, data = build_form(size, theme)
+    for i in range(warmup):
+        _request(cls, data, i % render_every == 0)
+
+    gc.collect()
+    tracemalloc.start(frames)
+    baseline = _traced()
+    before = tracemalloc.take_snapshot()
+
+    collected = []
+
+    def on_gc(phase, info):
+        if phase == 'stop':
+            collected.append(info['collected'])
+    gc.callbacks.append(on_gc)
+
+    peak = 0
+    points = []
+    step = max(1, iterations // checkpoints)
+    for i in range(iterations):
+        render = render_every and i % render_every == 0
+        if not render:
+            # measure the peak of a plain validation request
+            current = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        _request(cls, data, render)
+        if not render and hasattr(tracemalloc, 'reset_peak'):
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        if (i + 1) % step == 0:
+            gc.collect()
+            points.append((i + 1, tracemalloc.get_traced_memory()[0]))
+            out.write('{0:>10} requests  {1:>12,} bytes traced\n'.format(
+                *points[-1]))
+            out.flush()
+
+    gc.callbacks.remove(on_gc)
+    retained = _traced() - baseline
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    # growth per thousand requests over the second half of the run, after
+    # caches have settled
+    half = points[len(points) // 2:]
+    growth = 0.0
+    if len(half) > 1 and half[-1][0] != half[0][0]:
+        growth = (half[-1][1] - half[0][1]) * 1000.0 / \
+            (half[-1][0] - half[0][0])
+
+    sites = []
+    for stat in after.compare_to(before, 'traceback')[:top]:
+        frame = stat.traceback[0]
+        sites.append({'site': '{0}:{1}'.format(frame.filename, frame.lineno),
+                      'size_diff': stat.size_diff,
+                      'count_diff': stat.count_diff})
+
+    return {'iterations': iterations, 'size': size,
+            'peak_per_request': peak, 'retained': retained,
+            'growth_per_1000': growth, 'cyclic_garbage': sum(collected),
+            'top_sites': sites}
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--theme', default='bs2')
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--render-every', type=int, default=100,
+                        help='render one request in this many, 0 for never')
+    parser.add_argument('--checkpoints', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--frames', type=int, default=1,
+                        help='stack frames kept per allocation, more are '
+                        'slower but show the callers of allocation sites')
+    parser.add_argument('--max-growth', type=float, default=None,
+                        help='fail if growth per 1000 requests exceeds this '
+                        'many bytes')
+
+
+def command(args, out=sys.stdout):
+    result = soak(args.size, args.iterations, args.render_every,
+                  args.checkpoints, top=args.top, theme=args.theme,
+                  frames=args.frames, out=out)
+    out.write('peak per request:       {0:>12,} bytes\n'
+              'retained after run:     {1:>12,} bytes\n'
+              'growth per 1000:        {2:>12,.0f} bytes\n'
+              'cyclic garbage objects: {3:>12,}\n'.format(
+                  result['peak_per_request'], result['retained'],
+                  result['growth_per_1000'], result['cyclic_garbage']))
+    out.write('top allocation sites by growth:\n')
+    for site in result['top_sites']:
+        out.write('  {0:>+12,} bytes {1:>+8} blocks  {2}\n'.format(
+            site['size_diff'], site['count_diff'], site['site']))
+    if args.max_growth is not None and \
+            result['growth_per_1000'] > args.max_growth:
+        return 1
+    return 0
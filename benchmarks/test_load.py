@@ -0,0 +1,48 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import load
+
+
+class TestLoad(unittest.TestCase):
+    """ Smoke tests of the load benchmark's record and replay """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'sessions.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_load(self, *argv):
+        parser = argparse.ArgumentParser()
+        load.add_arguments(parser)
+        out = io.StringIO()
+        return load.command(parser.parse_args(argv), out), out.getvalue()
+
+    def test_record_replay(self):
+        """ replays build the form the sessions were recorded against """
+        ret, out = self.run_load('--size', '5', '--sessions', '2',
+                                 '--record', self.path)
+        assert(ret == 0)
+        with open(self.path) as f:
+            recorded = json.load(f)
+        assert(recorded['size'] == 5)
+        assert(len(recorded['sessions']) == 2)
+
+        ret, out = self.run_load('--replay', self.path, '--concurrency', '2')
+        assert(ret == 0)
+        assert(out.startswith('14 requests'))
+        assert('0 failed' in out)
+
+    def test_replay_size_mismatch(self):
+        """ replaying with another size is refused """
+        self.run_load('--size', '5', '--sessions', '1', '--record', self.path)
+        ret, out = self.run_load('--replay', self.path, '--size', '6')
+        assert(ret == 2)
+        assert('--size 5' in out)
@@ -1,9 +1,19 @@
 from yota.renderers import JinjaRenderer
-from yota.processors import FlaskPostProcessor
-from yota.nodes import LeaderNode, Node
+from yota.processors import FlaskPostProcessor, PostProcessor, NameSet
+from yota.nodes import LeaderNode, Node, NodeList
 from yota.validators import Check, Listener
+from yota.instrumentation import NULL_INSTRUMENT, clock, check_key
+from yota.profiling import profiled
+from yota.loaders import collect, dispatch
+from yota.timeouts import deadline
+from yota.conditions import When
+from yota.exceptions import NoRendererException, NotCallableException, \
+    CheckTimeout
+from collections import OrderedDict
+import heapq
 import json
 import copy
+import sys
 
 
 class TrackingMeta(type):
@@ -12,19 +22,29 @@ class TrackingMeta(type):
     generates _validation_list for explicitly declared Check attributes in the
     Form """
 
+    @classmethod
+    def __prepare__(mcs, name, bases, **kwargs):
+        """ Records the class body in declaration order on Python 3 """
+        return OrderedDict()
+
     def __init__(mcs, name, bases, dct):
         """ Process all of the attributes in the `Form` (or subclass)
         declaration and place them accordingly. This builds the internal
         _node_list and _validation_list and is responsible for preserving
-        initial Node order. """
+        initial Node order.
+
+        Nodes are ordered as they are declared in the class body, with the
+        Nodes of a Blueprint in its place, so the order never depends on
+        when Nodes shared between Forms happened to be created. Where the
+        class body isn't ordered (Python 2) Node creation order is used. """
 
-        nodes = {}
+        nodes = []
         mcs._validation_list = []
-        mcs._node_list = []
+        mcs._node_list = NodeList()
         mcs._event_lists = {}
         for name, attribute in dct.items():
             # These aren't ordered Nodes, ignore them
-            if name is 'start' or name is 'close':
+            if name in ('start', 'close'):
                 try:
                     attribute._attr_name = name
                 except AttributeError:
@@ -34,7 +54,7 @@ class TrackingMeta(type):
                 continue
             if isinstance(attribute, Node):
                 attribute._attr_name = name
-                nodes[attribute._create_counter] = attribute
+                nodes.append(attribute)
                 delattr(mcs, name)
             elif isinstance(attribute, Check):
                 # if we've found a validation check
@@ -52,8 +72,7 @@ class TrackingMeta(type):
                 # just assume that this is some kind of blueprint with
                 # ducktyping
                 try:
-                    for node in attribute._node_list:
-                        nodes[node._create_counter] = node
+                    nodes.extend(attribute._node_list)
                 except AttributeError:
                     pass
 
@@ -73,10 +92,22 @@ class TrackingMeta(type):
                 except AttributeError:
                     pass
 
-        # insert our nodes in sorted order by there initialization order, thus
-        # preserving order
-        for i, attribute in sorted(nodes.items()):
-            mcs._node_list.append(attribute)
+        if not isinstance(dct, OrderedDict) and sys.version_info < (3, 6):
+            # fall back on the order the Nodes were created in
+            nodes.sort(key=lambda node: node._create_counter)
+
+        # a Node assigned to more than one attribute is only listed once
+        seen = set()
+        for attribute in nodes:
+            if id(attribute) not in seen:
+                seen.add(id(attribute))
+                mcs._node_list.append(attribute)
+
+def _node_output(node):
+    """ The validated output of a Node, preferring its coerced value """
+    if getattr(node, 'coerce', None) is not None:
+        return node.value
+    return node.data
 
 _Form = TrackingMeta('_Form', (object, ), {})
 class Form(_Form):
@@ -114,7 +145,8 @@ class Form(_Form):
     _renderer = JinjaRenderer
     """ This is a class object that is used to perform the actual rendering
     steps, allowing different rendering engines to be swapped out. More about
-    this in the section :class:`Renderer` """
+    this in the section :class:`Renderer`. Set it to None for a headless Form
+    that only validates; see :ref:`headless`. """
     _processor = FlaskPostProcessor
     """ This is a class that performs post processing on whatever is passed in
     as data during validation. The intended purpose of this was to write
@@ -122,9 +154,35 @@ class Form(_Form):
     framework being used to a format that Yota expects. It also allows things
     like filtering stripping characters or encoding all data that enters a
     validator. """
+    _instrument = NULL_INSTRUMENT
+    """ An :class:`yota.instrumentation.Instrument` that receives timings for
+    each phase of construction, validation and rendering. The default does
+    nothing. Set it on Form to instrument every Form, or on a subclass. """
+    _profiler = None
+    """ An optional :class:`yota.profiling.SamplingProfiler` that profiles a
+    sample of calls to the public validation and render methods. """
+    _strict = True
+    """ Whether Forms check the invariants of their definition on every
+    construction and validation. Production mode, see
+    :func:`yota.production.set_production`, turns this off and checks each
+    Form class once instead, the first time it's compiled. """
+    _shared_attrs = ('_instrument', '_profiler', '_templates', '_strict',
+                     '_checked')
+    """ Class attributes that are shared by all instances rather than copied
+    into each one on init. """
     _reserved_attr_names = ('context', 'hidden', 'g_context', 'start_template',
                         'close_template', 'auto_start_close', '_renderer',
                         '_processor', 'name')
+    check_timeout = None
+    """ The time in seconds each :class:`Check` of the Form is allowed to run
+    for, unless the Check sets its own :attr:`Check.timeout`. None, the
+    default, lets checks run for as long as they take. Only checks run in the
+    main thread are interrupted; elsewhere the limit is not enforced, see
+    :func:`yota.timeouts.deadline`. """
+    timeout_error = {'message': "This couldn't be checked in time, please "
+                                "try again"}
+    """ The error given to the first Node of a Check that runs out of time.
+    Errors are blocking unless they say otherwise. """
     name = None
     context = {}
     g_context = {}
@@ -134,6 +192,16 @@ class Form(_Form):
     close_template = 'form_close'
     render_success = False
     render_error = False
+    skipped_checks = []
+    """ The Checks skipped by the last validation because something they
+    depend on failed, see :meth:`Check.after`. :meth:`Form.json_validate`
+    also reports their names under ``skipped``. """
+    render_inactive = True
+    """ Whether Nodes made inactive by their :attr:`Node.active_when`
+    condition are rendered. Set it to False to leave them out of the Form,
+    for instance to only show the sections that apply to an earlier
+    submission. They're rendered with ``active`` False in their context
+    otherwise, which templates can use to hide them. """
     type_class_map = {'error': 'alert alert-error',
                       'info': 'alert alert-info',
                       'success': 'alert alert-success',
@@ -157,9 +225,19 @@ class Form(_Form):
 
 
     def __init__(self, **kwargs):
+        inst = self._instrument
+        if inst.enabled:
+            start = clock()
+
+        # Take our own copy of the context before anything is written to it,
+        # otherwise the class attributes of every Form ever built accumulate
+        # in the dictionary shared by all Form classes
+        self.context = copy.copy(self.context)
+
         # A bit of a hack to copy all our class attributes
         for class_attr in dir(self):
-            if class_attr in kwargs:
+            if class_attr in kwargs or class_attr in self._shared_attrs or \
+                    class_attr == 'context':
                 continue
             att = getattr(self, class_attr)
             # We want to copy all the nodes as well as the list, this is a
@@ -170,7 +248,10 @@ class Form(_Form):
             elif not class_attr.startswith('__'):
                 # don't try to copy functions, it doesn't go well
                 if not callable(att):
-                    setattr(self, class_attr, copy.copy(att))
+                    # the context gets the instance's copy so that nothing
+                    # reachable from it is shared with other threads
+                    att = copy.copy(att)
+                    setattr(self, class_attr, att)
                     self.context[class_attr] = att
 
         # Set a default name for our Form
@@ -182,12 +263,21 @@ class Form(_Form):
         self.context['title'] = self.title
 
         # run our safety checks, set identifiers, and set local attributes
-        for node in self._node_list:
-            self._setup_node(node)
+        if self._strict:
+            for node in self._node_list:
+                self._setup_node(node)
+        else:
+            # the class was checked once when it was compiled
+            self.compile()
+            for node in self._node_list:
+                node.set_identifiers(self.name)
+                setattr(self, node._attr_name, node)
 
         # passes everything to our rendering context and updates params.
         self.context.update(kwargs)
         self.__dict__.update(kwargs)
+        if not isinstance(self._node_list, NodeList):
+            self._node_list = NodeList(self._node_list)
 
         # Add our open and close form defaults
         if hasattr(self, 'start'):
@@ -214,21 +304,157 @@ class Form(_Form):
         # Initialize some general state variable
         self._last_valid = None
         self._last_raw_json = None
+        self._filtered_data = None
+        self._validated_names = None
+        self._conditional = None
+        self._check_plan = None
+        self.skipped_checks = []
+
+        if inst.enabled:
+            inst.record(self.__class__.__name__, 'construct', None,
+                        clock() - start)
+
+    @classmethod
+    def compile(cls):
+        """ Prepares everything about the Form class that can be built ahead
+        of its first request and returns the names of the templates its
+        Nodes render with, less the renderer suffix. The result is cached on
+        the class. Called for every Form by :func:`yota.warmup`, and by the
+        first construction of each Form in production mode.
+
+        Compiling also checks the definition of the Form, raising the errors
+        that construction and validation would otherwise raise later on. """
+        # production mode checks more than development mode, so a class
+        # checked in development is checked again in production
+        checked = cls.__dict__.get('_checked')
+        if checked is None or (checked and not cls._strict):
+            cls._check_definition()
+            cls._checked = cls._strict
 
+        try:
+            return cls.__dict__['_templates']
+        except KeyError:
+            pass
+
+        if hasattr(cls._processor, 'shared'):
+            cls._processor.shared()
+
+        templates = []
+        for node in cls._node_list:
+            templates.append(node.template)
+            # Nodes rendered by other Nodes, such as the rows of a RepeatNode
+            templates.extend(child.template
+                             for child in getattr(node, '_nodes', ()))
+        for special, default in (('start', cls.start_template),
+                                 ('close', cls.close_template)):
+            if hasattr(cls, special):
+                templates.append(getattr(cls, special).template)
+            elif cls.auto_start_close:
+                templates.append(default)
+        cls._templates = tuple(sorted(set(t for t in templates if t)))
+        return cls._templates
+
+    @classmethod
+    def _check_definition(cls):
+        """ The checks that :meth:`Form._setup_node`, :meth:`Node.get_context`
+        and :meth:`ActionWrapper.__call__` make on every call, run once for
+        the Nodes, Checks and Listeners declared on the class. Required
+        context values are only checked outside of strict mode, since
+        development mode allows them to be set after construction. """
+        names = set()
+        for node in cls._node_list:
+            if type(node._attr_name) is not str:
+                raise AttributeError('Nodes must have a _attr_name attribute '
+                                     'as a string. Please add it. ')
+            if hasattr(cls, node._attr_name) or node._attr_name in names:
+                raise AttributeError('Attribute name {0} overlaps with a Form '
+                                     'attribute. Please rename.'
+                                     .format(node._attr_name))
+            names.add(node._attr_name)
+        for node in cls._node_list:
+            condition = getattr(node, 'active_when', None)
+            if condition is not None and \
+                    When.of(condition).attr_name not in names:
+                raise AttributeError('Node {0} is active when {1}, which '
+                                     'isn\'t a Node of the Form'
+                                     .format(node._attr_name,
+                                             When.of(condition).attr_name))
+
+        checks = set(check._attr_name for check in cls._validation_list)
+        for check in cls._validation_list:
+            for name in check.depends_on:
+                if name not in checks and name not in names:
+                    raise AttributeError('Check {0} depends on {1}, which '
+                                         'isn\'t a Check or Node of the Form'
+                                         .format(check._attr_name, name))
+
+        actions = list(cls._validation_list)
+        for events in cls._event_lists.values():
+            actions.extend(events)
+        for node in cls._node_list:
+            validators = getattr(node, 'validators', None) or ()
+            if callable(validators) or isinstance(validators, Check):
+                validators = (validators, )
+            for validator in validators:
+                if isinstance(validator, Check):
+                    actions.append(validator)
+                elif not callable(validator):
+                    raise NotCallableException(
+                        "Validators provided must be callable, got type '{0}' "
+                        "on Node {1}".format(type(validator), node._attr_name))
+        for action in actions:
+            if not callable(action.callable):
+                raise NotCallableException(
+                    "Validators provided must be callable, got type '{0}' "
+                    "for {1}".format(type(action.callable), action._attr_name))
+
+        if not cls._strict:
+            nodes = list(cls._node_list)
+            nodes.extend(getattr(cls, special) for special in ('start', 'close')
+                         if hasattr(cls, special))
+            for node in cls._node_list:
+                nodes.extend(getattr(node, '_nodes', ()))
+            for node in nodes:
+                node.check_requires(node.get_context({}))
+
+    @profiled
     def render(self):
         """ Runs the renderer to parse templates of nodes and generate the form
         HTML.
 
         :returns: A string containing the generated output.
         """
+        inst = self._instrument
+        if inst.enabled:
+            start = clock()
+
+        if self._renderer is None:
+            raise NoRendererException(
+                "{0} is headless and can't be rendered. Set a _renderer to "
+                "render it.".format(self.__class__.__name__))
+
         # process the errors before we render
         self._process_errors()
 
-        return self._renderer().render(self._node_list, self.g_context)
+        nodes = self._node_list
+        if not self.render_inactive and self._get_conditional():
+            self._update_active()
+            nodes = [node for node in nodes if node.active]
+
+        renderer = self._renderer()
+        if not inst.enabled:
+            return renderer.render(nodes, self.g_context)
+
+        renderer.instrument = inst
+        renderer.form_name = self.__class__.__name__
+        output = renderer.render(nodes, self.g_context)
+        inst.record(self.__class__.__name__, 'render', None, clock() - start)
+        return output
 
     def add_listener(self, listener, type):
         """ Attaches a :class:`Listener` to an event type. These Listener will
         be executed when trigger event is called. """
+        listener.bind(self)
         if type not in self._event_lists:
             self._event_lists[type] = []
         self._event_lists[type].append(listener)
@@ -236,12 +462,18 @@ class Form(_Form):
     def trigger_event(self, type):
         """ Runs all the associated :class:`Listener`'s for a specific event
         type. """
+        inst = self._instrument
+        if inst.enabled:
+            start = clock()
         try:
             for event in self._event_lists[type]:
                 event.resolve_attr_names(self)
                 event()
         except KeyError:
             pass
+        if inst.enabled:
+            inst.record(self.__class__.__name__, 'trigger_event', type,
+                        clock() - start)
 
     def _setup_node(self, node):
         """ An internal function performs some safety checks, sets attribute,
@@ -283,20 +515,29 @@ class Form(_Form):
                     # Assume only a single attr if not specified
                     new_valid = Check(validator, node._attr_name)
                     self._validation_list.append(new_valid)
+            self._check_plan = None
 
             # remove the attribute so multiple calls doesn't break things
             delattr(node, 'validators')
 
     def _process_errors(self):
+        inst = self._instrument
+        if inst.enabled:
+            start = clock()
         for node in self._node_list:
-            # process the node errors and inject special values
-            for error in node.errors:
-                # Try and retrieve the class values for the result type
-                # and send along the required render value
-                try:
-                    error['_type_class'] = self.type_class_map[error['type']]
-                except KeyError:
-                    error['_type_class'] = self.type_class_map['error']
+            for error_node in node.error_nodes():
+                # process the node errors and inject special values
+                for error in error_node.errors:
+                    # Try and retrieve the class values for the result type
+                    # and send along the required render value
+                    try:
+                        error['_type_class'] = \
+                            self.type_class_map[error['type']]
+                    except KeyError:
+                        error['_type_class'] = self.type_class_map['error']
+        if inst.enabled:
+            inst.record(self.__class__.__name__, 'process_errors', None,
+                        clock() - start)
 
     def insert_validator(self, new_validators):
         """ Inserts a validator to the validator list.
@@ -309,8 +550,12 @@ class Form(_Form):
             if not isinstance(validator, Check):
                 raise TypeError('Can only insert type Check or derived classes')
 
+            validator.bind(self)
             # append the validator to the list
             self._validation_list.append(validator)
+        self._validated_names = None
+        self._conditional = None
+        self._check_plan = None
 
     def insert(self, position, new_node_list):
         """ Inserts a :class:`Node` object or a list of objects at the
@@ -324,19 +569,23 @@ class Form(_Form):
         # check to allow passing in just a node
         if isinstance(new_node_list, Node):
             new_node_list = (new_node_list,)
+        new_node_list = list(new_node_list)
 
-        for i, new_node in enumerate(new_node_list):
-
+        for new_node in new_node_list:
             self._setup_node(new_node)
 
-            if position == -1:
-                self._node_list.append(new_node)
-            else:
-                self._node_list.insert(position + i, new_node)
+        # all the Nodes go in at once, rather than shifting the rest of the
+        # list along for each one
+        if position == -1:
+            self._node_list.extend(new_node_list)
+        else:
+            self._node_list.insert_many(position, new_node_list)
+        self._validated_names = None
+        self._conditional = None
+        self._check_plan = None
 
     def insert_after(self, prev_attr_name, new_node_list):
-        """ Runs through the internal node structure attempting to find
-        a :class:`Node` object whos :attr:`Node._attr_name` is
+        """ Finds the :class:`Node` object whos :attr:`Node._attr_name` is
         prev_attr_name and inserts the passed node after it. If
         `prev_attr_name` cannot be matched it will be inserted at the
         end. Internally calls :meth:`Form.insert` and has the same
@@ -349,26 +598,19 @@ class Form(_Form):
             inserted.
         :type new_node_list: Node or list of Nodes """
 
-        # check to allow passing in just a node
-        if isinstance(new_node_list, Node):
-            new_node_list = (new_node_list,)
-
-        # Loop through our list of nodes to find where to insert
-        for index, node in enumerate(self._node_list):
-            # found!
-            if node._attr_name == prev_attr_name:
-                for i, new_node in enumerate(new_node_list):
-                    self._node_list.insert(index + i + 1, new_node)
-                    setattr(self, new_node._attr_name, new_node)
-                    new_node.set_identifiers(self.name)
-                break
-        else:
+        index = self._node_list.position(prev_attr_name)
+        if index is None:
             # failover append if not found
-            for new_node in new_node_list:
-                self._node_list.append(new_node)
+            self.insert(-1, new_node_list)
+        else:
+            self.insert(index + 1, new_node_list)
 
     def get_by_attr(self, name):
         """ Safe accessor for looking up a node by :attr:`Node._attr_name` """
+        node = self._node_list.get_attr(name)
+        if node is not None:
+            return node
+        # Nodes set directly as attributes rather than inserted
         try:
             attr = getattr(self, name)
         except AttributeError:
@@ -379,6 +621,14 @@ class Form(_Form):
         raise AttributeError('Form attribute {0} couldn\'t be resolved to'
                              ' a Node'.format(name))
 
+    def get_by_name(self, name):
+        """ Safe accessor for looking up a node by :attr:`Node.name` """
+        node = self._node_list.get_name(name)
+        if node is None:
+            raise AttributeError('Form name {0} couldn\'t be resolved to'
+                                 ' a Node'.format(name))
+        return node
+
     def success_header_generate(self):
         """ Please see the documentation for :meth:`Form.error_header_generate`
         as it covers this function as well as itself. """
@@ -423,39 +673,303 @@ class Form(_Form):
     def data_by_attr(self):
         """ Returns a dictionary of currently stored :attr:`Node.data`
         attributes keyed by :attr:`Node._attr_name`. Used for returning data
-        after its been processed by validators. """
+        after its been processed by validators. Nodes that declare a
+        :attr:`Node.coerce` contribute their parsed :attr:`Node.value`
+        instead. """
 
         ret = {}
         for node in self._node_list:
-            ret[node._attr_name] = node.data
+            ret[node._attr_name] = _node_output(node)
         return ret
 
     def data_by_name(self):
         """ Returns a dictionary of currently stored :attr:`Node.data`
         attributes keyed by :attr:`Node.name`. Used for returning data
-        after its been processed by validators. """
+        after its been processed by validators. Coerced values are returned
+        as in :meth:`Form.data_by_attr`. """
 
         ret = {}
         for node in self._node_list:
-            ret[node.name] = node.data
+            ret[node.name] = _node_output(node)
         return ret
 
+    def _get_validated_names(self):
+        """ Collects the names of every Node that a :class:`Check` will
+        inspect. The result is cached until the Form structure changes. """
+        if self._validated_names is None:
+            for node in self._node_list:
+                self._parse_shorthand_validator(node)
+
+            names = set()
+            prefixes = []
+            for check in self._validation_list:
+                check.resolve_attr_names(self)
+                for node in list(check.args) + list(check.kwargs.values()):
+                    names.update(node.get_list_names())
+                    # Nodes that name elements after the submitted data
+                    if hasattr(node, 'name_prefix'):
+                        prefixes.append(node.name_prefix())
+            if prefixes:
+                names = NameSet(names, prefixes)
+            self._validated_names = names
+        return self._validated_names
+
+    def _get_conditional(self):
+        """ The Nodes that have an :attr:`Node.active_when` condition, as
+        (node, condition, controller) triples ordered so that each Node
+        comes after the Node its condition depends on. The result is cached
+        until the Form structure changes. """
+        if self._conditional is None:
+            plan = []
+            placed = set()
+            for node in self._node_list:
+                # walk up the chain of conditions to the first Node that is
+                # placed or unconditional, then place the chain top down
+                chain = []
+                while id(node) not in placed and \
+                        getattr(node, 'active_when', None) is not None:
+                    if any(node is link for link, _, _ in chain):
+                        raise AttributeError('The conditions of Node {0} '
+                                             'depend on each other'
+                                             .format(node._attr_name))
+                    condition = When.of(node.active_when)
+                    controller = self.get_by_attr(condition.attr_name)
+                    chain.append((node, condition, controller))
+                    node = controller
+                for link in reversed(chain):
+                    plan.append(link)
+                    placed.add(id(link[0]))
+            self._conditional = plan
+        return self._conditional
+
+    def _update_active(self, data=None):
+        """ Marks each Node with a condition active or not. A Node is only
+        active if the Node its condition depends on is too.
+
+        :param data: (optional) Submitted data to resolve the Nodes that
+            conditions depend on from, as they're needed. Nodes in inactive
+            branches are never resolved. Without it the Nodes' current data
+            is used.
+
+        :return: The ids of the Nodes resolved.
+        """
+        resolved = set()
+        for node, condition, controller in self._get_conditional():
+            if not controller.active:
+                node.active = False
+                continue
+            if data is not None and id(controller) not in resolved:
+                controller.errors = []
+                controller.data = ''
+                controller.resolve_data(data)
+                controller.coerce_data()
+                resolved.add(id(controller))
+            node.active = condition.holds(controller.data)
+        return resolved
+
+    def _get_check_plan(self):
+        """ Orders the Checks so that each runs after what it depends on, see
+        :meth:`Check.after`, keeping declaration order otherwise. Returns the
+        ordered Checks, the prerequisites of each Check that has any, as a
+        dictionary of (checks, nodes) keyed by id, the ids of the Checks
+        that others depend on, and whether the Checks are plain, using no
+        dependencies, conditions or time budgets of their own. The result is
+        cached until the Form structure changes. """
+        if self._check_plan is not None:
+            return self._check_plan
+
+        checks = list(self._validation_list)
+        if not any(check.depends_on for check in checks):
+            plain = all(check.active_when is None and check.timeout is None
+                        for check in checks)
+            self._check_plan = (checks, {}, frozenset(), plain)
+            return self._check_plan
+
+        by_name = dict((check._attr_name, check) for check in checks
+                       if check._attr_name)
+        position = dict((id(check), i) for i, check in enumerate(checks))
+        before = dict((id(check), set()) for check in checks)
+        prereqs = {}
+        watched = set()
+        for check in checks:
+            check.resolve_attr_names(self)
+        for check in checks:
+            if not check.depends_on:
+                continue
+            on_checks = []
+            on_nodes = []
+            for name in check.depends_on:
+                if name in by_name:
+                    on_checks.append(by_name[name])
+                    continue
+                node = self.get_by_attr(name)
+                on_nodes.append(node)
+                # a Node is known to be valid once the other Checks on it
+                # have run
+                for other in checks:
+                    if other is check or name in other.depends_on:
+                        continue
+                    if any(node is arg for arg in self._check_nodes(other)):
+                        on_checks.append(other)
+            for other in on_checks:
+                before[id(check)].add(id(other))
+                watched.add(id(other))
+            prereqs[id(check)] = (on_checks, on_nodes)
+
+        # Kahn's algorithm, taking the earliest declared Check that's ready
+        waiting = dict((key, len(value)) for key, value in before.items())
+        followers = dict((id(check), []) for check in checks)
+        for key, value in before.items():
+            for other in value:
+                followers[other].append(key)
+        ready = [position[key] for key, count in waiting.items() if not count]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            check = checks[heapq.heappop(ready)]
+            order.append(check)
+            for key in followers[id(check)]:
+                waiting[key] -= 1
+                if not waiting[key]:
+                    heapq.heappush(ready, position[key])
+        if len(order) != len(checks):
+            stuck = [check_key(check) for check in checks
+                     if waiting[id(check)]]
+            raise AttributeError('Checks {0} depend on each other'
+                                 .format(', '.join(stuck)))
+
+        self._check_plan = (order, prereqs, frozenset(watched), False)
+        return self._check_plan
+
+    @staticmethod
+    def _check_nodes(check):
+        return list(check.args) + list(check.kwargs.values())
+
+    def _error_nodes(self, check):
+        """ The Nodes holding the errors of a Check's Nodes, which include
+        the row Nodes of a :class:`yota.nodes.RepeatNode` """
+        return [holder for node in self._check_nodes(check)
+                for holder in node.error_nodes()]
+
+    def _error_counts(self, check):
+        """ The number of errors on each Node holding errors for a Check """
+        return dict((id(holder), len(holder.errors))
+                    for holder in self._error_nodes(check))
+
+    def _added_blocking(self, check, counts):
+        """ Whether a Check added a blocking error to any of its Nodes """
+        for holder in self._error_nodes(check):
+            for error in holder.errors[counts.get(id(holder), 0):]:
+                if error.get('block', True):
+                    return True
+        return False
+
+    @staticmethod
+    def _prerequisite_failed(prereqs, failed):
+        """ Whether a Check or Node that a Check depends on has failed """
+        on_checks, on_nodes = prereqs
+        for check in on_checks:
+            if id(check) in failed:
+                return True
+        for node in on_nodes:
+            for holder in node.error_nodes():
+                for error in holder.errors:
+                    if error.get('block', True):
+                        return True
+        return False
+
+    def _check_active(self, check):
+        """ Whether a Check applies, which it doesn't if its own condition
+        fails or any of its Nodes is inactive """
+        if check.active_when is not None:
+            condition = When.of(check.active_when)
+            controller = self.get_by_attr(condition.attr_name)
+            if not controller.active or not condition.holds(controller.data):
+                return False
+        for node in check.args:
+            if not node.active:
+                return False
+        for node in check.kwargs.values():
+            if not node.active:
+                return False
+        return True
+
+    def _filter_data(self, data):
+        """ Runs submitted data through the :attr:`Form._processor` exactly
+        once per validation call. The result is stored so that the internal
+        validation steps can recognize data that has already been processed.
+        """
+        inst = self._instrument
+        if inst.enabled:
+            start = clock()
+
+        processor = self._processor
+        if hasattr(processor, 'shared'):
+            processor = processor.shared()
+        else:
+            processor = processor()
+
+        if isinstance(processor, PostProcessor):
+            names = None
+            if processor.expensive:
+                names = self._get_validated_names()
+            data = processor.filter_post(data, names)
+        else:
+            data = processor.filter_post(data)
+
+        self._filtered_data = data
+        if inst.enabled:
+            inst.record(self.__class__.__name__, 'filter_post', None,
+                        clock() - start)
+        return data
+
     def _gen_validate(self, data, piecewise=False):
         """ This is an internal utility function that does the grunt work of
         running validation logic for a :class:`Form`. It is called by the other
         primary validation methods. """
 
-        # Allows user to set a modular processor on incoming data
-        data = self._processor().filter_post(data)
-
-
-        # reset all error lists and data
-        for node in self._node_list:
-            node.errors = []
-            node.data = ''
-            node.resolve_data(data)
-            # Pull out all our shorthand validators
-            self._parse_shorthand_validator(node)
+        # Allows user to set a modular processor on incoming data. The public
+        # validation methods will have already done this
+        if data is not self._filtered_data:
+            data = self._filter_data(data)
+
+        inst = self._instrument
+        timed = inst.enabled
+        form_name = self.__class__.__name__
+        if timed:
+            start = clock()
+
+        # Resolve what conditions depend on first, so the Nodes they switch
+        # off can be skipped entirely
+        conditional = self._get_conditional()
+        inactive = False
+        if conditional:
+            resolved = self._update_active(data)
+            inactive = not all(node.active for node, _, _ in conditional)
+            for node in self._node_list:
+                if not node.active:
+                    node.errors = []
+                    node.data = ''
+                    continue
+                if id(node) in resolved:
+                    self._parse_shorthand_validator(node)
+                    continue
+                node.errors = []
+                node.data = ''
+                node.resolve_data(data)
+                node.coerce_data()
+                self._parse_shorthand_validator(node)
+        else:
+            # reset all error lists and data
+            for node in self._node_list:
+                node.errors = []
+                node.data = ''
+                node.resolve_data(data)
+                node.coerce_data()
+                # Pull out all our shorthand validators
+                self._parse_shorthand_validator(node)
+        if timed:
+            inst.record(form_name, 'resolve_data', None, clock() - start)
 
         # try to load our visited list of it's piecewise validation
         if '_visited_names' not in data and piecewise:
@@ -466,32 +980,114 @@ class Form(_Form):
 
         # assume to be not blocking
         block = False
-        # loop over our checks and run our validators
-        for check in self._validation_list:
-            check.resolve_attr_names(self)
-            if piecewise is False or check.node_visited(visited):
-                check()
-            else:
-                # If even a single check can't be run, we need to block
-                block = True
+        # Deferred lookups returned by the checks, loaded in batches below
+        pending = []
+        report = None
+        if timed:
+            report = lambda loader, elapsed: inst.record(
+                form_name, 'batch_load', type(loader).__name__, elapsed)
+        order, prereqs, watched, plain = self._get_check_plan()
+        if plain and not inactive and self.check_timeout is None:
+            # none of the Checks need ordering, conditions or time budgets
+            if self.skipped_checks:
+                self.skipped_checks = []
+            for check in self._validation_list:
+                check.resolve_attr_names(self)
+                if piecewise is False or check.node_visited(visited):
+                    if timed:
+                        start = clock()
+                        result = check()
+                        inst.record(form_name, 'check', check_key(check),
+                                    clock() - start)
+                    else:
+                        result = check()
+                    if result is not None:
+                        collect(result, pending)
+                else:
+                    # If even a single check can't be run, we need to block
+                    block = True
+        else:
+            self.skipped_checks = []
+            ordered = bool(prereqs)
+            # ids of the Checks that failed or didn't run, for their dependents
+            failed = set()
+            for check in order:
+                check.resolve_attr_names(self)
+                if (inactive or check.active_when is not None) and \
+                        not self._check_active(check):
+                    # the check belongs to a branch that doesn't apply
+                    continue
+                if ordered and id(check) in prereqs:
+                    if self._prerequisite_failed(prereqs[id(check)], failed):
+                        failed.add(id(check))
+                        self.skipped_checks.append(check)
+                        continue
+                if piecewise is False or check.node_visited(visited):
+                    watch = ordered and id(check) in watched
+                    if watch:
+                        counts = self._error_counts(check)
+                    if timed:
+                        start = clock()
+                        result = self._run_check(check)
+                        inst.record(form_name, 'check', check_key(check),
+                                    clock() - start)
+                    else:
+                        result = self._run_check(check)
+                    if result is not None:
+                        collect(result, pending)
+                    if watch:
+                        # dependents need to know how its lookups turned out
+                        if pending:
+                            dispatch(pending, report)
+                            pending = []
+                        if self._added_blocking(check, counts):
+                            failed.add(id(check))
+                else:
+                    # If even a single check can't be run, we need to block
+                    block = True
+                    failed.add(id(check))
+
+        if pending:
+            dispatch(pending, report)
 
         # Run the one off validation method
-        self.validator()
+        if timed:
+            start = clock()
+            self.validator()
+            inst.record(form_name, 'validator', None, clock() - start)
+        else:
+            self.validator()
 
         # a list to hold Nodes that actually have errors
         error_node_list = []
         for node in self._node_list:
-            # slightly confusing way of setting our block = True by
-            # default
-            if node.errors:
-
-                error_node_list.append(node)
-
-            for error in node.errors:
-                block |= error.get('block', True)
+            for error_node in node.error_nodes():
+                error_node_list.append(error_node)
+                # slightly confusing way of setting our block = True by
+                # default
+                for error in error_node.errors:
+                    block |= error.get('block', True)
 
         return block, error_node_list
 
+    def _run_check(self, check):
+        """ Runs a single Check within its time budget """
+        timeout = check.timeout
+        if timeout is None:
+            timeout = self.check_timeout
+        if timeout is None:
+            return check()
+
+        try:
+            with deadline(timeout):
+                return check()
+        except CheckTimeout:
+            nodes = list(check.args) + list(check.kwargs.values())
+            if not nodes:
+                raise
+            nodes[0].add_error(dict(self.timeout_error))
+
+    @profiled
     def json_validate(self, data, piecewise=False, raw=False):
         """ The same as :meth:`Form.validate_render` except the errors
         are loaded into a JSON string to be passed back as a query
@@ -516,7 +1112,7 @@ class Form(_Form):
         """
 
         # Allows user to set a modular processor on incoming data
-        data = self._processor().filter_post(data)
+        data = self._filter_data(data)
 
         errors = {}
         """ We want to automatically block the form from actually submitting
@@ -550,6 +1146,9 @@ class Form(_Form):
                 retval['success_ids'] = self.start.json_identifiers()
 
         retval['errors'] = errors
+        if self.skipped_checks:
+            retval['skipped'] = [check_key(check)
+                                 for check in self.skipped_checks]
 
         # Throw back a variable in the json if there is both a submit
         # and no blocking errors. The main purpose here is the allow
@@ -574,6 +1173,7 @@ class Form(_Form):
         else:
             return valid, json.dumps(retval)
 
+    @profiled
     def validate(self, data):
         """ Runs all the validators associated with the :class:`Form`.
 
@@ -582,7 +1182,7 @@ class Form(_Form):
         """
 
         # Allows user to set a modular processor on incoming data
-        data = self._processor().filter_post(data)
+        data = self._filter_data(data)
         block, invalid = self._gen_validate(data)
 
         # Run our validation trigger events
@@ -593,6 +1193,7 @@ class Form(_Form):
 
         return (not block), invalid
 
+    @profiled
     def validate_render(self, data):
         """ Runs all the validators on the `data` that is passed in and returns
         a re-render of the :class:`Form` if there are validation errors,
@@ -612,7 +1213,7 @@ class Form(_Form):
         """
 
         # Allows user to set a modular processor on incoming data
-        data = self._processor().filter_post(data)
+        data = self._filter_data(data)
 
         block, invalid = self._gen_validate(data)
 
@@ -687,3 +1288,5 @@ class Form(_Form):
             else:
                 return json.dumps(self._last_raw_json)
 
+
+from yota.production import warmup
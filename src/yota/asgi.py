@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ValidationChannel(object):
+    """ An ASGI application that serves piecewise validation over a single
+    persistent WebSocket per form session. Instead of a full HTTP request for
+    every blur event the client streams only the fields that changed, and a
+    single :class:`Form` instance is kept alive and re-validated for the
+    lifetime of the connection. This pairs with the ``transport: 'websocket'``
+    option of Yota's JavaScript library.
+
+    :param form_factory: Either a :class:`Form` subclass or a callable that
+        accepts the ASGI connection scope and returns a new Form instance. It
+        is called once per connection.
+
+    Messages sent by the client are JSON objects of the form below. Every key
+    is optional, updates are merged into the data already held for the
+    connection, and visited names are accumulated. Fields that are no longer
+    submitted, such as an unchecked box, are listed under "removed", and a
+    null in the update is taken the same way.
+
+    .. code-block:: javascript
+
+        {"id": 4, "update": {"first": "Isaac"}, "visited": ["first"]}
+        {"id": 5, "removed": ["agree"], "visited": ["agree"]}
+
+    Every message is answered with the raw output of :meth:`Form.json_validate`
+    under the key "result", along with the "id" that was sent so the client can
+    discard out of order responses. Malformed messages, which are ignored
+    entirely, and validation that raises are answered with an "error" instead,
+    and the connection stays open.
+
+    .. note:: Validation runs synchronously inside the event loop. Yota
+        validation is normally fast, but slow validators should be kept in
+        mind when serving many connections from a single worker.
+    """
+
+    def __init__(self, form_factory):
+        self.form_factory = form_factory
+
+    def build_form(self, scope):
+        """ Creates the Form instance that will live for the duration of a
+        connection. """
+        factory = self.form_factory
+        if isinstance(factory, type):
+            return factory()
+        return factory(scope)
+
+    def handle_message(self, session, message):
+        """ Merges a single client message into the session state and runs
+        piecewise validation, returning the dictionary to send back. """
+        update = message.get('update', {})
+        removed = message.get('removed', [])
+        visited = message.get('visited')
+        if visited is None and isinstance(update, dict) and \
+                isinstance(removed, list):
+            visited = list(update.keys()) + removed
+        # check the whole message before any of it is kept, so a bad one
+        # leaves the session as it was
+        if not isinstance(update, dict) or not isinstance(visited, list) or \
+                not isinstance(removed, list) or \
+                not all(isinstance(name, str)
+                        for names in (visited, update, removed)
+                        for name in names):
+            return {'id': message.get('id'),
+                    'error': 'Malformed validation message'}
+        for name, value in update.items():
+            # a null is taken as a removal, like an unchecked box that
+            # submits nothing
+            if value is None:
+                session.data.pop(name, None)
+            else:
+                session.data[name] = value
+        for name in removed:
+            session.data.pop(name, None)
+        for name in visited:
+            session.visited[name] = True
+
+        data = dict(session.data)
+        data['_visited_names'] = json.dumps(session.visited)
+        try:
+            valid, result = session.form.json_validate(data,
+                                                       piecewise=True,
+                                                       raw=True)
+        except Exception:
+            # keep the connection open for the next message
+            log.exception("Piecewise validation failed")
+            return {'id': message.get('id'), 'error': 'Validation failed'}
+        return {'id': message.get('id'), 'valid': valid, 'result': result}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'websocket':
+            await send({'type': 'http.response.start', 'status': 426,
+                        'headers': [(b'upgrade', b'websocket')]})
+            await send({'type': 'http.response.body',
+                        'body': b'WebSocket upgrade required'})
+            return
+
+        session = None
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.connect':
+                session = _Session(self.build_form(scope))
+                await send({'type': 'websocket.accept'})
+            elif event['type'] == 'websocket.receive':
+                text = event.get('text')
+                try:
+                    if text is None:
+                        text = event.get('bytes', b'').decode('utf-8')
+                    message = json.loads(text)
+                except ValueError:
+                    # UnicodeDecodeError included
+                    reply = {'error': 'Messages must be JSON encoded'}
+                else:
+                    if isinstance(message, dict):
+                        reply = self.handle_message(session, message)
+                    else:
+                        reply = {'error': 'Malformed validation message'}
+                await send({'type': 'websocket.send',
+                            'text': json.dumps(reply)})
+            elif event['type'] == 'websocket.disconnect':
+                return
+
+    async def _lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif event['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class _Session(object):
+    """ Per connection state: the long lived form along with the data and
+    visited names that have been streamed so far. """
+    __slots__ = ['form', 'data', 'visited']
+
+    def __init__(self, form):
+        self.form = form
+        self.data = {}
+        self.visited = {}
+
+
+class LocalWebSocket(object):
+    """ A minimal in-process ASGI server for a single WebSocket connection.
+    It runs the application as a task on the current event loop and talks to
+    it through queues, making it possible to exercise a
+    :class:`ValidationChannel` without any network or third party server.
+
+    .. code-block:: python
+
+        async with LocalWebSocket(ValidationChannel(MyForm)) as ws:
+            reply = await ws.send_json({'update': {'first': 'Isaac'}})
+    """
+
+    def __init__(self, app, path='/'):
+        self.app = app
+        self.scope = {'type': 'websocket', 'path': path, 'headers': [],
+                      'query_string': b'', 'subprotocols': []}
+        self._inbound = asyncio.Queue()
+        self._outbound = asyncio.Queue()
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(
+            self.app(self.scope, self._inbound.get, self._outbound.put))
+        await self._inbound.put({'type': 'websocket.connect'})
+        event = await self._outbound.get()
+        if event['type'] != 'websocket.accept':
+            raise RuntimeError("Connection was not accepted: {0}"
+                               .format(event))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._inbound.put({'type': 'websocket.disconnect',
+                                 'code': 1000})
+        await self._task
+
+    async def send_json(self, message):
+        """ Sends a message and waits for the reply, returning it decoded """
+        await self._inbound.put({'type': 'websocket.receive',
+                                 'text': json.dumps(message)})
+        event = await self._outbound.get()
+        return json.loads(event['text'])
@@ -0,0 +1,331 @@
+from collections import OrderedDict
+import json
+import threading
+import weakref
+
+
+class ChoiceSet(object):
+    """ A read only collection of (value, label) pairs for the choices of a
+    :class:`yota.nodes.ListNode`, :class:`yota.nodes.RadioNode` or
+    :class:`yota.nodes.CheckGroupNode`. Declare large choice sets once at
+    module level and pass them to as many Nodes as you like:
+
+    .. code-block:: python
+
+        COUNTRIES = ChoiceSet((c.alpha_2, c.name) for c in countries)
+
+        class AddressForm(yota.Form):
+            country = ListNode(items=COUNTRIES,
+                               validators=ChoiceValidator())
+
+    Nodes copy their attributes for every Form built, but a ChoiceSet is
+    never copied, so every Form shares the same one. Looking up a value is a
+    dictionary lookup, and the ``<option>`` elements of a ListNode are
+    rendered once per theme and reused, see :meth:`ChoiceSet.render`.
+
+    A ChoiceSet iterates over its pairs like the list it was made from, so
+    templates and code written against lists of tuples keep working.
+
+    :param choices: An iterable of (value, label) pairs, or a dictionary of
+        labels keyed by value.
+    """
+
+    def __init__(self, choices):
+        if hasattr(choices, 'items') and not isinstance(choices, ChoiceSet):
+            choices = choices.items()
+        self._choices = tuple((value, label) for value, label in choices)
+        self._labels = {}
+        self._positions = {}
+        for i, (value, label) in enumerate(self._choices):
+            self._labels[value] = label
+            self._positions.setdefault(value, i)
+        # rendered options keyed by template, see render
+        self._rendered = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self._choices)
+
+    def __len__(self):
+        return len(self._choices)
+
+    def __getitem__(self, index):
+        return self._choices[index]
+
+    def __contains__(self, value):
+        """ Whether value is one of the choices, in constant time """
+        try:
+            return value in self._labels
+        except TypeError:
+            # unhashable submissions are never a choice
+            return False
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self._choices, ))
+
+    def __repr__(self):
+        return "<ChoiceSet of {0} choices>".format(len(self._choices))
+
+    def label(self, value, default=None):
+        """ The label of the choice with the given value """
+        try:
+            return self._labels.get(value, default)
+        except TypeError:
+            return default
+
+    def position(self, value):
+        """ The index of the first choice with the given value, or None """
+        try:
+            return self._positions.get(value)
+        except TypeError:
+            return None
+
+    def render(self, template, selected=None):
+        """ Renders every choice with template, a template for a single
+        ``<option>`` taking ``value``, ``description`` and ``selected``
+        variables, and marks the choice whose value is selected.
+
+        The unselected options are rendered once per template, which is to
+        say once per theme, and kept. Each call only renders the selected
+        option and splices it into the cached block. """
+        try:
+            block, spans = self._rendered[template]
+        except KeyError:
+            with self._lock:
+                block, spans = self._render_all(template)
+                self._rendered[template] = block, spans
+
+        position = self.position(selected)
+        if position is None:
+            return block
+        value, label = self._choices[position]
+        start, end = spans[position]
+        return ''.join((block[:start],
+                        template.render(value=value, description=label,
+                                        selected=True),
+                        block[end:]))
+
+    def _render_all(self, template):
+        parts = []
+        spans = []
+        length = 0
+        for value, label in self._choices:
+            option = template.render(value=value, description=label,
+                                     selected=False)
+            parts.append(option)
+            spans.append((length, length + len(option)))
+            length += len(option)
+        return ''.join(parts), spans
+
+
+# stands in for a cached lookup that found nothing
+_MISSING = object()
+
+
+class ChoiceProvider(object):
+    """ A source of choices for a :class:`yota.nodes.ListNode` too large to
+    list in full, such as every SKU or city in a database. Pass one as the
+    Node's items and only the first page of choices, along with the
+    selected one, is rendered. Further pages are served on demand to
+    yota.js through :meth:`ChoiceProvider.typeahead`, and validation looks
+    single values up by key.
+
+    Subclasses implement :meth:`fetch` and :meth:`query`, and optionally
+    :meth:`count`. Their results are kept in a small least recently used
+    cache of :attr:`cache_size` entries, shared by every Form using the
+    provider. Values that aren't found are not cached, so submitting made up
+    values can't push real choices out of the cache.
+
+    .. code-block:: python
+
+        class SkuProvider(ChoiceProvider):
+            def fetch(self, value):
+                row = db.execute('SELECT name FROM sku WHERE code = ?',
+                                 (value, )).fetchone()
+                return row[0] if row else None
+
+            def query(self, query, offset, limit):
+                return db.execute('SELECT code, name FROM sku WHERE name '
+                                  'LIKE ? ORDER BY name LIMIT ? OFFSET ?',
+                                  (query + '%', limit, offset)).fetchall()
+
+        SKUS = SkuProvider()
+
+        class OrderForm(yota.Form):
+            sku = ListNode(items=SKUS, typeahead_url='/skus',
+                           validators=ChoiceValidator())
+
+    Like a :class:`ChoiceSet`, a provider is never copied into Forms.
+    """
+
+    per_page = 50
+    """ The number of choices in a page """
+    cache_size = 1024
+    """ The most lookups and searches kept in the cache """
+    max_query = 100
+    """ Longer typeahead queries are cut to this many characters """
+    max_pages = 100
+    """ Typeahead requests for later pages are served the last of these """
+
+    def __init__(self):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fetch(self, value):
+        """ Returns the label of the choice with the given value, or None if
+        there isn't one. Should be a lookup by key. """
+        raise NotImplementedError
+
+    def query(self, query, offset, limit):
+        """ Returns up to limit (value, label) pairs matching the query
+        string, skipping the first offset. An empty query matches every
+        choice. """
+        raise NotImplementedError
+
+    def count(self, query):
+        """ Returns the number of choices matching the query string, or None
+        if it isn't known, in which case typeahead pages are only limited by
+        :attr:`max_pages`. """
+        return None
+
+    def _cached(self, key, func, *args):
+        with self._lock:
+            try:
+                result = self._cache.pop(key)
+            except KeyError:
+                pass
+            else:
+                self._cache[key] = result
+                return result
+        result = func(*args)
+        if result is _MISSING:
+            return result
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _fetch(self, value):
+        label = self.fetch(value)
+        return _MISSING if label is None else label
+
+    def _page(self, query, page):
+        # one extra choice tells whether there's another page
+        found = list(self.query(query, page * self.per_page,
+                                self.per_page + 1))
+        return ([tuple(choice) for choice in found[:self.per_page]],
+                len(found) > self.per_page)
+
+    def label(self, value, default=None):
+        """ The label of the choice with the given value """
+        try:
+            label = self._cached(('fetch', value), self._fetch, value)
+        except TypeError:
+            # unhashable submissions are never a choice
+            return default
+        return default if label is _MISSING else label
+
+    def __contains__(self, value):
+        return self.label(value, _MISSING) is not _MISSING
+
+    def search(self, query='', page=0):
+        """ Returns a page of (value, label) pairs matching query, and whether
+        there are more pages after it """
+        return self._cached(('query', query, page), self._page, query, page)
+
+    def pages(self, query=''):
+        """ The number of pages of choices matching query, at least one and
+        at most :attr:`max_pages` """
+        count = self._cached(('count', query), self.count, query)
+        if count is None:
+            return self.max_pages
+        return max(1, min(self.max_pages, -(-count // self.per_page)))
+
+    def initial(self, selected=None):
+        """ The choices rendered with a Node: the first page, and the selected
+        choice ahead of it if it isn't on that page """
+        choices = self.search()[0]
+        if selected in ('', None) or selected in dict(choices):
+            return choices
+        label = self.label(selected)
+        if label is None:
+            return choices
+        return [(selected, label)] + choices
+
+    def typeahead(self, data, raw=False):
+        """ Serves a page of choices to yota.js. Pass it the query string of
+        the request, ``q`` holding the text typed and ``page`` the page
+        wanted, and return the result as a JSON response. Pages past the last
+        one, see :meth:`pages`, are served the last page.
+
+        :return: A JSON string (or dictionary, if raw) of the form
+            ``{"results": [{"value": ..., "label": ...}], "more": false}``
+        """
+        query = data.get('q', '') or ''
+        query = query[:self.max_query]
+        try:
+            page = max(0, int(data.get('page', 0)))
+        except (TypeError, ValueError):
+            page = 0
+        page = min(page, self.pages(query) - 1)
+        choices, more = self.search(query, page)
+        ret = {'results': [{'value': value, 'label': label}
+                           for value, label in choices],
+               'more': more}
+        if raw:
+            return ret
+        return json.dumps(ret)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class StaticProvider(ChoiceProvider):
+    """ A :class:`ChoiceProvider` over choices held in memory, for lists too
+    long to render in full but small enough to keep around. Searches match
+    labels containing the query, ignoring case.
+
+    :param choices: An iterable of (value, label) pairs, a dictionary or a
+        :class:`ChoiceSet`.
+    """
+
+    def __init__(self, choices):
+        super(StaticProvider, self).__init__()
+        if not isinstance(choices, ChoiceSet):
+            choices = ChoiceSet(choices)
+        self.choices = choices
+        self._folded = [label.lower() for value, label in choices]
+
+    def fetch(self, value):
+        return self.choices.label(value)
+
+    def count(self, query):
+        if not query:
+            return len(self.choices)
+        query = query.lower()
+        return sum(1 for label in self._folded if query in label)
+
+    def query(self, query, offset, limit):
+        if not query:
+            return self.choices[offset:offset + limit]
+        query = query.lower()
+        ret = []
+        for i, label in enumerate(self._folded):
+            if query in label:
+                if offset:
+                    offset -= 1
+                    continue
+                ret.append(self.choices[i])
+                if len(ret) == limit:
+                    break
+        return ret
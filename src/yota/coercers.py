@@ -0,0 +1,86 @@
+import datetime
+import decimal
+
+
+def to_int(data):
+    """ Parses an integer, allowing surrounding whitespace """
+    return int(data)
+
+
+def to_float(data):
+    """ Parses a float, allowing surrounding whitespace """
+    return float(data)
+
+
+def to_decimal(data):
+    """ Parses a Decimal, rejecting values such as NaN and Infinity that
+    Decimal would otherwise accept """
+    value = decimal.Decimal(data.strip())
+    if not value.is_finite():
+        raise ValueError("Non-finite decimal {0}".format(data))
+    return value
+
+
+TRUE_VALUES = ('true', 'on', 'yes', 'y', '1', 'checked')
+FALSE_VALUES = ('false', 'off', 'no', 'n', '0', '')
+
+
+def to_bool(data):
+    """ Parses the usual spellings of checkbox and select values into a
+    boolean. An actual boolean, such as the False a :class:`CheckNode` resolves
+    to when unchecked, is passed through. """
+    if isinstance(data, bool):
+        return data
+    lowered = data.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError("Unrecognized boolean {0}".format(data))
+
+
+class DateCoercer(object):
+    """ Parses a date with strptime.
+
+    :param format: The strptime format, defaulting to the ISO 8601 format
+        browsers submit for date inputs.
+    """
+
+    def __init__(self, format='%Y-%m-%d'):
+        self.format = format
+
+    def __call__(self, data):
+        return datetime.datetime.strptime(data.strip(), self.format).date()
+
+
+class ListCoercer(object):
+    """ Splits a delimited string into a list, optionally coercing each
+    item. Lists (such as the output of :class:`CheckGroupNode`) are passed
+    through with their items coerced.
+
+    :param separator: The delimiter to split on.
+    :param item: An optional coercer to apply to every item.
+    """
+
+    def __init__(self, separator=',', item=None):
+        self.separator = separator
+        self.item = item
+
+    def __call__(self, data):
+        if not isinstance(data, list):
+            data = [part.strip() for part in data.split(self.separator)
+                    if part.strip()]
+        if self.item is not None:
+            return [self.item(part) for part in data]
+        return data
+
+
+COERCERS = {
+    'int': to_int,
+    'float': to_float,
+    'decimal': to_decimal,
+    'bool': to_bool,
+    'date': DateCoercer(),
+    'list': ListCoercer(),
+}
+""" The coercers that can be referred to by name from :attr:`Node.coerce` """
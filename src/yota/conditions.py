@@ -0,0 +1,57 @@
+class When(object):
+    """ A condition on the data of another Node of the Form, making a Node or
+    :class:`Check` active only while it holds. Inactive Nodes don't resolve
+    any data, none of their Checks run, and they can be left out of the
+    rendered Form, see :attr:`Form.render_inactive`.
+
+    .. code-block:: python
+
+        class OrderForm(yota.Form):
+            ship_elsewhere = CheckNode()
+            street = EntryNode(active_when='ship_elsewhere',
+                               validators=RequiredValidator())
+            payment = RadioNode(buttons=[('card', 'Card'), ('bank', 'Bank')])
+            card = EntryNode(active_when=When('payment', 'card'))
+
+    A plain attribute name, as given for street, is short for ``When(name)``.
+    A Node is also inactive while the Node its condition depends on is, so a
+    whole branch can be switched off by its first Node.
+
+    :param attr_name: The attribute name of the Node whose data is tested.
+    :param values: (optional) The values the data must be one of. With none
+        given, the data must be truthy. Checkbox groups and other Nodes with
+        list data match when any of their values do.
+    """
+    __slots__ = ['attr_name', 'values']
+
+    def __init__(self, attr_name, *values):
+        self.attr_name = attr_name
+        self.values = values
+
+    @classmethod
+    def of(cls, condition):
+        """ Returns condition as a When, making one from an attribute name """
+        if isinstance(condition, When):
+            return condition
+        return cls(condition)
+
+    def holds(self, data):
+        """ Whether the data of the controlling Node satisfies the condition
+        """
+        if not self.values:
+            return bool(data)
+        if isinstance(data, list):
+            return any(value in self.values for value in data)
+        try:
+            return data in self.values
+        except TypeError:
+            return False
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "<When {0} {1!r}>".format(self.attr_name, self.values)
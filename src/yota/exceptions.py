@@ -8,3 +8,11 @@ class NotCallableException(Exception):
 
 class ValidationError(Exception):
         pass
+
+
+class NoRendererException(Exception):
+        pass
+
+
+class CheckTimeout(Exception):
+        pass
@@ -0,0 +1,205 @@
+import bisect
+import threading
+import time
+
+try:
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+
+class Instrument(object):
+    """ The interface through which :class:`Form` and
+    :class:`yota.renderers.JinjaRenderer` report how long each phase of their
+    work took. This base class is the default and does nothing; hot paths
+    check :attr:`enabled` before reading the clock, so leaving it in place
+    costs next to nothing.
+
+    Phases reported, with the key that accompanies them:
+
+    - construct: Form __init__
+    - filter_post: the :attr:`Form._processor` stage
+    - resolve_data: resolving and coercing data for all Nodes
+    - check: a single :class:`Check` call, keyed by the Check's name
+    - batch_load: a batch of deferred lookups, keyed by the Loader's class
+    - validator: the :meth:`Form.validator` method
+    - trigger_event: running the listeners of an event, keyed by event type
+    - process_errors: :meth:`Form._process_errors`
+    - render: a complete render of the Form
+    - template_lookup: loading a template, keyed by template name
+    - render_node: rendering a single Node, keyed by template name
+    """
+    enabled = False
+
+    def record(self, form, phase, key, elapsed):
+        """ Receives a single timing.
+
+        :param form: The name of the Form class.
+        :param phase: One of the phase names above.
+        :param key: Identifies the Check, event or template, otherwise None.
+        :param elapsed: Time taken in seconds.
+        """
+        pass
+
+
+NULL_INSTRUMENT = Instrument()
+
+
+def check_key(check):
+    """ A stable name for a :class:`Check` to report timings under """
+    if check._attr_name:
+        return check._attr_name
+    return type(check.callable).__name__
+
+
+class Histogram(object):
+    """ A fixed bucket histogram of timings in seconds.
+
+    :attr counts: Observation counts per bucket. The final bucket counts
+        everything above the largest bound.
+    """
+    default_bounds = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                      0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, bounds=None):
+        self.bounds = tuple(bounds or self.default_bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """ Estimates a quantile as the upper bound of the bucket it falls
+        in. Values beyond the last bucket are reported as the maximum. """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class AggregatingInstrument(Instrument):
+    """ Collects timings in memory as a :class:`Histogram` per form class,
+    phase and key, and forwards every timing to any exporters given.
+
+    .. code-block:: python
+
+        instrument = AggregatingInstrument()
+        yota.Form._instrument = instrument
+        yota.renderers.JinjaRenderer.instrument = instrument
+
+    :param exporters: Objects with an export method taking the same arguments
+        as :meth:`Instrument.record`, such as :class:`StatsdExporter`.
+    :param bounds: Bucket bounds for the histograms, in seconds.
+    """
+    enabled = True
+
+    def __init__(self, exporters=(), bounds=None):
+        self.exporters = list(exporters)
+        self.bounds = bounds
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, form, phase, key, elapsed):
+        with self._lock:
+            try:
+                hist = self.histograms[(form, phase, key)]
+            except KeyError:
+                hist = Histogram(self.bounds)
+                self.histograms[(form, phase, key)] = hist
+            hist.observe(elapsed)
+        for exporter in self.exporters:
+            exporter.export(form, phase, key, elapsed)
+
+    def get(self, form, phase, key=None):
+        """ Returns the histogram for a form, phase and key, or None """
+        return self.histograms.get((form, phase, key))
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+
+class MemoryTransport(object):
+    """ A transport that keeps every line sent to it. A local stand-in for a
+    statsd server, mostly useful in tests. """
+
+    def __init__(self):
+        self.lines = []
+
+    def __call__(self, line):
+        self.lines.append(line)
+
+
+class UDPTransport(object):
+    """ Sends each line as a UDP datagram, as statsd expects. """
+
+    def __init__(self, host='127.0.0.1', port=8125):
+        # imported here to keep it out of the cost of importing yota
+        import socket
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def __call__(self, line):
+        try:
+            self.socket.sendto(line.encode('utf-8'), self.address)
+        except (IOError, OSError):
+            # metrics are best effort, never break a request over them
+            pass
+
+
+class StatsdExporter(object):
+    """ Forwards timings as statsd timer lines, such as
+    ``yota.SignupForm.check.email_valid:0.120|ms``.
+
+    :param transport: A callable that is handed each line, usually a
+        :class:`UDPTransport`.
+    :param prefix: Prepended to every metric name.
+    """
+
+    def __init__(self, transport, prefix='yota'):
+        self.transport = transport
+        self.prefix = prefix
+
+    def export(self, form, phase, key, elapsed):
+        name = "{0}.{1}.{2}".format(self.prefix, form, phase)
+        if key is not None:
+            name += "." + str(key).replace('.', '_')
+        self.transport("{0}:{1:.3f}|ms".format(name, elapsed * 1000))
+
+
+def render_prometheus(instrument, metric='yota_phase_seconds'):
+    """ Renders the histograms of an :class:`AggregatingInstrument` in the
+    Prometheus text exposition format, ready to be served from a metrics
+    endpoint. """
+    lines = ["# TYPE {0} histogram".format(metric)]
+    for (form, phase, key), hist in sorted(instrument.histograms.items(),
+                                           key=lambda item: str(item[0])):
+        labels = 'form="{0}",phase="{1}",key="{2}"'.format(
+            form, phase, '' if key is None else key)
+        seen = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            seen += count
+            lines.append('{0}_bucket{{{1},le="{2}"}} {3}'.format(
+                metric, labels, bound, seen))
+        lines.append('{0}_bucket{{{1},le="+Inf"}} {2}'.format(
+            metric, labels, hist.count))
+        lines.append('{0}_sum{{{1}}} {2}'.format(metric, labels, hist.total))
+        lines.append('{0}_count{{{1}}} {2}'.format(metric, labels,
+                                                   hist.count))
+    return "\n".join(lines) + "\n"
@@ -47,80 +47,92 @@
                 }
             },
             piecewise: false,
-            process_builtins: true
+            process_builtins: true,
+            // 'ajax' submits the whole form on every piecewise trigger,
+            // 'websocket' streams changed fields over a single persistent
+            // connection to a yota.asgi.ValidationChannel at socket_url
+            transport: 'ajax',
+            socket_url: null,
+            // ListNodes with a ChoiceProvider render a search box that
+            // fetches matching choices from their typeahead_url
+            typeahead_delay: 250,
+            typeahead_more_label: 'More results...'
         }, options);
 
         // A book-keeping system to track currently displayed errors
         var errors_present = {};
         $(this).data('yota_errors_present', errors_present);
 
-        // configuration options to go to jQuery Form plugin
-        //   more information about the plugin can be found at:
-        //   http://www.malsup.com/jquery/form/
-        var ajax_options = { 
-            // Called upon successful return of the AJAJ call
-            success: function (jsonObj)  {
-                // upon failure, deliver our error messages
-                if (jsonObj.block == true) {
-                    error_obj = jsonObj.errors;
-                    for (var key in error_obj) {
-                        if (key in errors_present) {
-                            // update
-                            settings.render_error(error_obj[key].identifiers,
-                                        "update",
-                                        error_obj[key].errors);
-                        } else {
-                            // new error
-                            settings.render_error(error_obj[key].identifiers,
-                                        "error",
-                                        error_obj[key].errors);
-                            // register the error in our bookkeeping system
-                            errors_present[key] = error_obj[key].identifiers;
-                        }
+        // Called upon successful return of a validation call, from either
+        // transport
+        var handle_result = function (jsonObj)  {
+            // upon failure, deliver our error messages
+            if (jsonObj.block == true) {
+                error_obj = jsonObj.errors;
+                for (var key in error_obj) {
+                    if (key in errors_present) {
+                        // update
+                        settings.render_error(error_obj[key].identifiers,
+                                    "update",
+                                    error_obj[key].errors);
+                    } else {
+                        // new error
+                        settings.render_error(error_obj[key].identifiers,
+                                    "error",
+                                    error_obj[key].errors);
+                        // register the error in our bookkeeping system
+                        errors_present[key] = error_obj[key].identifiers;
                     }
+                }
 
-                    // remove the errors that weren't updated
-                    for (var key in errors_present) {
-                        if (!(key in error_obj)) {
-                            settings.render_error(errors_present[key], "no_error", {});
-                            delete errors_present[key];
-                        }
-                    }
-                } else {
-                    // remove all the errors. Either we just got new ones, or there
-                    // were none.
-                    for (var key in errors_present) {
+                // remove the errors that weren't updated
+                for (var key in errors_present) {
+                    if (!(key in error_obj)) {
                         settings.render_error(errors_present[key], "no_error", {});
                         delete errors_present[key];
                     }
-                    // DEPRECATED - Scheduled for removal ~0.2.5
-                    if (jsonObj.redirect != undefined) {
-                        window.location.replace(jsonObj.redirect);
-                        return;
-                    }
-                    if ('success_blob' in jsonObj) {
-                        opts = jsonObj.success_blob;
-                        if (settings.process_builtins == true) {
-                            // Catch some builtin keys that and perform actions
-                            // with them
-                            if (opts.custom_success)
-                                eval(opts.custom_success);
-                            if (opts.reset_form == true)
-                                $(form_obj)[0].reset();
-                            if (opts.redirect)
-                                window.location.replace(opts.redirect);
-                            if (opts.ga_run) {
-                                if (typeof(ga) === 'function')
-                                    ga('send', 'event', opts.ga_run[0], opts.ga_run[1], opts.ga_run[2], opts.ga_run[3]);
-                            }
+                }
+            } else {
+                // remove all the errors. Either we just got new ones, or there
+                // were none.
+                for (var key in errors_present) {
+                    settings.render_error(errors_present[key], "no_error", {});
+                    delete errors_present[key];
+                }
+                // DEPRECATED - Scheduled for removal ~0.2.5
+                if (jsonObj.redirect != undefined) {
+                    window.location.replace(jsonObj.redirect);
+                    return;
+                }
+                if ('success_blob' in jsonObj) {
+                    opts = jsonObj.success_blob;
+                    if (settings.process_builtins == true) {
+                        // Catch some builtin keys that and perform actions
+                        // with them
+                        if (opts.custom_success)
+                            eval(opts.custom_success);
+                        if (opts.reset_form == true)
+                            $(form_obj)[0].reset();
+                        if (opts.redirect)
+                            window.location.replace(opts.redirect);
+                        if (opts.ga_run) {
+                            if (typeof(ga) === 'function')
+                                ga('send', 'event', opts.ga_run[0], opts.ga_run[1], opts.ga_run[2], opts.ga_run[3]);
                         }
-                    } else {
-                        opts = ''
                     }
-                    // run the success callback and pass it details from yota
-                    settings.render_success(opts, jsonObj.success_ids);
+                } else {
+                    opts = ''
                 }
-            },
+                // run the success callback and pass it details from yota
+                settings.render_success(opts, jsonObj.success_ids);
+            }
+        };
+
+        // configuration options to go to jQuery Form plugin
+        //   more information about the plugin can be found at:
+        //   http://www.malsup.com/jquery/form/
+        var ajax_options = { 
+            success: handle_result,
             beforeSubmit: function(arr, form, options) {
                 // gets the list of visited nodes and adds them to the
                 // submitted data
@@ -142,6 +154,58 @@
             // with errors the instant they start typing
             var visited = {};
             $(this).data('yota_visited', visited);
+
+            var send_piecewise = function (input, name) {
+                $(form_obj).ajaxSubmit(ajax_options);
+            };
+            if (settings.transport == 'websocket') {
+                var socket = new WebSocket(settings.socket_url);
+                // responses can arrive out of order, so only the newest
+                // counts
+                var last_sent = 0;
+                var last_seen = 0;
+                // messages triggered before the connection is established
+                var pending = [];
+                socket.onopen = function () {
+                    while (pending.length)
+                        socket.send(pending.shift());
+                };
+                socket.onmessage = function (event) {
+                    var reply = JSON.parse(event.data);
+                    if (reply.result == undefined || reply.id < last_seen)
+                        return;
+                    last_seen = reply.id;
+                    handle_result(reply.result);
+                };
+                $(this).data('yota_socket', socket);
+                send_piecewise = function (input, name) {
+                    var value = $(input).val();
+                    var update = {};
+                    var removed = [];
+                    if ($(input).is(':radio')) {
+                        // the group's value is that of its checked radio,
+                        // and a group with none checked submits nothing
+                        var checked = $(form_obj).find(':radio:checked').filter(
+                            function () { return this.name == name; });
+                        if (checked.length)
+                            update[name] = checked.val();
+                    } else if ($(input).is(':checkbox') && !$(input).is(':checked')) {
+                        // unchecked boxes submit nothing, so drop the value
+                        // the session holds for it
+                        removed.push(name);
+                    } else {
+                        update[name] = value;
+                    }
+                    var message = JSON.stringify(
+                        {id: ++last_sent, update: update, removed: removed,
+                         visited: [name]});
+                    if (socket.readyState == WebSocket.OPEN)
+                        socket.send(message);
+                    else
+                        pending.push(message);
+                };
+            }
+
             // loop over all elements in the form
             $(this).find(":input").each(function() {
                 // preload our vars
@@ -151,12 +215,66 @@
                 if (trigger) {
                     $(this).on(trigger, function() {
                         visited[name] = true;
-                        $(form_obj).ajaxSubmit(ajax_options);
+                        send_piecewise(this, name);
                     });
                 }
             });
         }
 
+        // Selects backed by a ChoiceProvider only hold a page of choices.
+        // Typing in the search box ahead of one replaces them with the
+        // matching choices, a page at a time, keeping the selected one.
+        $(this).find("select[data-typeahead]").each(function () {
+            var select = $(this);
+            var url = select.data("typeahead");
+            var search = $('<input type="text" class="yota-typeahead">');
+            var query = '';
+            var page = 0;
+            var timer = null;
+            // numbers each request so replies to superseded ones are dropped
+            var seq = 0;
+            var load = function () {
+                var sent = ++seq;
+                var requested = page;
+                $.getJSON(url, {q: query, page: page}, function (reply) {
+                    if (sent != seq)
+                        return;
+                    select.find("option[data-more]").remove();
+                    if (requested == 0)
+                        select.find("option:not(:selected)").remove();
+                    var selected = select.val();
+                    $.each(reply.results, function (i, choice) {
+                        if (choice.value == selected)
+                            return;
+                        select.append($("<option>").attr("value", choice.value)
+                                                   .text(choice.label));
+                    });
+                    if (reply.more)
+                        select.append($('<option value="" data-more="true">')
+                                      .text(settings.typeahead_more_label));
+                });
+            };
+            search.on("input", function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () {
+                    query = search.val();
+                    page = 0;
+                    load();
+                }, settings.typeahead_delay);
+            });
+            var chosen = select.val();
+            select.on("change", function () {
+                if (select.find("option:selected").data("more")) {
+                    // keep the previous choice while the next page loads
+                    select.val(chosen);
+                    page += 1;
+                    load();
+                } else
+                    chosen = select.val();
+            });
+            select.before(search);
+        });
+
         // attach a slightly modified call to the submit button. This allows
         // the server side piecewise validation to recognize actual submisiion
         // properly
@@ -0,0 +1,209 @@
+from yota.instrumentation import clock
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+
+
+class Deferred(object):
+    """ The pending result of looking up a single key with a :class:`Loader`.
+    Validators return one from their call rather than querying straight away,
+    attaching what to do with the value through :meth:`Deferred.then`:
+
+    .. code-block:: python
+
+        def __call__(self, target):
+            return self.loader.load(target.data).then(
+                lambda user: user and target.add_error({'message': 'Taken'}))
+
+    Once every :class:`Check` of a Form has run, each Loader is called once
+    with every key its Deferreds asked for, across all fields and every row
+    of a :class:`yota.nodes.RepeatNode`, and the callbacks are run with the
+    values found. A callback may in turn return Deferreds, which are loaded
+    in the next batch.
+    """
+    __slots__ = ['loader', 'key', 'callbacks']
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+        self.callbacks = []
+
+    def then(self, callback):
+        """ Registers a callable to receive the loaded value """
+        self.callbacks.append(callback)
+        return self
+
+    def resolve(self, value):
+        """ Runs the callbacks with the loaded value, returning the Deferreds
+        they return in turn """
+        pending = []
+        for callback in self.callbacks:
+            collect(callback(value), pending)
+        return pending
+
+    def __repr__(self):
+        return "<Deferred {0!r} from {1!r}>".format(self.key, self.loader)
+
+
+def collect(result, pending):
+    """ Adds the Deferreds in the value returned by a validator, be it a
+    single one or a list of them, to pending """
+    if isinstance(result, Deferred):
+        pending.append(result)
+    elif isinstance(result, (list, tuple)):
+        for item in result:
+            collect(item, pending)
+    return pending
+
+
+def dispatch(pending, report=None):
+    """ Loads the keys of every Deferred in pending with a single batch per
+    Loader, and resolves them. Repeats for Deferreds returned by their
+    callbacks until none are left.
+
+    :param report: (optional) Called with each Loader and the time its batch
+        took, for instrumentation.
+    """
+    while pending:
+        groups = OrderedDict()
+        for deferred in pending:
+            groups.setdefault(deferred.loader, []).append(deferred)
+        pending = []
+        for loader, group in groups.items():
+            keys = list(OrderedDict.fromkeys(d.key for d in group))
+            values = loader.load_many(keys, report)
+            for deferred in group:
+                pending.extend(deferred.resolve(values.get(deferred.key)))
+
+
+class ResourcePool(object):
+    """ A bounded pool of connections or other resources shared by the
+    Loaders that need one. Resources are made by factory as they're first
+    needed, up to size of them, after which callers wait for one to be
+    released.
+
+    .. code-block:: python
+
+        DB = ResourcePool(lambda: sqlite3.connect('app.db'), size=4)
+
+        with DB.acquire() as conn:
+            ...
+
+    :param factory: Called without arguments to make a new resource.
+    :param size: The most resources held at once.
+    :param timeout: (optional) Seconds to wait for a resource before raising
+        ``queue.Empty``.
+    """
+
+    def __init__(self, factory, size=4, timeout=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        try:
+            import queue
+        except ImportError:
+            # Python 2
+            import Queue as queue
+        self._idle = queue.LifoQueue()
+        self._empty = queue.Empty
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        """ Lends out a resource for the duration of a with block """
+        resource = self._get()
+        try:
+            yield resource
+        finally:
+            self._idle.put(resource)
+
+    def _get(self):
+        try:
+            return self._idle.get_nowait()
+        except self._empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=self.timeout)
+
+
+class Loader(object):
+    """ Looks up many keys of one resource at once, such as the rows of a
+    users table by email. Subclasses implement :meth:`batch_load`, and
+    validators call :meth:`load` for each key they need. Loaders hold no
+    state between validation calls, so declare one at module level and share
+    it between Forms and threads. Like a :class:`yota.choices.ChoiceSet`, a
+    Loader is never copied into Forms.
+
+    :param pool: (optional) A :class:`ResourcePool` that a resource is
+        acquired from for each batch and passed to :meth:`batch_load`.
+    """
+
+    max_batch = 500
+    """ The most keys passed to a single :meth:`batch_load` call. Larger
+    batches are split, to stay within the limits of SQL ``IN`` clauses. """
+
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def batch_load(self, keys, resource):
+        """ Returns a dictionary of the values found for keys. Keys that
+        aren't found can be left out, and are given as None.
+
+        :param keys: A list of distinct keys.
+        :param resource: A resource from the Loader's pool, or None if it
+            doesn't have one.
+        """
+        raise NotImplementedError
+
+    def load(self, key):
+        """ Returns a :class:`Deferred` for the value of key """
+        return Deferred(self, key)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def load_many(self, keys, report=None):
+        """ Loads keys in as few calls of :meth:`batch_load` as
+        :attr:`max_batch` allows """
+        values = {}
+        for start in range(0, len(keys), self.max_batch):
+            chunk = keys[start:start + self.max_batch]
+            if report is not None:
+                began = clock()
+            if self.pool is None:
+                values.update(self.batch_load(chunk, None))
+            else:
+                with self.pool.acquire() as resource:
+                    values.update(self.batch_load(chunk, resource))
+            if report is not None:
+                report(self, clock() - began)
+        return values
+
+
+class MemoryLoader(Loader):
+    """ A :class:`Loader` over a dictionary, standing in for a database in
+    tests. Every batch it's asked for is kept in :attr:`batches`. """
+
+    def __init__(self, values=None, pool=None):
+        super(MemoryLoader, self).__init__(pool)
+        self.values = dict(values or {})
+        self.batches = []
+
+    def batch_load(self, keys, resource):
+        self.batches.append(list(keys))
+        return dict((key, self.values[key]) for key in keys
+                    if key in self.values)
@@ -1,5 +1,21 @@
 from yota.exceptions import InvalidContextException
+from yota.uploads import receive_upload, UploadError
+from yota.coercers import COERCERS
+from yota.validators import Check, RowCheck
+from yota.exceptions import NotCallableException
 import copy
+import threading
+
+
+# Guards Node._create_counter, which is shared by Nodes built on any thread
+_counter_lock = threading.Lock()
+
+
+def _next_counter():
+    with _counter_lock:
+        count = Node._create_counter
+        Node._create_counter += 1
+    return count
 
 
 class Node(object):
@@ -48,6 +64,18 @@ class Node(object):
         the :meth:`Node.resolve_data` method cannot identify anything, the data
         attribute will be set to this value. Defaults to "".
 
+    :param coerce: A callable, or the name of one of the builtin coercers in
+        :data:`yota.coercers.COERCERS` such as 'int', 'decimal', 'date',
+        'bool' or 'list', used to parse submitted data once into a native
+        type. See :meth:`Node.coerce_data`.
+
+    :param coerce_message: The error added to the Node when coercion fails.
+
+    :param active_when: A :class:`yota.conditions.When`, or the attribute
+        name of another Node, that must hold for this Node to be active.
+        Inactive Nodes resolve no data and none of their Checks run. Whether
+        the Node is active is kept in its :attr:`active` attribute.
+
     The default Node init method accepts any keyword arguments and adds them to
     the Node's rendering context. In addition any class attributes may be added
     to custom Nodes and these attributes will be copied at instantiation time
@@ -56,8 +84,13 @@ class Node(object):
 
     _create_counter = 0
     """ Allows tracking the order of Node creation """
-    _ignores = ['template', 'validator']
+    _ignores = ['template', 'validator', 'active_when']
     _requires = []
+    _strict = True
+    """ Whether :meth:`Node.get_context` checks :attr:`_requires` on every
+    render. It's read from the Node class itself, as instances hold copies.
+    Turned off in production mode, where the Nodes of a Form are checked once
+    by :meth:`Form.compile`. """
     _attr_name = None
     _null_val = ""
 
@@ -67,6 +100,11 @@ class Node(object):
     label = True
     errors = []
     data = ''
+    value = None
+    coerce = None
+    coerce_message = 'Please enter a valid value'
+    active_when = None
+    active = True
 
     def __init__(self, **kwargs):
         # A bit of a hack to copy all our class attributes
@@ -84,8 +122,7 @@ class Node(object):
         self.__dict__.update(kwargs)
 
         # Allows the parent form to keep track of attribute order
-        self._create_counter = Node._create_counter
-        Node._create_counter += 1
+        self._create_counter = _next_counter()
 
     def add_error(self, error):
         """ This method serves mostly as a wrapper alowing for different error
@@ -95,6 +132,15 @@ class Node(object):
         :doc:`Validators` section. """
         self.errors.append(error)
 
+    def error_nodes(self):
+        """ The Nodes holding the validation errors of this Node, which is
+        just the Node itself if it has any. Nodes made up of others, such as
+        the :class:`RepeatNode`, return those too so that each error is
+        delivered to its own element. """
+        if self.errors:
+            return (self, )
+        return ()
+
     def json_identifiers(self):
         """ Allows passing arbitrary identification information to your JSON
         error rendering callback. For instance, a common use case is the display
@@ -154,6 +200,25 @@ class Node(object):
         except KeyError:
             self.data = self._null_val
 
+    def coerce_data(self):
+        """ Called after :meth:`Node.resolve_data` during validation. If the
+        Node declares a :attr:`coerce` the submitted data is parsed once and
+        stored in :attr:`value` next to the raw :attr:`data`, where validators
+        and :meth:`Form.data_by_attr` pick it up instead of parsing the string
+        again. Empty submissions leave value as None so that requiring a value
+        remains the job of a validator, and failures add
+        :attr:`coerce_message` as an error. """
+        self.value = None
+        coercer = self.coerce
+        if coercer is None or self.data == '' or self.data is None:
+            return
+        if not callable(coercer):
+            coercer = COERCERS[coercer]
+        try:
+            self.value = coercer(self.data)
+        except (ValueError, TypeError, ArithmeticError):
+            self.add_error({'message': self.coerce_message})
+
     def get_context(self, g_context):
         """ Builds our rendering context for the Node at render time. By
         default all attributes of the Node are added to the global namespace
@@ -177,12 +242,18 @@ class Node(object):
                 d[key] = attr
 
         # check to make sure all required attributes are present
+        if Node._strict:
+            self.check_requires(d)
+        d['g'] = g_context
+        return d
+
+    def check_requires(self, context):
+        """ Raises an InvalidContextException if any attribute named in
+        :attr:`_requires` is missing from a rendering context. """
         for r in self._requires:
-            if r not in d:
+            if r not in context:
                 raise InvalidContextException(
                     "Missing required context value '{0}'".format(r))
-        d['g'] = g_context
-        return d
 
     def get_list_names(self):
         """ As the title suggests this needs to return an iterable of names. These
@@ -204,14 +275,409 @@ class Node(object):
 class Blueprint(object):
     def __init__(self, source):
         for node in source._node_list:
-            # Reassign attribute order to fit in line with the other attributes
-            node._create_counter = Node._create_counter
-            Node._create_counter += 1
+            # Reassign attribute order to fit in line with the other
+            # attributes, for when Forms are ordered by Node creation
+            node._create_counter = _next_counter()
         self._node_list = source._node_list
         self._event_lists = source._event_lists
         self._validation_list = source._validation_list
 
 
+class NodeList(list):
+    """ The ordered list of Nodes in a Form, along with an index of them by
+    :attr:`Node._attr_name` and :attr:`Node.name` and of their positions,
+    allowing lookups in constant time and the insertion of many Nodes at
+    once. The index is kept up to date by the list's own methods.
+
+    Names are only assigned when a Form sets the identifiers of its Nodes, so
+    the name index is built on first use. It's rebuilt when a Node's name has
+    changed since, or at most once after each change to the list when a name
+    isn't found. Positions are built on first use, and afterwards updated
+    for the inserted Nodes and those after them, so inserting before the
+    closing Node of a Form only moves that one along. """
+
+    def __init__(self, nodes=()):
+        list.__init__(self, nodes)
+        self._reindex()
+
+    def _reindex(self):
+        self._by_attr = {}
+        for node in self:
+            self._by_attr[node._attr_name] = node
+        self._by_name = None
+        self._names_fresh = False
+        self._positions = None
+
+    def _index_names(self, fresh):
+        self._by_name = {}
+        for node in self:
+            self._by_name[getattr(node, 'name', None)] = node
+        self._names_fresh = fresh
+
+    def _added(self, nodes, start):
+        """ Indexes nodes, inserted from position start """
+        for node in nodes:
+            self._by_attr[node._attr_name] = node
+            if self._by_name is not None:
+                self._by_name[getattr(node, 'name', None)] = node
+        self._names_fresh = False
+        positions = self._positions
+        if positions is None:
+            return
+        # only the Nodes after them have moved along, which for the usual
+        # insertion before the closing Node is just that one
+        by_attr = self._by_attr
+        for index in range(start, len(self)):
+            node = self[index]
+            if by_attr.get(node._attr_name) is node:
+                positions[node._attr_name] = index
+
+    def get_attr(self, attr_name, default=None):
+        """ The Node with the given :attr:`Node._attr_name` """
+        return self._by_attr.get(attr_name, default)
+
+    def get_name(self, name, default=None):
+        """ The Node with the given :attr:`Node.name` """
+        if self._by_name is None:
+            self._index_names(False)
+        node = self._by_name.get(name)
+        if node is not None and getattr(node, 'name', None) == name:
+            return node
+        if node is None and self._names_fresh:
+            return default
+        # renamed, or named since the list last changed
+        self._index_names(True)
+        return self._by_name.get(name, default)
+
+    def position(self, attr_name):
+        """ The index of the Node with the given :attr:`Node._attr_name`, or
+        None if there isn't one """
+        if self._positions is None:
+            self._positions = {}
+            for index, node in enumerate(self):
+                if self._by_attr.get(node._attr_name) is node:
+                    self._positions[node._attr_name] = index
+        return self._positions.get(attr_name)
+
+    def insert_many(self, position, nodes):
+        """ Inserts a sequence of Nodes before position in a single step """
+        nodes = list(nodes)
+        start = self._start(position)
+        list.__setitem__(self, slice(position, position), nodes)
+        self._added(nodes, start)
+
+    def append(self, node):
+        list.append(self, node)
+        self._added((node, ), len(self) - 1)
+
+    def extend(self, nodes):
+        nodes = list(nodes)
+        list.extend(self, nodes)
+        self._added(nodes, len(self) - len(nodes))
+
+    def __iadd__(self, nodes):
+        self.extend(nodes)
+        return self
+
+    def insert(self, position, node):
+        start = self._start(position)
+        list.insert(self, position, node)
+        self._added((node, ), start)
+
+    def _start(self, position):
+        """ The index a Node inserted before position ends up at """
+        if position < 0:
+            return max(0, len(self) + position)
+        return min(position, len(self))
+
+    # Removals and replacements are rare, so they simply rebuild the index
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self._reindex()
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self._reindex()
+
+    def pop(self, *args):
+        node = list.pop(self, *args)
+        self._reindex()
+        return node
+
+    def remove(self, node):
+        list.remove(self, node)
+        self._reindex()
+
+    def clear(self):
+        del self[:]
+
+    # Python 2 sends simple slices around __setitem__ and __delitem__
+    def __setslice__(self, i, j, value):
+        self.__setitem__(slice(i, j), value)
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(i, j))
+
+    def __copy__(self):
+        return self.__class__(self)
+
+    def __deepcopy__(self, memo):
+        new = self.__class__()
+        memo[id(self)] = new
+        new.extend(copy.deepcopy(node, memo) for node in self)
+        return new
+
+
+class RowNode(object):
+    """ A Node of one row of a :class:`RepeatNode`. It holds the state of
+    the Node in that row, its identifiers, data, coerced value and errors,
+    and stands in for the Node declared in the row definition for everything
+    else: other attributes are read from the declared Node, and its methods
+    run against the RowNode. Validators can treat it like any other Node. """
+
+    __slots__ = ('_node', '_attr_name', 'id', 'name', 'data', 'value',
+                 'errors')
+
+    def __init__(self, node, name, id):
+        self._node = node
+        self._attr_name = name
+        self.id = id
+        self.name = name
+        self.data = node._null_val
+        self.value = None
+        self.errors = []
+
+    def __getattr__(self, key):
+        if key == '_node' or key.startswith('__'):
+            raise AttributeError(key)
+        node = self._node
+        try:
+            return node.__dict__[key]
+        except KeyError:
+            pass
+        for klass in type(node).__mro__:
+            if key in klass.__dict__:
+                attr = klass.__dict__[key]
+                # bind methods and properties to the row rather than the
+                # declared Node
+                if hasattr(attr, '__get__'):
+                    return attr.__get__(self, type(node))
+                return attr
+        raise AttributeError(key)
+
+    def __repr__(self):
+        return "<RowNode at {0}, name={1}>".format(id(self), self.name)
+
+
+class Row(object):
+    """ The Nodes of one row of a :class:`RepeatNode`. They're looked up by
+    their attribute name in the row definition, ``row['qty']``. """
+
+    __slots__ = ('index', 'nodes', '_positions')
+
+    def __init__(self, group, index):
+        self.index = index
+        self._positions = group._positions
+        name = '{0}-{1}-'.format(group.name, index)
+        id = '{0}-{1}-'.format(group.id, index)
+        self.nodes = [RowNode(node, name + node._attr_name,
+                              id + node._attr_name)
+                      for node in group._nodes]
+
+    def __getitem__(self, attr_name):
+        return self.nodes[self._positions[attr_name]]
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def output(self):
+        """ The validated data of the row keyed by attribute name, preferring
+        coerced values like :meth:`Form.data_by_attr` """
+        ret = {}
+        for row_node in self.nodes:
+            node = row_node._node
+            if getattr(node, 'coerce', None) is not None:
+                ret[node._attr_name] = row_node.value
+            else:
+                ret[node._attr_name] = row_node.data
+        return ret
+
+
+class RepeatNode(Node):
+    """ A group of Nodes repeated for a variable number of rows, such as the
+    line items of an order. The Nodes and Checks of a row are declared once
+    on a Form, passed in as a :class:`Blueprint`, and that definition is
+    shared by every row and every Form using the group. Each row only holds
+    the identifiers, data and errors of its Nodes, see :class:`Row`.
+
+    .. code-block:: python
+
+        class LineItem(yota.Form):
+            sku = ListNode(items=PRODUCTS)
+            qty = IntegerNode(validators=RequiredValidator())
+            stock = Check(StockValidator(), 'sku', 'qty')
+
+        class OrderForm(yota.Form):
+            items = RepeatNode(Blueprint(LineItem), max_rows=500)
+
+    The elements of each row are named ``{name}-{row}-{attr}``, for
+    instance ``items-3-qty``, and the rows present are found from the names
+    of the submitted data. Every Check of the row definition, declared or
+    shorthand, is run for each row by a single
+    :class:`yota.validators.RowCheck`, which passes the :class:`RowNode` of
+    each Node it names within the row. Validators given to the RepeatNode
+    itself receive the RepeatNode and can look at every row through
+    :attr:`rows`. The validated data of a RepeatNode is a list holding a
+    dictionary for each row, keyed by attribute name.
+
+    Rows may hold any Node that submits a single value under its name.
+    Listeners of the row definition aren't run.
+
+    :param source: A :class:`Blueprint`, or a Form class, declaring the
+        Nodes and Checks of a row.
+
+    :param min_rows: The number of rows rendered and validated even if
+        nothing is submitted for them. Defaults to 1.
+
+    :param max_rows: The most rows accepted. Submissions with more get
+        max_rows_message as an error and only the first max_rows are kept.
+        Defaults to 1000.
+    """
+    template = 'repeat'
+    min_rows = 1
+    max_rows = 1000
+    max_rows_message = 'Too many rows were submitted'
+    css_class = ''
+    css_style = ''
+    rows = []
+    """ The :class:`Row` objects of the last validation, or the empty rows
+    of a new Form """
+
+    def __init__(self, source, **kwargs):
+        Node.__init__(self, **kwargs)
+        # Our own copy of the row definition, shared from here on
+        self._nodes = NodeList(copy.deepcopy(list(source._node_list)))
+        self._positions = {}
+        for i, node in enumerate(self._nodes):
+            self._positions[node._attr_name] = i
+            # titles and the like. Ids and names are set per row
+            node.set_identifiers('')
+
+        validators = self.validators
+        if callable(validators):
+            validators = (validators, )
+        validators = list(validators)
+        for node in self._nodes:
+            node_validators = node.validators
+            if callable(node_validators):
+                node_validators = (node_validators, )
+            for validator in node_validators:
+                if isinstance(validator, Check):
+                    validators.append(RowCheck(
+                        validator.callable,
+                        validator.args or [node._attr_name],
+                        validator.kwargs))
+                else:
+                    validators.append(RowCheck(validator, [node._attr_name]))
+            node.validators = []
+        for check in source._validation_list:
+            validators.append(RowCheck(check.callable, check.args,
+                                       check.kwargs))
+
+        for validator in validators:
+            if isinstance(validator, RowCheck) and \
+                    not callable(validator.callable):
+                raise NotCallableException(
+                    "Validators provided must be callable, got type '{0}'"
+                    .format(type(validator.callable)))
+        self.validators = validators
+
+    def __deepcopy__(self, memo):
+        # the row definition is shared, only the state of the group is copied
+        memo[id(self._nodes)] = self._nodes
+        memo[id(self._positions)] = self._positions
+        for node in self._nodes:
+            memo[id(node)] = node
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            new.__dict__[key] = copy.deepcopy(value, memo)
+        return new
+
+    def set_identifiers(self, parent_name):
+        """ Sets the identifiers of the group, and starts it off with
+        :attr:`min_rows` empty rows """
+        Node.set_identifiers(self, parent_name)
+        self.rows = [Row(self, index) for index in range(self.min_rows)]
+
+    def name_prefix(self):
+        """ The prefix of the names of every element of the rows """
+        return self.name + '-'
+
+    def row_indexes(self, data):
+        """ The sorted indexes of the rows present in the submitted data,
+        along with the first :attr:`min_rows` """
+        prefix = self.name_prefix()
+        indexes = set(range(self.min_rows))
+        for key in data:
+            if key.startswith(prefix):
+                index = key[len(prefix):].partition('-')[0]
+                if index.isdigit() and len(index) < 10:
+                    indexes.add(int(index))
+        return sorted(indexes)
+
+    def resolve_data(self, data):
+        """ Builds a :class:`Row` for each row submitted, and resolves and
+        coerces the data of every Node in it """
+        indexes = self.row_indexes(data)
+        if len(indexes) > self.max_rows:
+            self.add_error({'message': self.max_rows_message})
+            indexes = indexes[:self.max_rows]
+
+        self.rows = []
+        for index in indexes:
+            row = Row(self, index)
+            for node in row:
+                node.resolve_data(data)
+                node.coerce_data()
+            self.rows.append(row)
+        self.data = [row.output() for row in self.rows]
+
+    def get_list_names(self):
+        return [node.name for row in self.rows for node in row]
+
+    def error_nodes(self):
+        ret = [node for row in self.rows for node in row if node.errors]
+        if self.errors:
+            ret.insert(0, self)
+        return ret
+
+    def get_context(self, g_context):
+        """ Adds the rows to the rendering context. Each row is a pair of
+        its index and a list of (template, context) pairs for its Nodes. The
+        context of each declared Node is built once, and only the
+        identifiers, data and errors differ between rows. """
+        d = Node.get_context(self, g_context)
+        columns = [(node.template, node.get_context(g_context))
+                   for node in self._nodes]
+        d['rows'] = []
+        for row in self.rows:
+            cells = []
+            for (template, context), node in zip(columns, row):
+                context = dict(context)
+                context['id'] = node.id
+                context['name'] = node.name
+                context['data'] = node.data
+                context['value'] = node.value
+                context['errors'] = node.errors
+                cells.append((template, context))
+            d['rows'].append((row.index, cells))
+        return d
+
+
 class BaseNode(Node):
     """ This base Node supplies the name of the base rendering template that
     is used for standard form elements. This base template provides error divs
@@ -240,10 +706,31 @@ class ListNode(BaseNode):
         validation error occurs.
 
     :attr items: Must be a list of tuples where the first element is the value
-        of the second is the label.
+        of the second is the label, or a :class:`yota.choices.ChoiceSet`.
+        The options of a ChoiceSet are rendered once per theme and reused.
+        Lists too long to render in full can be given as a
+        :class:`yota.choices.ChoiceProvider`, and only its first page and the
+        selected choice are rendered.
+    :attr typeahead_url: The URL yota.js fetches further pages of a
+        ChoiceProvider from as the user types, see
+        :meth:`yota.choices.ChoiceProvider.typeahead`.
     """
     template = 'list'
     _requires = ['items']
+    typeahead_url = ''
+
+    def get_context(self, g_context):
+        d = super(ListNode, self).get_context(g_context)
+        from yota.choices import ChoiceProvider
+        items = getattr(self, 'items', None)
+        if isinstance(items, ChoiceProvider):
+            d['items'] = items.initial(self.data)
+        return d
+
+    def get_choices(self):
+        """ The choices of the Node, used by
+        :class:`yota.validators.ChoiceValidator` """
+        return self.items
 
 
 class RadioNode(BaseNode):
@@ -251,11 +738,15 @@ class RadioNode(BaseNode):
     attribute.
 
     :attr buttons: Must be a list of tuples where the first element is the
-        value of the second is the label.
+        value of the second is the label, or a
+        :class:`yota.choices.ChoiceSet`.
     """
     template = 'radio_group'
     _requires = ['buttons']
 
+    def get_choices(self):
+        return self.buttons
+
 class CheckNode(BaseNode):
     """ Creates a simple checkbox for your form. """
     template = 'checkbox'
@@ -276,15 +767,29 @@ class CheckGroupNode(BaseNode):
     containing the names of the checkboxes that were checked.
 
     :attr boxes: Must be a list of tuples where the first element is the
-        name, the second is the label.
+        name, the second is the label, or a :class:`yota.choices.ChoiceSet`.
     """
     template = 'checkbox_group'
     _requires = ['boxes']
 
+    def get_choices(self):
+        return self.boxes
+
     def resolve_data(self, data):
         # return a list of checked values since we have multiple names
+        from yota.choices import ChoiceSet
+        boxes = self.boxes
+        if isinstance(boxes, ChoiceSet) and len(data) < len(boxes):
+            # fewer fields were submitted than there are boxes, so look the
+            # submitted names up instead, keeping the order of the boxes
+            ret = [name for name in data
+                   if name in boxes and len(data[name]) > 0]
+            ret.sort(key=boxes.position)
+            self.data = ret
+            return
+
         ret = []
-        for name, desc in self.boxes:
+        for name, desc in boxes:
             try:
                 if len(data[name]) > 0:
                     ret.append(name)
@@ -323,15 +828,78 @@ class EntryNode(BaseNode):
     template = 'entry'
 
 
+class IntegerNode(EntryNode):
+    """ An input box whose data is coerced to an int. """
+    coerce = 'int'
+    coerce_message = 'Value must be a whole number'
+
+
+class DecimalNode(EntryNode):
+    """ An input box whose data is coerced to a Decimal. """
+    coerce = 'decimal'
+    coerce_message = 'Value must be a number'
+
+
+class DateNode(EntryNode):
+    """ An input box whose data is coerced to a date. The format defaults to
+    ISO 8601, and can be changed by passing a
+    :class:`yota.coercers.DateCoercer` as coerce. """
+    coerce = 'date'
+    coerce_message = 'Value must be a date formatted as YYYY-MM-DD'
+
+
 class PasswordNode(BaseNode):
     """ Creates an input box for your form. """
     template = 'password'
 
 
 class FileNode(BaseNode):
-    """ Creates an input box for your form. """
+    """ Creates a file upload input for your form. Submitted files are
+    streamed in chunks into a spooled temporary file (see
+    :func:`yota.uploads.receive_upload`) and the Node's data becomes a
+    :class:`yota.uploads.Upload`. Oversized or mismatched uploads are
+    rejected while reading, adding an error to the Node and setting its data
+    to :attr:`Node._null_val`.
+
+    :attr accepts: The accept attribute for the input element.
+    :attr max_size: The maximum upload size in bytes, or None for no limit.
+    :attr check_type: If True the content type sniffed from the file's
+        leading bytes must match accepts. Files that can't be identified are
+        rejected.
+    :attr hash_name: A hashlib algorithm to digest uploads with, available as
+        the Upload's digest attribute.
+    :attr spool_size: Uploads above this many bytes are spooled to disk.
+    """
     template = 'file'
     accepts = 'audio/*,video/*,image/*'
+    max_size = None
+    check_type = False
+    hash_name = None
+    spool_size = 1024 * 1024
+
+    def resolve_data(self, data):
+        try:
+            source = data[self.name]
+        except KeyError:
+            self.data = self._null_val
+            return
+
+        # Frameworks generally submit an empty string when no file is chosen
+        if not (hasattr(source, 'read') or hasattr(source, 'stream') or
+                hasattr(source, 'file')):
+            self.data = source
+            return
+
+        try:
+            self.data = receive_upload(
+                source,
+                max_size=self.max_size,
+                accepts=self.accepts if self.check_type else None,
+                hash_name=self.hash_name,
+                spool_size=self.spool_size)
+        except UploadError as e:
+            self.data = self._null_val
+            self.add_error({'message': str(e)})
 
 
 class TextareaNode(BaseNode):
@@ -1,10 +1,359 @@
+import abc
+import unicodedata
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+try:
+    string_types = (str, unicode)
+    text_type = unicode
+except NameError:
+    string_types = (str, bytes)
+    text_type = str
+
+
+class Filter(object):
+    """ A single composable step in a :class:`PostProcessor` filter chain.
+    Filters are callables that accept a submitted string value and return
+    the processed value. They are only ever handed strings, multi-valued
+    fields are filtered element by element and everything else (such as
+    uploaded files) is passed through untouched.
+
+    :attr expensive: Expensive filters are only run on fields that are
+        actually inspected by a :class:`Check`. Data that is never validated
+        is left as submitted.
+    """
+    expensive = False
+
+    def __call__(self, value):
+        return value
+
+
+class CoerceTextFilter(Filter):
+    """ Decodes byte strings into text so that everything after it in the
+    chain, as well as all validators, only ever see one string type.
+
+    :param encoding: The encoding submitted data is assumed to be in.
+    :param errors: The error handling scheme passed to decode.
+    """
+
+    def __init__(self, encoding='utf-8', errors='replace'):
+        self.encoding = encoding
+        self.errors = errors
+
+    def __call__(self, value):
+        if not isinstance(value, text_type):
+            return value.decode(self.encoding, self.errors)
+        return value
+
+
+class StripFilter(Filter):
+    """ Strips leading and trailing characters from submitted values.
+
+    :param chars: The characters to strip, defaults to whitespace.
+    """
+
+    def __init__(self, chars=None):
+        self.chars = chars
+
+    def __call__(self, value):
+        return value.strip(self.chars)
+
+
+class SizeLimitFilter(Filter):
+    """ Truncates submitted values to a maximum length, protecting every
+    validator further down the line from oversized input.
+
+    :param max_length: The longest value that will be passed through.
+    """
+
+    def __init__(self, max_length):
+        self.max_length = max_length
+
+    def __call__(self, value):
+        if len(value) > self.max_length:
+            return value[:self.max_length]
+        return value
+
+
+class NormalizeFilter(Filter):
+    """ Applies Unicode normalization to submitted text. Byte strings are
+    passed through unchanged, so place a :class:`CoerceTextFilter` before it
+    in the chain if your framework hands you bytes.
+
+    :param form: The normalization form, one of NFC, NFKC, NFD or NFKD.
+    """
+    expensive = True
+
+    def __init__(self, form='NFC'):
+        self.form = form
+
+    def __call__(self, value):
+        if isinstance(value, text_type):
+            return unicodedata.normalize(self.form, value)
+        return value
+
+
 class PostProcessor(object):
     """ A base class for all post processors. Post
     processors handle interoperability between different
-    web development frameworks. """
+    web development frameworks.
+
+    Subclasses may also declare a chain of :class:`Filter` objects that every
+    submitted value will be run through before it reaches the Nodes. The chain
+    is compiled once per processor class and shared by all Forms that use it,
+    see :meth:`PostProcessor.shared`.
+
+    .. code-block:: python
+
+        class CleanProcessor(PostProcessor):
+            filters = [CoerceTextFilter(), SizeLimitFilter(4096),
+                       StripFilter(), NormalizeFilter()]
+
+        class MyForm(yota.Form):
+            _processor = CleanProcessor
+    """
+    filters = ()
+    """ The filters run over each submitted value, in order """
+    passthrough = ('_visited_names', 'submit_action')
+    """ Keys used internally by Yota that are never filtered """
+
+    def __init__(self):
+        self._cheap = tuple(f for f in self.filters if not f.expensive)
+        self._all = tuple(self.filters)
+        self.expensive = len(self._cheap) != len(self._all)
+
+    @classmethod
+    def shared(cls):
+        """ Returns the single compiled instance of this processor class.
+        Processors are stateless, so one instance serves every Form. """
+        try:
+            return cls.__dict__['_shared_instance']
+        except KeyError:
+            cls._shared_instance = cls()
+            return cls._shared_instance
+
+    def filter_value(self, value, chain):
+        """ Runs a single submitted value through a filter chain """
+        if isinstance(value, string_types):
+            for step in chain:
+                value = step(value)
+            return value
+        if isinstance(value, list):
+            return [self.filter_value(v, chain) for v in value]
+        return value
+
+    def process(self, key, value, names=None):
+        """ Runs the value submitted under key through the appropriate filter
+        chain. See :meth:`PostProcessor.filter_post` for names. """
+        if key in self.passthrough:
+            return value
+        if names is None or key in names:
+            return self.filter_value(value, self._all)
+        return self.filter_value(value, self._cheap)
+
+    def filter_post(self, postdict, names=None):
+        """ Returns the submitted data with the filter chain applied. The
+        data is copied with its own ``copy`` method, so multi-valued
+        dictionaries such as Werkzeug's MultiDict keep their type and every
+        value of a repeated key is filtered.
+
+        :param names: The set of Node names that have validators attached.
+            Expensive filters are only run for these names. If None they are
+            run on everything.
+        """
+        if not self._all:
+            return postdict
+
+        try:
+            ret = postdict.copy()
+        except AttributeError:
+            ret = dict(postdict)
+        if hasattr(ret, 'setlist'):
+            for key in postdict:
+                ret.setlist(key, self.process(key, postdict.getlist(key),
+                                              names))
+        else:
+            for key, value in postdict.items():
+                ret[key] = self.process(key, value, names)
+        return ret
+
+
+class NameSet(set):
+    """ The set of names passed to :meth:`PostProcessor.filter_post` when
+    some Nodes name their elements after the submitted data, such as the
+    rows of a :class:`yota.nodes.RepeatNode`. Along with the names in the
+    set it contains every name that starts with one of its prefixes. """
+
+    def __init__(self, names=(), prefixes=()):
+        set.__init__(self, names)
+        self.prefixes = tuple(prefixes)
+
+    def __contains__(self, name):
+        return set.__contains__(self, name) or name.startswith(self.prefixes)
+
+
+class FlaskPostProcessor(PostProcessor):
+    """ Flask's request.form can be passed in directly, so no translation is
+    performed and the data is returned as is. """
     pass
 
 
-class FlaskPostProcessor(object):
-    def filter_post(self, postdict):
-        return postdict
+class LazyData(Mapping):
+    """ A read only view of submitted data that decodes and filters a value
+    only when it is looked up, which Nodes do from :meth:`Node.resolve_data`.
+    Fields that are never asked for are never touched, and every value is
+    processed at most once. Subclasses supply the raw lookups, along with
+    the ``__iter__`` and ``__len__`` of a Mapping, and can't be instantiated
+    without them.
+    """
+
+    def __init__(self, processor, names=None):
+        self._processor = processor
+        self._names = names
+        self._cache = {}
+
+    @abc.abstractmethod
+    def raw(self, key):
+        """ Returns the raw value submitted under key, raising KeyError """
+
+    @abc.abstractmethod
+    def raw_list(self, key):
+        """ Returns a list of all raw values submitted under key """
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        value = self._processor.process(key, self.raw(key), self._names)
+        self._cache[key] = value
+        return value
+
+    def getlist(self, key):
+        """ Returns every value submitted under key, processed """
+        return self._processor.process(key, self.raw_list(key), self._names)
+
+
+class MultiDictData(LazyData):
+    """ Wraps a multi-valued dictionary from a web framework without
+    copying it. """
+
+    def __init__(self, source, processor, names=None):
+        super(MultiDictData, self).__init__(processor, names)
+        self._source = source
+
+    def raw(self, key):
+        return self._source[key]
+
+    def raw_list(self, key):
+        return self._source.getlist(key)
+
+    def __contains__(self, key):
+        return key in self._source
+
+    def __iter__(self):
+        return iter(self._source)
+
+    def __len__(self):
+        return len(self._source)
+
+
+class UrlencodedData(LazyData):
+    """ Reads fields straight out of an application/x-www-form-urlencoded
+    request body. The body is only scanned as far as needed to find a
+    requested key, and values are percent-decoded on demand. """
+
+    def __init__(self, body, processor, names=None, encoding='utf-8'):
+        try:
+            from urllib.parse import unquote_to_bytes
+        except ImportError:
+            from urllib import unquote as unquote_to_bytes
+        super(UrlencodedData, self).__init__(processor, names)
+        self._unquote = unquote_to_bytes
+        if isinstance(body, text_type):
+            body = body.encode(encoding)
+        self._body = body
+        self._encoding = encoding
+        # key -> list of (start, end) offsets of raw values in the body
+        self._offsets = {}
+        self._pos = 0
+
+    def _decode(self, raw):
+        return self._unquote(raw.replace(b'+', b' ')).decode(
+            self._encoding, 'replace')
+
+    def _scan(self, until=None):
+        """ Indexes pairs from where the last scan stopped, returning early
+        once the key until has been found """
+        body = self._body
+        end = len(body)
+        while self._pos < end:
+            start = self._pos
+            stop = body.find(b'&', start)
+            if stop == -1:
+                stop = end
+            self._pos = stop + 1
+            split = body.find(b'=', start, stop)
+            if split == -1:
+                split = stop
+            if split == start:
+                continue
+            key = self._decode(body[start:split])
+            self._offsets.setdefault(key, []).append((split + 1, stop))
+            if key == until:
+                return
+
+    def _raw_values(self, key, first):
+        if key not in self._offsets or not first:
+            self._scan(until=key if first else None)
+        try:
+            offsets = self._offsets[key]
+        except KeyError:
+            raise KeyError(key)
+        return [self._decode(self._body[start:stop])
+                for start, stop in offsets[:1 if first else None]]
+
+    def raw(self, key):
+        return self._raw_values(key, True)[0]
+
+    def raw_list(self, key):
+        return self._raw_values(key, False)
+
+    def __contains__(self, key):
+        if key not in self._offsets:
+            self._scan(until=key)
+        return key in self._offsets
+
+    def __iter__(self):
+        self._scan()
+        return iter(list(self._offsets))
+
+    def __len__(self):
+        self._scan()
+        return len(self._offsets)
+
+
+class MultiDictProcessor(PostProcessor):
+    """ Accepts the multi-valued dictionaries web frameworks use for form
+    data directly, such as Werkzeug's MultiDict and ImmutableMultiDict (Flask's
+    request.form) or Django's QueryDict (request.POST). No intermediate dict
+    is built; values are read and filtered lazily as Nodes ask for them, and
+    multiple values remain available through getlist. """
+
+    def filter_post(self, postdict, names=None):
+        return MultiDictData(postdict, self, names)
+
+
+class UrlencodedProcessor(PostProcessor):
+    """ Accepts a raw application/x-www-form-urlencoded request body, as
+    bytes or text, and parses fields out of it only when they are needed.
+
+    :attr encoding: The character encoding of the request body.
+    """
+    encoding = 'utf-8'
+
+    def filter_post(self, postdict, names=None):
+        return UrlencodedData(postdict, self, names, self.encoding)
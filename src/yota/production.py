@@ -0,0 +1,144 @@
+import gc
+import importlib
+import types
+
+
+def _all_forms():
+    """ Every Form subclass defined so far """
+    from yota import Form
+    found = []
+    pending = [Form]
+    while pending:
+        for sub in pending.pop().__subclasses__():
+            if sub not in found:
+                found.append(sub)
+                pending.append(sub)
+    return found
+
+
+def _resolve_forms(forms):
+    """ Expands the forms argument of :func:`warmup` into Form classes """
+    from yota import Form
+    if forms is None:
+        return _all_forms()
+
+    ret = []
+    for entry in forms:
+        if isinstance(entry, str):
+            module_name, _, attr = entry.partition(':')
+            entry = importlib.import_module(module_name)
+            if attr:
+                entry = getattr(entry, attr)
+        if isinstance(entry, types.ModuleType):
+            ret.extend(value for value in vars(entry).values()
+                       if isinstance(value, type) and
+                       issubclass(value, Form) and value is not Form)
+        else:
+            ret.append(entry)
+    return ret
+
+
+def load_templates(env, names):
+    """ Loads and compiles templates through a Jinja environment, following
+    the templates they include, extend or import. Returns the names of every
+    template loaded. """
+    from jinja2 import meta
+
+    seen = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        env.get_template(name)
+        source = env.loader.get_source(env, name)[0]
+        for ref in meta.find_referenced_templates(env.parse(source)):
+            # dynamic references are reported as None
+            if ref is not None:
+                pending.append(ref)
+    return seen
+
+
+def set_production(enabled=True):
+    """ Switches between production and development mode for every Form.
+
+    Development mode, the default, checks the invariants of a Form on every
+    use: each construction checks the attribute names of its Nodes, each
+    render checks every Node has the context values it requires, and each
+    call of a :class:`Check` or :class:`Listener` guards against the callable
+    not being callable. Jinja also checks each template's file for changes
+    every time it's used.
+
+    Production mode checks all of that once per Form class instead, when it's
+    compiled by :func:`warmup` or its first construction, and skips the
+    checks afterwards. Template files are loaded once and never checked for
+    changes. Since required context values are checked at that point, they
+    must be given where the Nodes are declared rather than set on a Form
+    after it's built.
+
+    Call it once at startup, before any Forms are built or rendered.
+
+    :param enabled: True for production mode, False to return to
+        development mode.
+    """
+    from yota import Form
+    from yota.nodes import Node
+    from yota.validators import ActionWrapper
+    from yota.renderers import JinjaRenderer
+
+    Form._strict = Node._strict = ActionWrapper._strict = not enabled
+    JinjaRenderer.auto_reload = not enabled
+
+
+def warmup(forms=None, themes=None, freeze=True):
+    """ Does all the work that every worker process would otherwise repeat on
+    its first requests: imports the Forms, builds their compiled state with
+    :meth:`Form.compile` and loads and compiles every template they render
+    with into the shared Jinja environments. Finally everything that is left
+    is moved into the permanent generation with ``gc.freeze()``.
+
+    Run it in the master process of a pre-forking server before workers are
+    forked, and the compiled objects will be shared between workers
+    copy-on-write, and won't be dirtied by the cycle collector. For gunicorn
+    that's done with preload_app, or from the ``when_ready`` hook:
+
+    .. code-block:: python
+
+        def when_ready(server):
+            yota.warmup(forms=['myapp.forms'], themes=['bs3'])
+
+    :param forms: An iterable of Form classes, modules, or import strings
+        naming a module (``'myapp.forms'``) or a Form in one
+        (``'myapp.forms:SignupForm'``). Modules contribute every Form defined
+        in them. Defaults to every Form subclass defined so far.
+    :param themes: The :attr:`renderers.JinjaRenderer.templ_type` values to
+        load templates for. Defaults to the theme of each Form's renderer.
+    :param freeze: Whether to call ``gc.freeze()``, where the interpreter
+        supports it.
+
+    :return: A dictionary mapping each theme to the set of template names
+        loaded for it.
+    """
+    loaded = {}
+    for form in _resolve_forms(forms):
+        names = form.compile()
+        if form._renderer is None:
+            # headless, nothing to render with
+            continue
+        renderer = form._renderer()
+        if not hasattr(renderer, 'env'):
+            # not a Jinja renderer, nothing more to prepare
+            continue
+        suffix = getattr(renderer, 'suffix', '')
+        for theme in themes or (renderer.templ_type, ):
+            renderer = form._renderer()
+            renderer.templ_type = theme
+            found = load_templates(renderer.env,
+                                   [name + suffix for name in names])
+            loaded.setdefault(theme, set()).update(found)
+
+    gc.collect()
+    if freeze and hasattr(gc, 'freeze'):
+        gc.freeze()
+    return loaded
@@ -0,0 +1,183 @@
+import functools
+import os
+import sys
+import threading
+import time
+
+from yota.instrumentation import clock
+
+
+def profiled(method):
+    """ Decorates a public :class:`Form` method so that the Form's
+    :attr:`Form._profiler` gets a chance to profile the call. With no
+    profiler set this costs a single attribute check. """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self._profiler
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        return profiler.call(self, method, args, kwargs)
+    return wrapper
+
+
+class SamplingProfiler(object):
+    """ Profiles one call in every `every` calls of :meth:`Form.validate`,
+    :meth:`Form.json_validate`, :meth:`Form.validate_render` and
+    :meth:`Form.render`, counted separately per form class. Each sampled call
+    is written to its own file under `directory`/`FormName`/.
+
+    The limits are designed to make it safe to leave switched on in
+    production: once max_files files or max_bytes bytes have been written
+    nothing more is recorded, and no two samples are taken less than
+    min_interval seconds apart in a process. Profiling failures never affect
+    the call being profiled.
+
+    .. code-block:: python
+
+        yota.Form._profiler = SamplingProfiler('/var/tmp/yota-profiles',
+                                               every=5000)
+
+    :param directory: Where profiles are written.
+    :param every: Sample one call in this many per form class.
+    :param format: 'pstats' writes cProfile output readable by the pstats
+        module and tools like snakeviz. 'collapsed' traces the call and
+        writes collapsed stacks weighted in microseconds, the input format
+        of flamegraph.pl and speedscope.
+    :param max_files: The most profiles that will be written.
+    :param max_bytes: The most bytes of profiles that will be written.
+    :param min_interval: The minimum number of seconds between samples.
+    """
+
+    def __init__(self, directory, every=1000, format='pstats',
+                 max_files=100, max_bytes=50 * 1024 * 1024,
+                 min_interval=1.0):
+        if format not in ('pstats', 'collapsed'):
+            raise ValueError("Unknown profile format {0}".format(format))
+        self.directory = directory
+        self.every = every
+        self.format = format
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.min_interval = min_interval
+
+        self.files_written = 0
+        self.bytes_written = 0
+        self._counts = {}
+        self._last_sample = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def should_sample(self, form_name):
+        """ Counts a call and decides whether it will be profiled """
+        with self._lock:
+            count = self._counts.get(form_name, 0) + 1
+            self._counts[form_name] = count
+            if count % self.every:
+                return False
+            if self.files_written >= self.max_files or \
+                    self.bytes_written >= self.max_bytes:
+                return False
+            now = time.time()
+            if self._last_sample is not None and \
+                    now - self._last_sample < self.min_interval:
+                return False
+            self._last_sample = now
+            return True
+
+    def call(self, form, method, args, kwargs):
+        """ Runs method, profiling it if this call is sampled. Calls made
+        from within another profiled method in this thread, such as the render
+        inside validate_render, are neither counted nor sampled separately. """
+        if getattr(self._local, 'active', False):
+            return method(form, *args, **kwargs)
+
+        self._local.active = True
+        try:
+            if not self.should_sample(form.__class__.__name__):
+                return method(form, *args, **kwargs)
+            if self.format == 'pstats':
+                return self._run_pstats(form, method, args, kwargs)
+            return self._run_collapsed(form, method, args, kwargs)
+        finally:
+            self._local.active = False
+
+    def _path(self, form, method, suffix):
+        folder = os.path.join(self.directory, form.__class__.__name__)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        name = "{0}-{1}-{2}-{3}.{4}".format(
+            method.__name__, int(time.time() * 1000), os.getpid(),
+            self.files_written, suffix)
+        return os.path.join(folder, name)
+
+    def _written(self, path):
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += os.path.getsize(path)
+
+    def _run_pstats(self, form, method, args, kwargs):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is already active in this interpreter
+            return method(form, *args, **kwargs)
+        try:
+            return method(form, *args, **kwargs)
+        finally:
+            profile.disable()
+            try:
+                path = self._path(form, method, 'pstats')
+                profile.dump_stats(path)
+                self._written(path)
+            except (IOError, OSError):
+                pass
+
+    def _run_collapsed(self, form, method, args, kwargs):
+        collector = _StackCollector()
+        previous = sys.getprofile()
+        sys.setprofile(collector)
+        try:
+            return method(form, *args, **kwargs)
+        finally:
+            sys.setprofile(previous)
+            try:
+                path = self._path(form, method, 'collapsed')
+                with open(path, 'w') as f:
+                    collector.write(f)
+                self._written(path)
+            except (IOError, OSError):
+                pass
+
+
+class _StackCollector(object):
+    """ A sys.setprofile hook that attributes the time spent in each unique
+    call stack to that stack. """
+
+    def __init__(self):
+        self.stack = []
+        self.weights = {}
+        self.last = clock()
+
+    def __call__(self, frame, event, arg):
+        now = clock()
+        if self.stack:
+            key = ';'.join(self.stack)
+            self.weights[key] = self.weights.get(key, 0.0) + now - self.last
+        if event == 'call':
+            code = frame.f_code
+            self.stack.append("{0}:{1}".format(
+                os.path.basename(code.co_filename), code.co_name))
+        elif event == 'c_call':
+            self.stack.append(getattr(arg, '__name__', 'builtin'))
+        elif self.stack:
+            # return, c_return and c_exception
+            self.stack.pop()
+        self.last = clock()
+
+    def write(self, f):
+        for stack, weight in sorted(self.weights.items()):
+            micros = int(weight * 1000000)
+            if micros:
+                f.write("{0} {1}\n".format(stack, micros))
@@ -1,5 +1,31 @@
-from jinja2 import Environment, FileSystemLoader
+from yota.instrumentation import NULL_INSTRUMENT, clock
 import os
+import threading
+
+
+# Jinja environments keyed by their search path and auto_reload. Environments and the
+# templates they compile reference each other, so building one per render
+# leaves a cyclic island behind for the garbage collector every time.
+_environments = {}
+_environments_lock = threading.Lock()
+
+
+def _render_node(context, template, node_context):
+    """ Renders a template with the context of a Node from within another
+    template, where RepeatNode renders the Nodes of each of its rows """
+    return context.environment.get_template(template).render(node_context)
+
+
+def _render_options(context, choices, selected):
+    """ Renders the options of a :class:`yota.choices.ChoiceSet` through the
+    option template, reusing the options it has already rendered """
+    template = context.environment.get_template('option.html')
+    return choices.render(template, selected)
+
+
+def _is_choice_set(value):
+    from yota.choices import ChoiceSet
+    return isinstance(value, ChoiceSet)
 
 
 class JinjaRenderer(object):
@@ -29,34 +55,87 @@ class JinjaRenderer(object):
     The list of paths that Jinja will look for templates in. It scans
     sequentially, so inserting custom template paths at the beginning is an
     easy way to override default templates without touching Yota. The default
-    path is appended to the end of this list the first time render is called.
+    path for :attr:`templ_type` is searched after every path in this list. The
+    list itself is never modified by Yota.
     """
     _env = None
     """
-    The Jinja rendering enviroment. This is lazily loaded.
+    The Jinja rendering enviroment. This is lazily loaded, and shared by all
+    renderers with the same search path and :attr:`templ_type`.
+    """
+
+    auto_reload = True
+    """
+    Whether Jinja checks the modification time of a template's file each time
+    it's used, to pick up changes without a restart. Production mode, see
+    :func:`yota.production.set_production`, turns it off.
     """
 
     suffix = ".html"
     """ The default template suffix """
 
+    instrument = NULL_INSTRUMENT
+    """ An :class:`yota.instrumentation.Instrument` that receives template
+    lookup and per Node render timings. :meth:`Form.render` passes along the
+    Form's instrument when one is enabled. """
+    form_name = None
+    """ The name timings are reported under """
+
     @property
     def env(self):
-        """ Simple lazy loader for the Jinja2 enviroment """
+        """ Simple lazy loader for the Jinja2 enviroment. Jinja itself is
+        only imported here, so Forms that never render never load it. """
         if not self._env:
+            from jinja2 import Environment, FileSystemLoader
+            try:
+                from jinja2 import pass_context
+            except ImportError:
+                # Jinja 2
+                from jinja2 import contextfunction as pass_context
+
             path = os.path.dirname(os.path.realpath(__file__)) \
                                + "/templates/" + self.templ_type + "/jinja/"
-            if path not in self.search_path:
-                self.search_path.append(path)
-            loader = FileSystemLoader(JinjaRenderer.search_path)
-            self._env = Environment(loader=loader)
+            # the class level list is shared by every renderer and theme, so
+            # build a new one rather than appending to it
+            paths = tuple(self.search_path) + (path, )
+            key = (paths, self.auto_reload)
+            with _environments_lock:
+                env = _environments.get(key)
+                if env is None:
+                    env = Environment(loader=FileSystemLoader(list(paths)),
+                                      auto_reload=self.auto_reload)
+                    env.globals['render_node'] = pass_context(_render_node)
+                    env.globals['render_options'] = \
+                        pass_context(_render_options)
+                    env.tests['choice_set'] = _is_choice_set
+                    _environments[key] = env
+            self._env = env
         return self._env
 
     def render(self, nodes, g_context):
         """ Loop over each Node passed in by nodes and render it into a big
         blob of a string. Passes g_context to each nodes
         :meth:`Node.get_context`. """
+        inst = self.instrument
+        if inst.enabled:
+            return self._timed_render(nodes, g_context, inst)
+
+        buildup = ""
+        for node in nodes:
+            template = self.env.get_template(node.template + self.suffix)
+            buildup += template.render(node.get_context(g_context))
+        return buildup
+
+    def _timed_render(self, nodes, g_context, inst):
+        """ The same as render, reporting timings to an instrument """
         buildup = ""
         for node in nodes:
+            start = clock()
             template = self.env.get_template(node.template + self.suffix)
+            looked_up = clock()
             buildup += template.render(node.get_context(g_context))
+            inst.record(self.form_name, 'template_lookup', node.template,
+                        looked_up - start)
+            inst.record(self.form_name, 'render_node', node.template,
+                        clock() - looked_up)
         return buildup
@@ -0,0 +1,146 @@
+import unittest
+import asyncio
+import yota
+from yota.asgi import ValidationChannel, LocalWebSocket
+from yota.validators import *
+from yota.nodes import *
+
+
+class TForm(yota.Form):
+    first = EntryNode(validators=MinLengthValidator(5, message="Darn"))
+    last = EntryNode(validators=RequiredValidator())
+
+
+class TestValidationChannel(unittest.TestCase):
+    """ Exercises the WebSocket validation channel with the in-process server """
+
+    def run_session(self, app, messages):
+        async def session():
+            replies = []
+            async with LocalWebSocket(app) as ws:
+                for message in messages:
+                    replies.append(await ws.send_json(message))
+            return replies
+        return asyncio.run(session())
+
+    def test_streamed_updates(self):
+        """ only visited fields are validated and updates accumulate """
+        replies = self.run_session(ValidationChannel(TForm), [
+            {'id': 1, 'update': {'first': 'abc'}},
+            {'id': 2, 'update': {'first': 'abcdef'}},
+            {'id': 3, 'update': {'last': ''}},
+        ])
+        assert(replies[0]['id'] == 1)
+        assert('first' in replies[0]['result']['errors'])
+        assert('last' not in replies[0]['result']['errors'])
+        assert(replies[1]['result']['errors'] == {})
+        assert('last' in replies[2]['result']['errors'])
+        # piecewise validation never reports a valid submission
+        assert(replies[2]['valid'] is False)
+
+    def test_single_form_instance(self):
+        """ the factory is called once per connection """
+        built = []
+
+        def factory(scope):
+            built.append(scope['path'])
+            return TForm()
+
+        self.run_session(ValidationChannel(factory), [
+            {'update': {'first': 'a'}},
+            {'update': {'last': 'b'}},
+        ])
+        assert(built == ['/'])
+
+    def test_malformed_messages(self):
+        """ bad frames get an error reply instead of dropping the socket """
+        app = ValidationChannel(TForm)
+
+        async def session():
+            async with LocalWebSocket(app) as ws:
+                await ws._inbound.put({'type': 'websocket.receive',
+                                       'text': 'not json'})
+                first = await ws._outbound.get()
+                second = await ws.send_json({'update': ['nope']})
+                return first, second
+        first, second = asyncio.run(session())
+        assert('error' in first['text'])
+        assert('error' in second)
+
+    def test_malformed_not_kept(self):
+        """ a message with bad visited names doesn't update the session """
+        replies = self.run_session(ValidationChannel(TForm), [
+            {'id': 1, 'update': {'first': 'abc'}, 'visited': [None]},
+            {'id': 2, 'update': {'last': ''}},
+        ])
+        assert(replies[0] == {'id': 1,
+                              'error': 'Malformed validation message'})
+        assert('first' not in replies[1]['result']['errors'])
+        assert('last' in replies[1]['result']['errors'])
+
+    def test_unchecked_box(self):
+        """ unchecking a box removes its value, sent as null or listed as
+        removed, and later messages still validate """
+        def checked(node):
+            if not node.data:
+                node.add_error({'message': 'Please agree'})
+
+        class BoxForm(yota.Form):
+            group = CheckGroupNode(boxes=[('one', 'One'), ('two', 'Two')])
+            agree = CheckNode(validators=checked)
+
+        replies = self.run_session(ValidationChannel(BoxForm), [
+            {'id': 1, 'update': {'one': 'on', 'agree': 'on'}},
+            {'id': 2, 'update': {'one': None}},
+            {'id': 3, 'removed': ['agree']},
+            {'id': 4, 'update': {'two': 'on'}},
+        ])
+        assert(all('error' not in reply for reply in replies))
+        assert(replies[0]['result']['errors'] == {})
+        assert('agree' in replies[2]['result']['errors'])
+        assert('agree' in replies[3]['result']['errors'])
+
+    def test_invalid_utf8(self):
+        """ undecodable binary frames get an error reply """
+        app = ValidationChannel(TForm)
+
+        async def session():
+            async with LocalWebSocket(app) as ws:
+                await ws._inbound.put({'type': 'websocket.receive',
+                                       'bytes': b'\xff\xfe'})
+                # a closed connection would never reply
+                first = await asyncio.wait_for(ws._outbound.get(), 5)
+                second = await ws.send_json({'update': {'first': 'abcdef'}})
+                return first, second
+        first, second = asyncio.run(session())
+        assert('error' in first['text'])
+        assert(second['result']['errors'] == {})
+
+    def test_validation_error(self):
+        """ validators that raise get an error reply and the socket stays
+        open """
+        def broken(node):
+            if node.data == 'boom':
+                raise ValueError(node.data)
+
+        class BrokenForm(yota.Form):
+            first = EntryNode(validators=broken)
+
+        replies = self.run_session(ValidationChannel(BrokenForm), [
+            {'id': 1, 'update': {'first': 'boom'}},
+            {'id': 2, 'update': {'first': 'fine'}},
+        ])
+        assert(replies[0] == {'id': 1, 'error': 'Validation failed'})
+        assert(replies[1]['result']['errors'] == {})
+
+    def test_http_rejected(self):
+        """ plain HTTP requests are told to upgrade """
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(event):
+            sent.append(event)
+        asyncio.run(ValidationChannel(TForm)({'type': 'http'}, receive, send))
+        assert(sent[0]['status'] == 426)
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import threading
+import yota
+from yota.validators import *
+from yota.nodes import *
+
+
+class TForm(yota.Form):
+    first = EntryNode(validators=MinLengthValidator(5))
+    last = EntryNode(validators=RequiredValidator())
+    email = EntryNode(validators=EmailValidator())
+    color = ListNode(items=[('r', 'Red'), ('g', 'Green')])
+    boxes = CheckGroupNode(boxes=[('one', 'One'), ('two', 'Two')])
+    match = Check(MatchingValidator(), 'first', 'last')
+
+
+class TestConcurrency(unittest.TestCase):
+    """ Hammers construction, validation and rendering from many threads at
+    once and checks every thread sees exactly what a single thread does """
+
+    threads = 16
+    rounds = 25
+
+    def setUp(self):
+        self.interval = sys.getswitchinterval()
+        # switch threads as often as possible to shake out races
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def hammer(self, func):
+        """ Runs func(thread_index) rounds times on every thread, starting
+        them all together, and returns the outputs grouped by thread """
+        barrier = threading.Barrier(self.threads)
+        results = [[] for _ in range(self.threads)]
+        errors = []
+
+        def worker(i):
+            try:
+                barrier.wait()
+                for _ in range(self.rounds):
+                    results[i].append(func(i))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i, ))
+                   for i in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert(errors == [])
+        return results
+
+    def data(self, i):
+        return {'first': 'name{0}'.format(i), 'last': 'x' * (i % 3),
+                'email': 'user{0}@example.com'.format(i) if i % 2 else 'bad',
+                'color': 'g', 'one': 'true'}
+
+    def run_form(self, i):
+        form = TForm(title='Form {0}'.format(i))
+        valid, json = form.json_validate(self.data(i))
+        success, html = form.validate_render(self.data(i))
+        return valid, json, success, html, form.data_by_attr()
+
+    def test_outputs_deterministic(self):
+        """ every thread produces the same output as a lone thread would """
+        expected = [self.run_form(i) for i in range(self.threads)]
+        results = self.hammer(self.run_form)
+        for i, outputs in enumerate(results):
+            for output in outputs:
+                assert(output == expected[i])
+
+    def test_node_counter(self):
+        """ concurrently built Nodes never share an ordering counter """
+        results = self.hammer(lambda i: EntryNode()._create_counter)
+        counters = [c for outputs in results for c in outputs]
+        assert(len(set(counters)) == len(counters))
+
+    def test_shared_state_untouched(self):
+        """ class level state is unchanged after concurrent use """
+        context = dict(yota.Form.context)
+        self.hammer(self.run_form)
+        assert(yota.Form.context == context)
+        assert(TForm._node_list[0].errors == [])
+        assert(TForm._validation_list[0].resolved is False)
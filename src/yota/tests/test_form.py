@@ -1,4 +1,5 @@
 import unittest
+import sys
 import yota
 from yota.validators import *
 from yota.nodes import *
@@ -98,6 +99,50 @@ class TestForms(unittest.TestCase):
         assert(test.other._attr_name == two._attr_name)
         assert(test.thing._attr_name == three._attr_name)
 
+    def test_node_order_declared(self):
+        """ order follows the class body, not when shared Nodes were made """
+        later = EntryNode()
+        earlier = EntryNode()
+        earlier._create_counter, later._create_counter = 1, 0
+
+        class TForm(yota.Form):
+            first = earlier
+            second = later
+            third = EntryNode()
+
+        assert([n._attr_name for n in TForm._node_list] ==
+               ['first', 'second', 'third'])
+
+    def test_render_deterministic(self):
+        """ a form renders byte for byte the same in processes with different
+        hash seeds and different numbers of Nodes created before it """
+        import os
+        import subprocess
+        script = (
+            "import yota\n"
+            "from yota.nodes import EntryNode, ListNode, Blueprint\n"
+            "junk = [EntryNode() for i in range({0})]\n"
+            "class Part(yota.Form):\n"
+            "    a = EntryNode()\n"
+            "    b = EntryNode()\n"
+            "class TForm(yota.Form):\n"
+            "    first = EntryNode()\n"
+            "    part = Blueprint(Part)\n"
+            "    last = ListNode(items=[('1', 'One')])\n"
+            "hidden = dict(('k{{0}}'.format(i), i) for i in range(20))\n"
+            "import sys\n"
+            "sys.stdout.write(TForm(hidden=hidden).render())\n")
+        outputs = []
+        for seed, junk in (('1', 0), ('2', 50)):
+            env = dict(os.environ, PYTHONHASHSEED=seed,
+                       PYTHONPATH=os.pathsep.join(
+                           [os.path.dirname(os.path.dirname(yota.__file__))] +
+                           [os.environ.get('PYTHONPATH', '')]))
+            outputs.append(subprocess.check_output(
+                [sys.executable, '-c', script.format(junk)], env=env))
+        assert(outputs[0] == outputs[1])
+        assert(b'_arg_k19' in outputs[0])
+
     def test_blueprint_nodes(self):
         """ make sure forms can be used inside of forms """
         class TForm(yota.Form):
@@ -304,6 +349,87 @@ class TestForms(unittest.TestCase):
         test.insert_after('t4', EntryNode(_attr_name='t3'))
         assert(test._node_list[4]._attr_name == 't3')
 
+    def test_insert_bulk(self):
+        """ lists of nodes go in together, in order, and are indexed """
+        test = yota.Form()
+        nodes = [EntryNode(_attr_name='n{0}'.format(i)) for i in range(5)]
+        test.insert(1, (node for node in nodes))
+        assert(test._node_list[1:6] == nodes)
+        assert(test._node_list[-1]._attr_name == 'close')
+        test.insert_after('n2', [EntryNode(_attr_name='a'),
+                                 EntryNode(_attr_name='b')])
+        assert([n._attr_name for n in test._node_list[3:7]] ==
+               ['n2', 'a', 'b', 'n3'])
+        assert(test.get_by_attr('b') is test._node_list[5])
+        assert(test.get_by_attr('b') is test.b)
+
+    def test_node_index(self):
+        """ lookups by attribute and name follow changes to the form """
+        class TForm(yota.Form):
+            t = EntryNode()
+
+        test = TForm()
+        other = TForm()
+        assert(test.get_by_attr('t') is test.t)
+        assert(test.get_by_attr('t') is not other.t)
+        assert(test.get_by_name('t') is test.t)
+        test.t.name = 'renamed'
+        assert(test.get_by_name('renamed') is test.t)
+        self.assertRaises(AttributeError, test.get_by_name, 't')
+
+        del test._node_list[1]
+        self.assertRaises(AttributeError, test.get_by_name, 'renamed')
+        # Nodes set as plain attributes are still found
+        assert(test.get_by_attr('t') is test.t)
+        self.assertRaises(AttributeError, test.get_by_attr, 'title')
+
+    def test_node_index_updates(self):
+        """ positions follow insertions, and misses rebuild the name index
+        at most once per change to the list """
+        test = yota.Form()
+        nodes = test._node_list
+        test.insert(1, [EntryNode(_attr_name='a'), EntryNode(_attr_name='b')])
+        assert(nodes.position('b') == 2)
+        test.insert(1, EntryNode(_attr_name='c'))
+        assert(nodes.position('b') == 3)
+        assert(nodes.position('close') == len(nodes) - 1)
+        test.insert(-1, EntryNode(_attr_name='d'))
+        assert(nodes.position('d') == len(nodes) - 1)
+        assert(nodes.position('missing') is None)
+
+        built = []
+        index_names = nodes._index_names
+        nodes._index_names = lambda fresh: built.append(fresh) or \
+            index_names(fresh)
+        for i in range(3):
+            assert(nodes.get_name('missing') is None)
+        assert(len(built) <= 2)
+        del built[:]
+        test.insert(-1, EntryNode(_attr_name='e'))
+        for i in range(3):
+            assert(nodes.get_name('missing') is None)
+        assert(built == [True])
+
+    def test_insert_after_scaling(self):
+        """ building a form with insert_after takes linear time """
+        import time
+
+        def build(size):
+            test = yota.Form()
+            start = time.time()
+            prev = 'start'
+            for i in range(size):
+                name = 'q{0}'.format(i)
+                test.insert_after(prev, EntryNode(_attr_name=name))
+                prev = name
+            return time.time() - start
+
+        small = min(build(500) for i in range(3))
+        large = min(build(4000) for i in range(3))
+        # eight times the Nodes, where quadratic growth would take 64 times
+        # as long
+        assert(large < small * 24)
+
     def test_insert_validator(self):
         """ insert functions test plus special cases """
         test = yota.Form()
@@ -338,6 +464,65 @@ class TestForms(unittest.TestCase):
         assert(hasattr(test, 'test3'))
         assert(test._node_list[2]._attr_name == 'test3')
 
+    def test_shared_state_untouched(self):
+        """ building and rendering forms must not write to class level state
+        shared between all forms, which grows in long running processes """
+        from yota.renderers import JinjaRenderer
+
+        class TForm(yota.Form):
+            custom_attr = 'something'
+            t = EntryNode()
+
+        context = dict(yota.Form.context)
+        search_path = list(JinjaRenderer.search_path)
+        for i in range(3):
+            test = TForm(title='Title {0}'.format(i))
+            test.render()
+        assert(yota.Form.context == context)
+        assert(TForm.context == context)
+        assert(JinjaRenderer.search_path == search_path)
+        assert(test.context['custom_attr'] == 'something')
+        assert('context' not in test.context)
+
+    def test_no_cyclic_garbage(self):
+        """ a discarded form must be freed by reference counting alone, even
+        with checks and listeners that are methods of the form itself """
+        import gc
+        import weakref
+
+        class TForm(yota.Form):
+            t = EntryNode(validators=MinLengthValidator(5))
+            t2 = EntryNode()
+            match = Check(MatchingValidator(), 't', 't2')
+
+            def seen(self):
+                self.was_seen = True
+
+            def check_t2(self, t2):
+                t2.add_error({'message': 'nope'})
+
+        # compile templates and warm caches first
+        TForm().validate_render({'t': 'a', 't2': 'b'})
+
+        gc.collect()
+        gc.disable()
+        try:
+            test = TForm()
+            test.add_listener(Listener('validate_failure', test.seen),
+                              'validate_failure')
+            test.insert_validator([Check(test.check_t2, 't2')])
+            test.json_validate({'t': 'a', 't2': 'b', '_visited_names': '{}'},
+                               piecewise=True)
+            test.validate_render({'t': 'a', 't2': 'b'})
+            assert(test.was_seen)
+            assert(test.t2.errors)
+            ref = weakref.ref(test)
+            del test
+            assert(ref() is None)
+            assert(gc.collect() == 0)
+        finally:
+            gc.enable()
+
 
 class TestFormValidation(unittest.TestCase):
     """ Coverage for the 4 main validation functions in Form """
@@ -485,3 +670,212 @@ class TestFormValidation(unittest.TestCase):
         self.assertRaises(IndexError, test.update_success, {'those': 'are'})
         delattr(test, 'start')
         self.assertRaises(AttributeError, test.update_success, {'those': 'are'})
+
+
+class TestHeadless(unittest.TestCase):
+    """ Forms that validate without any rendering machinery """
+
+    def run_python(self, script):
+        import os
+        import subprocess
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [os.path.dirname(os.path.dirname(yota.__file__)),
+             os.environ.get('PYTHONPATH', '')]))
+        return subprocess.check_output([sys.executable, '-c', script],
+                                       env=env)
+
+    def test_import_lazy(self):
+        """ importing yota doesn't import jinja2, or the modules only some
+        features need """
+        out = self.run_python("import sys, yota\n"
+                              "sys.stdout.write(str('jinja2' in sys.modules))")
+        assert(out == b'False')
+        deferred = ['yota.choices', 'cProfile', 'queue']
+        out = self.run_python(
+            "import sys, yota\n"
+            "sys.stdout.write(' '.join(name for name in {0!r}\n"
+            "                          if name in sys.modules))"
+            .format(deferred))
+        assert(out == b'')
+
+    def test_headless_validation(self):
+        """ a headless form validates without jinja2 installed at all """
+        out = self.run_python(
+            "import sys\n"
+            "sys.modules['jinja2'] = None\n"
+            "import yota\n"
+            "from yota.nodes import EntryNode\n"
+            "from yota.validators import MinLengthValidator\n"
+            "from yota.exceptions import NoRendererException\n"
+            "class TForm(yota.Form):\n"
+            "    _renderer = None\n"
+            "    t = EntryNode(validators=MinLengthValidator(5))\n"
+            "valid, out = TForm().json_validate({'t': 'abc'}, raw=True)\n"
+            "assert 't' in out['errors']\n"
+            "try:\n"
+            "    TForm().render()\n"
+            "except NoRendererException:\n"
+            "    sys.stdout.write('ok')\n")
+        assert(out == b'ok')
+
+
+class CountingNode(EntryNode):
+    resolved = 0
+
+    def resolve_data(self, data):
+        CountingNode.resolved += 1
+        EntryNode.resolve_data(self, data)
+
+
+class ShippingForm(yota.Form):
+    elsewhere = CheckNode()
+    street = EntryNode(active_when='elsewhere',
+                       validators=RequiredValidator())
+    payment = RadioNode(buttons=[('card', 'Card'), ('bank', 'Bank')])
+    card = CountingNode(active_when=yota.When('payment', 'card'),
+                        validators=MinLengthValidator(12))
+    # only applies if card is active, which depends on payment
+    expiry = EntryNode(active_when='card', validators=RequiredValidator())
+    reference = EntryNode()
+    _bank_check = yota.Check(RequiredValidator(),
+                             'reference').when(yota.When('payment', 'bank'))
+
+
+class TestConditions(unittest.TestCase):
+    def test_inactive_skipped(self):
+        """ inactive nodes resolve nothing and their checks don't run """
+        CountingNode.resolved = 0
+        test = ShippingForm()
+        valid, invalid = test.validate({'street': 'x', 'card': 'short',
+                                        'expiry': ''})
+        assert(valid is True)
+        assert(invalid == [])
+        assert(CountingNode.resolved == 0)
+        assert((test.street.active, test.card.active, test.expiry.active) ==
+               (False, False, False))
+        assert(test.data_by_attr()['street'] == '')
+
+    def test_active(self):
+        """ active nodes are resolved and checked, through chains of
+        conditions """
+        test = ShippingForm()
+        valid, invalid = test.validate({'elsewhere': 'true', 'street': '',
+                                        'payment': 'card', 'card': 'short',
+                                        'expiry': ''})
+        assert(valid is False)
+        assert([node._attr_name for node in invalid] ==
+               ['street', 'card', 'expiry'])
+
+        valid, invalid = test.validate({'payment': 'bank'})
+        assert([node._attr_name for node in invalid] == ['reference'])
+        assert(test.street.active is False)
+
+    def test_render_inactive(self):
+        """ inactive nodes can be left out of the render """
+        test = ShippingForm()
+        test.render_inactive = False
+        test.validate({'payment': 'card'})
+        output = test.render()
+        assert('card' in output and 'street' not in output)
+        assert('street' in ShippingForm().render())
+
+    def test_unknown_condition(self):
+        """ conditions on nodes that don't exist fail on compile """
+        class TForm(yota.Form):
+            t = EntryNode(active_when='missing')
+        self.assertRaises(AttributeError, TForm.compile)
+
+    def test_condition_cycle(self):
+        """ conditions depending on each other are refused """
+        class TForm(yota.Form):
+            a = EntryNode(active_when='b')
+            b = EntryNode(active_when='a')
+        self.assertRaises(AttributeError, TForm().validate, {})
+
+
+class TestCheckOrder(unittest.TestCase):
+    def test_skip_dependents(self):
+        """ checks whose prerequisites failed are skipped and reported """
+        class TForm(yota.Form):
+            password = EntryNode(validators=MinLengthValidator(5))
+            confirm = EntryNode()
+            _match = yota.Check(MatchingValidator(), 'password',
+                                'confirm').after('password', 'confirm')
+
+        test = TForm()
+        valid, invalid = test.validate({'password': 'abc', 'confirm': 'abd'})
+        assert([node._attr_name for node in invalid] == ['password'])
+        assert([check._attr_name for check in test.skipped_checks] ==
+               ['_match'])
+        valid, json = test.json_validate({'password': 'abc'}, raw=True)
+        assert(json['skipped'] == ['_match'])
+
+        valid, invalid = test.validate({'password': 'abcdef',
+                                        'confirm': 'abcdeg'})
+        assert([node._attr_name for node in invalid] ==
+               ['password', 'confirm'])
+        assert(test.skipped_checks == [])
+
+    def test_order(self):
+        """ checks run after what they depend on, in declaration order
+        otherwise, and skips cascade """
+        ran = []
+
+        def record(name, fail=False):
+            def validator(node):
+                ran.append(name)
+                if fail:
+                    node.add_error({'message': name})
+            return validator
+
+        class TForm(yota.Form):
+            t = EntryNode()
+            _c = yota.Check(record('c'), 't').after('_b')
+            _b = yota.Check(record('b', fail=True), 't').after('_a')
+            _a = yota.Check(record('a'), 't')
+            _d = yota.Check(record('d'), 't')
+            _e = yota.Check(record('e'), 't').after('_c')
+
+        test = TForm()
+        test.validate({})
+        assert(ran == ['a', 'b', 'd'])
+        assert([check._attr_name for check in test.skipped_checks] ==
+               ['_c', '_e'])
+
+    def test_row_dependencies(self):
+        """ errors of row validators fail checks depending on the group """
+        ran = []
+
+        class Item(yota.Form):
+            name = EntryNode(validators=MinLengthValidator(3))
+
+        class TForm(yota.Form):
+            items = RepeatNode(Blueprint(Item))
+            _total = yota.Check(lambda node: ran.append(node),
+                                'items').after('items')
+
+        test = TForm()
+        valid, invalid = test.validate({'items-0-name': 'ab'})
+        assert(valid is False)
+        assert([node.name for node in invalid] == ['items-0-name'])
+        assert([check._attr_name for check in test.skipped_checks] ==
+               ['_total'])
+        assert(ran == [])
+
+        valid, invalid = test.validate({'items-0-name': 'abc'})
+        assert(valid is True)
+        assert(test.skipped_checks == [])
+        assert(len(ran) == 1)
+
+    def test_bad_dependencies(self):
+        """ unknown and cyclic dependencies are refused """
+        class Unknown(yota.Form):
+            t = EntryNode()
+            _a = yota.Check(RequiredValidator(), 't').after('missing')
+        self.assertRaises(AttributeError, Unknown.compile)
+
+        class Cycle(yota.Form):
+            t = EntryNode()
+            _a = yota.Check(RequiredValidator(), 't').after('_b')
+            _b = yota.Check(RequiredValidator(), 't').after('_a')
+        self.assertRaises(AttributeError, Cycle().validate, {})
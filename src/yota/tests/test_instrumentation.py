@@ -0,0 +1,75 @@
+import unittest
+import yota
+from yota.instrumentation import *
+from yota.validators import *
+from yota.nodes import *
+
+
+class TForm(yota.Form):
+    t = EntryNode()
+    _t_valid = Check(MinLengthValidator(5), 't')
+    event = Listener('validate_failure', lambda: None)
+
+
+class TestInstrumentation(unittest.TestCase):
+    """ Phase timings reported by Forms and the renderer """
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.instrument = AggregatingInstrument(
+            exporters=[StatsdExporter(self.transport)])
+        TForm._instrument = self.instrument
+
+    def tearDown(self):
+        del TForm._instrument
+
+    def test_default_noop(self):
+        """ forms are uninstrumented by default """
+        assert(yota.Form._instrument.enabled is False)
+        assert(yota.Form()._instrument is NULL_INSTRUMENT)
+
+    def test_phases(self):
+        """ each phase is reported under the form class name """
+        test = TForm()
+        assert(test._instrument is self.instrument)
+        test.validate_render({'t': 'abc'})
+
+        for phase, key in [('construct', None),
+                           ('filter_post', None),
+                           ('resolve_data', None),
+                           ('check', '_t_valid'),
+                           ('validator', None),
+                           ('trigger_event', 'validate_failure'),
+                           ('process_errors', None),
+                           ('render', None),
+                           ('template_lookup', 'entry'),
+                           ('render_node', 'entry')]:
+            print("Checking phase " + phase)
+            hist = self.instrument.get('TForm', phase, key)
+            assert(hist is not None)
+            assert(hist.count >= 1)
+
+    def test_statsd_lines(self):
+        """ timings are forwarded to exporters """
+        TForm().validate({'t': 'abcdef'})
+        assert('yota.TForm.check._t_valid' in
+               [line.split(':')[0] for line in self.transport.lines])
+        assert(all(line.endswith('|ms') for line in self.transport.lines))
+
+    def test_prometheus(self):
+        """ aggregated histograms render in the text format """
+        TForm().validate({'t': 'abcdef'})
+        text = render_prometheus(self.instrument)
+        assert('yota_phase_seconds_count{form="TForm",phase="check",'
+               'key="_t_valid"} 1' in text)
+        assert('le="+Inf"' in text)
+
+    def test_histogram(self):
+        """ bucketing and quantile estimates """
+        hist = Histogram(bounds=[1, 2, 3])
+        for v in [0.5, 1.5, 1.5, 2.5, 10]:
+            hist.observe(v)
+        assert(hist.counts == [1, 2, 1, 1])
+        assert(hist.quantile(0.5) == 2)
+        assert(hist.quantile(1.0) == 10)
+        assert(hist.mean == 3.2)
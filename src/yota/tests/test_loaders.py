@@ -0,0 +1,109 @@
+import unittest
+import threading
+import yota
+from yota.loaders import MemoryLoader, ResourcePool
+from yota.validators import *
+from yota.nodes import *
+
+
+USERS = MemoryLoader({'taken@x.com': 1})
+
+
+class Member(yota.Form):
+    email = EntryNode(validators=UniqueValidator(USERS))
+
+
+class SignupForm(yota.Form):
+    email = EntryNode(validators=UniqueValidator(USERS))
+    backup = EntryNode(validators=UniqueValidator(USERS))
+    members = RepeatNode(Blueprint(Member))
+
+
+class TestLoaders(unittest.TestCase):
+    def setUp(self):
+        del USERS.batches[:]
+
+    def test_batched(self):
+        """ lookups of every field and row go out in one batch """
+        data = {'email': 'a@x.com', 'backup': 'taken@x.com',
+                'members-0-email': 'taken@x.com', 'members-1-email': 'b@x.com',
+                'members-2-email': ''}
+        test = SignupForm()
+        valid, invalid = test.validate(data)
+        assert(valid is False)
+        assert(USERS.batches == [['a@x.com', 'taken@x.com', 'b@x.com']])
+        assert([node.name for node in invalid] ==
+               ['backup', 'members-0-email'])
+
+        valid, invalid = test.validate({'email': 'c@x.com'})
+        assert(valid is True)
+        assert(len(USERS.batches) == 2)
+
+    def test_list_reported_once(self):
+        """ several taken values of one Node give it a single error """
+        loader = MemoryLoader({'a': 1, 'b': 1})
+
+        class TForm(yota.Form):
+            t = CheckGroupNode(boxes=[('a', 'A'), ('b', 'B'), ('c', 'C')],
+                               validators=UniqueValidator(loader))
+
+        test = TForm()
+        test.validate({'a': 'on', 'b': 'on', 'c': 'on'})
+        assert(test.t.data == ['a', 'b', 'c'])
+        assert(loader.batches == [['a', 'b', 'c']])
+        assert(test.t.errors == [{'message': UniqueValidator(loader).message}])
+
+    def test_chained(self):
+        """ callbacks can defer further lookups, loaded in the next batch """
+        loader = MemoryLoader({'a': 'b', 'b': 'c'})
+        found = []
+
+        def follow(target):
+            return loader.load(target.data).then(
+                lambda value: loader.load(value).then(found.append))
+
+        class TForm(yota.Form):
+            t = EntryNode(validators=follow)
+
+        TForm().validate({'t': 'a'})
+        assert(found == ['c'])
+        assert(loader.batches == [['a'], ['b']])
+
+    def test_max_batch(self):
+        """ large batches are split """
+        loader = MemoryLoader(dict((str(i), i) for i in range(10)))
+        loader.max_batch = 4
+        values = loader.load_many([str(i) for i in range(10)])
+        assert(len(values) == 10)
+        assert([len(batch) for batch in loader.batches] == [4, 4, 2])
+
+    def test_pool(self):
+        """ resources are made as needed, up to the pool size, and reused """
+        made = []
+        pool = ResourcePool(lambda: made.append(1) or len(made), size=2)
+        loader = MemoryLoader({'a': 1}, pool=pool)
+        seen = []
+        batch_load = loader.batch_load
+        loader.batch_load = lambda keys, res: seen.append(res) or \
+            batch_load(keys, res)
+        loader.load_many(['a'])
+        loader.load_many(['a'])
+        assert(seen == [1, 1])
+
+        release = threading.Event()
+        held = []
+
+        def hold():
+            with pool.acquire() as resource:
+                held.append(resource)
+                release.wait()
+        threads = [threading.Thread(target=hold) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        while len(held) < 2:
+            pass
+        assert(sorted(held) == [1, 2])
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert(len(made) == 2)
@@ -13,6 +13,27 @@ class TestBuiltinNodes(unittest.TestCase):
                EntryNode(),
                TextareaNode()]
 
+    def test_repeat(self):
+        """ repeating groups render each row's Nodes inside one template """
+        class Row(yota.Form):
+            qty = EntryNode()
+            sku = ListNode(items=[('a', 'A')])
+
+        class TForm(yota.Form):
+            items = RepeatNode(Blueprint(Row), min_rows=2)
+
+        bs = BeautifulSoup(TForm(auto_start_close=False).render())
+        assert(len(bs.findAll('div', {'class': 'yota-row'})) == 2)
+        assert(len(bs.findAll('input', {'name': 'items-1-qty'})) == 1)
+        assert(len(bs.findAll('select', {'id': 'TForm_items-0-sku'})) == 1)
+
+        test = TForm(auto_start_close=False)
+        success, out = test.validate_render({'items-3-qty': 'five'})
+        bs = BeautifulSoup(out)
+        assert([div['data-row'] for div in
+                bs.findAll('div', {'class': 'yota-row'})] == ['0', '1', '3'])
+        assert(bs.find('input', {'name': 'items-3-qty'})['value'] == 'five')
+
     def test_radio_node(self):
         """ radio node generating the radio buttons """
         class TForm(yota.Form):
@@ -71,6 +92,35 @@ class TestBuiltinNodes(unittest.TestCase):
         assert(len(bs.findAll('option', {'value': '2'})) == 1)
         assert(len(bs.findAll('option')) == 3)
 
+    def test_list_choice_set(self):
+        """ list node with a choice set renders the same options """
+        from yota.choices import ChoiceSet
+        items = [('1', 'some'), ('2', 'other')]
+        outputs = []
+        for choices in (items, ChoiceSet(items)):
+            class TForm(yota.Form):
+                t = ListNode(items=choices)
+            test = TForm(auto_start_close=False)
+            outputs.append(BeautifulSoup(test.validate_render({'t': '2'})[1]))
+        for bs in outputs:
+            assert(len(bs.findAll('option')) == 2)
+            assert(bs.find('option', {'value': '2'}).has_attr('selected'))
+            assert(not bs.find('option', {'value': '1'}).has_attr('selected'))
+
+    def test_list_provider(self):
+        """ list node with a provider renders a page and the selection """
+        from yota.choices import StaticProvider
+        provider = StaticProvider(('c{0}'.format(i), 'Choice {0}'.format(i))
+                                  for i in range(500))
+
+        class TForm(yota.Form):
+            t = ListNode(items=provider, typeahead_url='/t')
+        test = TForm(auto_start_close=False)
+        bs = BeautifulSoup(test.validate_render({'t': 'c400'})[1])
+        assert(len(bs.findAll('option')) == provider.per_page + 1)
+        assert(bs.find('option', {'value': 'c400'}).has_attr('selected'))
+        assert(bs.find('select')['data-typeahead'] == '/t')
+
     def test_labels(self):
         """ all builtin nodes have labels """
 
@@ -3,6 +3,7 @@ import yota
 from yota.validators import *
 from yota.nodes import *
 from yota.exceptions import *
+from yota.choices import ChoiceSet, StaticProvider
 from copy import copy
 
 
@@ -158,3 +159,245 @@ class TestNodeSpecific(unittest.TestCase):
 
         ident = test.t.json_identifiers()
         assert(len(ident['elements']) == 3)
+
+    def test_coercion(self):
+        """ typed nodes parse data once into value """
+        import datetime
+        import decimal
+        from yota.coercers import ListCoercer, to_int
+
+        class TForm(yota.Form):
+            i = IntegerNode(validators=IntegerValidator())
+            d = DecimalNode()
+            day = DateNode()
+            flag = CheckNode(coerce='bool')
+            tags = EntryNode(coerce=ListCoercer(item=to_int))
+            raw = EntryNode()
+
+        test = TForm()
+        success, invalid = test.validate({'i': ' 12 ', 'd': '1.50',
+                                          'day': '2013-08-22', 'tags': '1, 2',
+                                          'raw': 'as is'})
+        assert(success is True)
+        assert(test.i.value == 12)
+        assert(test.i.data == ' 12 ')
+        assert(test.d.value == decimal.Decimal('1.50'))
+        assert(test.day.value == datetime.date(2013, 8, 22))
+        assert(test.flag.value is False)
+        data = test.data_by_attr()
+        assert(data['tags'] == [1, 2])
+        assert(data['raw'] == 'as is')
+        assert(data['i'] == 12)
+
+    def test_coercion_failure(self):
+        """ a failed coercion adds a single error and empty input is left to
+        validators """
+        class TForm(yota.Form):
+            i = IntegerNode(validators=IntegerValidator())
+            d = DecimalNode()
+
+        test = TForm()
+        success, invalid = test.validate({'i': '12a', 'd': 'NaN'})
+        assert(success is False)
+        assert(len(test.i.errors) == 1)
+        assert(test.i.value is None)
+        assert(len(test.d.errors) == 1)
+
+        success, invalid = test.validate({'i': '', 'd': ''})
+        assert(test.i.value is None)
+        assert(len(test.d.errors) == 0)
+        # IntegerValidator rejects empty input whether or not it's coerced
+        assert(test.i.errors == [{'message': IntegerValidator().message}])
+
+
+class LineItem(yota.Form):
+    sku = ListNode(items=[('a', 'A'), ('b', 'B')])
+    qty = IntegerNode(validators=RequiredValidator())
+    note = EntryNode()
+    match = Check(MatchingValidator(message='Mismatch'), 'sku', 'note')
+
+
+class OrderForm(yota.Form):
+    customer = EntryNode()
+    items = RepeatNode(Blueprint(LineItem), max_rows=3)
+
+
+class TestRepeatNode(unittest.TestCase):
+    def data(self, **extra):
+        data = {'customer': 'x',
+                'items-0-sku': 'a', 'items-0-qty': '2', 'items-0-note': 'a',
+                'items-4-sku': 'b', 'items-4-qty': '', 'items-4-note': 'c'}
+        data.update(extra)
+        return data
+
+    def test_rows(self):
+        """ rows are found from the submission and checked one by one """
+        test = OrderForm()
+        valid, invalid = test.validate(self.data())
+        assert(valid is False)
+        assert([row.index for row in test.items.rows] == [0, 4])
+        assert([node.name for node in invalid] ==
+               ['items-4-sku', 'items-4-qty', 'items-4-note'])
+        assert(test.items.rows[1]['note'].errors[0]['message'] == 'Mismatch')
+        assert(test.data_by_attr()['items'] ==
+               [{'sku': 'a', 'qty': 2, 'note': 'a'},
+                {'sku': 'b', 'qty': None, 'note': 'c'}])
+
+        valid, json = test.json_validate(self.data(), raw=True)
+        assert(sorted(json['errors']) ==
+               ['items-4-note', 'items-4-qty', 'items-4-sku'])
+        assert(json['errors']['items-4-qty']['identifiers']['error_id'] ==
+               'OrderForm_items-4-qty_error')
+
+    def test_shared_definition(self):
+        """ every Form shares the row definition, and a single check serves
+        all the rows """
+        one, two = OrderForm(), OrderForm()
+        assert(one.items._nodes is two.items._nodes)
+        one.validate(self.data())
+        checks = [check for check in one._validation_list
+                  if isinstance(check, RowCheck)]
+        assert(len(checks) == 2)
+        assert([row.index for row in two.items.rows] == [0])
+        # the Blueprint's source is left alone
+        assert(not hasattr(LineItem._node_list[0], 'id'))
+
+    def test_max_rows(self):
+        """ rows beyond max_rows are dropped with an error """
+        test = OrderForm()
+        data = self.data()
+        data.update(('items-{0}-qty'.format(i), '1') for i in range(10))
+        test.validate(data)
+        assert(len(test.items.rows) == 3)
+        assert(test.items.errors[0]['message'] ==
+               RepeatNode.max_rows_message)
+
+    def test_piecewise(self):
+        """ only rows whose Nodes were all visited are checked """
+        test = OrderForm()
+        data = self.data(_visited_names='["items-4-sku", "items-4-qty"]')
+        valid, json = test.json_validate(data, piecewise=True, raw=True)
+        assert(sorted(json['errors']) == ['items-4-qty'])
+
+
+class TestChoiceSet(unittest.TestCase):
+    choices = ChoiceSet(('c{0}'.format(i), 'Choice {0}'.format(i))
+                        for i in range(100))
+
+    def test_shared(self):
+        """ choice sets are shared by every Node and Form, never copied """
+        class TForm(yota.Form):
+            t = ListNode(items=self.choices)
+            b = CheckGroupNode(boxes=self.choices)
+
+        one, two = TForm(), TForm()
+        assert(one.t.items is two.t.items is self.choices)
+        assert(one.b.boxes is self.choices)
+        assert('c5' in self.choices and 'x' not in self.choices)
+        assert(['c5'] not in self.choices)
+        assert(self.choices.label('c5') == 'Choice 5')
+        assert(list(self.choices)[:1] == [('c0', 'Choice 0')])
+
+    def test_check_group(self):
+        """ checked boxes are found from the submission, in box order """
+        node = CheckGroupNode(boxes=self.choices)
+        node.resolve_data({'c9': 'true', 'c2': 'true', 'c3': '', 'x': 'y'})
+        assert(node.data == ['c2', 'c9'])
+
+    def test_render_cached(self):
+        """ options are rendered once per template and spliced """
+        from yota.renderers import JinjaRenderer
+        template = JinjaRenderer().env.get_template('option.html')
+        block = self.choices.render(template)
+        assert(block.count('<option') == 100)
+        assert('selected' not in block)
+        assert(self.choices.render(template) is block)
+        selected = self.choices.render(template, 'c42')
+        assert(selected.count(' selected') == 1)
+        assert('<option value="c42" selected>' in selected)
+        assert(selected.replace(' selected', '') == block)
+
+
+class TestChoiceProvider(unittest.TestCase):
+    def setUp(self):
+        self.provider = StaticProvider(('c{0}'.format(i), 'Choice {0}'.format(i))
+                                       for i in range(120))
+        self.provider.per_page = 10
+        self.provider.cache_size = 4
+
+    def test_pages(self):
+        """ searches page through matching labels """
+        choices, more = self.provider.search()
+        assert(choices[0] == ('c0', 'Choice 0') and len(choices) == 10)
+        assert(more)
+        choices, more = self.provider.search('choice 11', 1)
+        assert(choices == [('c119', 'Choice 119')])
+        assert(not more)
+
+    def test_cache_bounded(self):
+        """ results are cached, dropping the least recently used, and misses
+        aren't cached at all """
+        calls = []
+        fetch = self.provider.fetch
+        self.provider.fetch = lambda value: calls.append(value) or fetch(value)
+        for value in ('c1', 'c2', 'c1', 'x', 'x'):
+            self.provider.label(value)
+        assert(calls == ['c1', 'c2', 'x', 'x'])
+        assert(('fetch', 'x') not in self.provider._cache)
+        for i in range(4):
+            self.provider.search(str(i))
+        assert(len(self.provider._cache) == 4)
+        self.provider.label('c2')
+        assert(calls[-1] == 'c2')
+
+    def test_lookup(self):
+        """ membership is a lookup by key """
+        assert('c100' in self.provider)
+        assert('x' not in self.provider and [] not in self.provider)
+        assert(self.provider.label('c3') == 'Choice 3')
+
+    def test_initial(self):
+        """ the selected choice is rendered with the first page """
+        assert(len(self.provider.initial()) == 10)
+        assert(self.provider.initial('c3') == self.provider.initial())
+        assert(self.provider.initial('c50')[0] == ('c50', 'Choice 50'))
+        assert(len(self.provider.initial('bogus')) == 10)
+
+    def test_typeahead(self):
+        """ the endpoint helper parses and bounds its parameters """
+        ret = self.provider.typeahead({'q': 'Choice 2', 'page': '0'}, raw=True)
+        assert(ret['results'][0] == {'value': 'c2', 'label': 'Choice 2'})
+        assert(ret['more'])
+        ret = self.provider.typeahead({'page': 'x'}, raw=True)
+        assert(ret['results'][0]['value'] == 'c0')
+        assert(self.provider.typeahead({'q': 'z' * 1000, 'page': '-3'}) ==
+               '{"results": [], "more": false}')
+
+    def test_typeahead_page_clamped(self):
+        """ pages past the last are served the last page """
+        assert(self.provider.pages() == 12)
+        assert(self.provider.pages('Choice 11') == 2)
+        assert(self.provider.pages('z') == 1)
+        ret = self.provider.typeahead({'page': '10000000'}, raw=True)
+        assert(ret['results'][0]['value'] == 'c110')
+        assert(not ret['more'])
+        self.provider.count = lambda query: None
+        self.provider.max_pages = 3
+        ret = self.provider.typeahead({'q': 'Choice 1', 'page': '50'},
+                                      raw=True)
+        assert(ret['results'][0]['value'] == 'c109')
+
+    def test_validate(self):
+        """ choice validator checks submissions against the provider """
+        from yota.validators import ChoiceValidator
+
+        class TForm(yota.Form):
+            t = ListNode(items=self.provider)
+
+        assert(TForm().t.items is self.provider)
+        node = ListNode(items=self.provider, data='c99')
+        ChoiceValidator()(node)
+        assert(len(node.errors) == 0)
+        node.data = 'c999'
+        ChoiceValidator()(node)
+        assert(len(node.errors) == 1)
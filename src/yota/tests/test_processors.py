@@ -0,0 +1,191 @@
+import unittest
+import yota
+from yota.processors import *
+from yota.validators import *
+from yota.nodes import *
+
+
+class CountingProcessor(PostProcessor):
+    calls = 0
+
+    def filter_post(self, postdict, names=None):
+        CountingProcessor.calls += 1
+        return dict(postdict)
+
+
+class TestProcessors(unittest.TestCase):
+    """ Filter chains and how often the processor stage runs """
+
+    def test_single_pass(self):
+        """ every public validation method processes data exactly once """
+        class TForm(yota.Form):
+            _processor = CountingProcessor
+            t = EntryNode(validators=MinLengthValidator(5))
+
+        for meth, kwargs in [('validate', {}),
+                             ('validate_render', {}),
+                             ('json_validate', {}),
+                             ('json_validate', {'piecewise': True})]:
+            CountingProcessor.calls = 0
+            getattr(TForm(), meth)({'t': 'something', '_visited_names': '{}'},
+                                   **kwargs)
+            print("Testing processor passes for " + meth)
+            assert(CountingProcessor.calls == 1)
+
+    def test_shared_instance(self):
+        """ processors are compiled once per class """
+        class P(PostProcessor):
+            filters = [StripFilter()]
+        assert(P.shared() is P.shared())
+        assert(P.shared() is not PostProcessor.shared())
+
+    def test_filter_chain(self):
+        """ filters compose in order and skip non-string values """
+        class P(PostProcessor):
+            filters = [CoerceTextFilter(), StripFilter(), SizeLimitFilter(4)]
+        marker = object()
+        out = P().filter_post({'a': b'  abcdef ', 'b': [' x ', 'y'],
+                               'c': marker, 'submit_action': ' true'})
+        assert(out['a'] == u'abcd')
+        assert(out['b'] == ['x', 'y'])
+        assert(out['c'] is marker)
+        assert(out['submit_action'] == ' true')
+
+    def test_filter_multidict(self):
+        """ filtering keeps the mapping type and every repeated value """
+        class P(PostProcessor):
+            filters = [StripFilter()]
+        source = FakeMultiDict([('a', ' 1 '), ('a', ' 2 '), ('b', 'x ')])
+        out = P().filter_post(source)
+        assert(isinstance(out, FakeMultiDict))
+        assert(out is not source)
+        assert(out['a'] == '1')
+        assert(out.getlist('a') == ['1', '2'])
+        assert(out.getlist('b') == ['x'])
+        assert(source.getlist('a') == [' 1 ', ' 2 '])
+
+    def test_expensive_validated_only(self):
+        """ expensive normalizers only run on fields with validators """
+        decomposed = u'e\u0301'
+
+        class P(PostProcessor):
+            filters = [StripFilter(), NormalizeFilter('NFC')]
+
+        class TForm(yota.Form):
+            _processor = P
+            checked = EntryNode(validators=RequiredValidator())
+            unchecked = EntryNode()
+
+        test = TForm()
+        test.validate({'checked': decomposed + ' ',
+                       'unchecked': decomposed + ' '})
+        assert(test.checked.data == u'\xe9')
+        assert(test.unchecked.data == decomposed)
+
+    def test_validated_names_invalidated(self):
+        """ inserting validators refreshes the expensive filter targets """
+        class P(PostProcessor):
+            filters = [NormalizeFilter('NFC')]
+
+        class TForm(yota.Form):
+            _processor = P
+            t = EntryNode()
+
+        test = TForm()
+        test.validate({'t': u'e\u0301'})
+        assert(test.t.data == u'e\u0301')
+        test.insert_validator(Check(RequiredValidator(), 't'))
+        test.validate({'t': u'e\u0301'})
+        assert(test.t.data == u'\xe9')
+
+
+class FakeMultiDict(dict):
+    """ Stand-in for Werkzeug's MultiDict/Django's QueryDict that records
+    which keys were read """
+    def __init__(self, pairs):
+        super(FakeMultiDict, self).__init__()
+        self.lists = {}
+        self.reads = []
+        for key, val in pairs:
+            self.lists.setdefault(key, []).append(val)
+            dict.__setitem__(self, key, self.lists[key][0])
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return dict.__getitem__(self, key)
+
+    def getlist(self, key):
+        return self.lists.get(key, [])
+
+    def setlist(self, key, values):
+        self.lists[key] = list(values)
+        dict.__setitem__(self, key, values[0])
+
+    def copy(self):
+        return FakeMultiDict((key, val) for key in self.lists
+                             for val in self.lists[key])
+
+
+class TestLazyAdapters(unittest.TestCase):
+    """ Lazy processors for framework request structures and raw bodies """
+
+    def test_multidict(self):
+        """ values are read through without building a dict """
+        class P(MultiDictProcessor):
+            filters = [StripFilter()]
+
+        source = FakeMultiDict([('a', ' 1 '), ('a', '2'), ('b', 'x')])
+        data = P().filter_post(source)
+        assert(source.reads == [])
+        assert(data['a'] == '1')
+        assert(data['a'] == '1')
+        assert(source.reads == ['a'])
+        assert(data.getlist('a') == ['1', '2'])
+        assert('b' in data and 'c' not in data)
+        assert(data.get('c', 'default') == 'default')
+
+    def test_urlencoded(self):
+        """ urlencoded bodies are decoded on demand """
+        data = UrlencodedProcessor().filter_post(
+            b'first=Isaac+C&last=Co%C3%B6k&tag=a&tag=b&empty=&flag')
+        assert(data['first'] == u'Isaac C')
+        # only scanned as far as the requested key
+        assert('last' not in data._offsets)
+        assert(data['last'] == u'Co\xf6k')
+        assert(data.getlist('tag') == [u'a', u'b'])
+        assert(data['empty'] == u'')
+        assert(data['flag'] == u'')
+        self.assertRaises(KeyError, data.__getitem__, 'missing')
+        assert(len(data) == 5)
+
+    def test_incomplete_adapter(self):
+        """ adapters missing a raw lookup fail when they're made """
+        class Incomplete(LazyData):
+            def raw(self, key):
+                return ''
+
+            def __iter__(self):
+                return iter(())
+
+            def __len__(self):
+                return 0
+
+        self.assertRaises(TypeError, Incomplete, PostProcessor())
+
+    def test_form_integration(self):
+        """ a Form validates straight from a raw body, touching only the
+        fields it resolves """
+        class TForm(yota.Form):
+            _processor = UrlencodedProcessor
+            t = EntryNode(validators=MinLengthValidator(5))
+            c = CheckNode()
+
+        test = TForm()
+        success, invalid = test.validate(b't=abc&ignored=' + b'x' * 1000)
+        assert(success is False)
+        assert(test.t.data == u'abc')
+        assert(test.c.data is False)
+        success, out = test.json_validate(
+            b'submit_action=true&t=abcdef&c=on', raw=True)
+        assert(success is True)
+        assert(test.c.data == u'on')
@@ -0,0 +1,133 @@
+import unittest
+import gc
+import sys
+import yota
+from yota.production import warmup, load_templates, set_production
+from yota.renderers import JinjaRenderer
+from yota.validators import *
+from yota.nodes import *
+from yota.exceptions import *
+
+
+class TForm(yota.Form):
+    first = EntryNode(validators=MinLengthValidator(5))
+    color = ListNode(items=[('r', 'Red')])
+
+
+class TestWarmup(unittest.TestCase):
+    def test_compile(self):
+        """ compile collects the templates of every node, start and close """
+        assert(TForm.compile() == ('entry', 'form_close', 'form_open',
+                                   'list'))
+        assert(TForm.compile() is TForm.__dict__['_templates'])
+        # the cached plan isn't copied into instances
+        assert('_templates' not in TForm().__dict__)
+
+    def test_load_templates(self):
+        """ included templates are followed """
+        env = JinjaRenderer().env
+        loaded = load_templates(env, ['form_open.html'])
+        assert('error.html' in loaded)
+
+    def test_warmup_themes(self):
+        """ templates are loaded into the shared environment of each theme """
+        loaded = warmup(forms=[TForm], themes=['bs2', 'bs3'], freeze=False)
+        assert(sorted(loaded) == ['bs2', 'bs3'])
+        assert('list.html' in loaded['bs3'])
+        assert('error.html' in loaded['bs2'])
+
+        renderer = JinjaRenderer()
+        renderer.templ_type = 'bs3'
+        cached = [key[1] for key in renderer.env.cache.keys()]
+        assert('list.html' in cached)
+
+    def test_warmup_import_strings(self):
+        """ modules and module:Form strings are imported and expanded """
+        loaded = warmup(forms=['yota.tests.test_production:TForm'],
+                        freeze=False)
+        assert('entry.html' in loaded['bs2'])
+        loaded = warmup(forms=[sys.modules[__name__]], freeze=False)
+        assert('list.html' in loaded['bs2'])
+
+    @unittest.skipUnless(hasattr(gc, 'freeze'), 'gc.freeze unavailable')
+    def test_freeze(self):
+        """ everything left after warming up is frozen """
+        try:
+            yota.warmup(forms=[TForm])
+            assert(gc.get_freeze_count() > 0)
+        finally:
+            gc.unfreeze()
+
+
+class TestProductionMode(unittest.TestCase):
+    def setUp(self):
+        set_production()
+
+    def tearDown(self):
+        set_production(False)
+
+    def test_flags(self):
+        """ every check is switched off, and back on again """
+        assert(yota.Form._strict is False)
+        assert(JinjaRenderer().env.auto_reload is False)
+        set_production(False)
+        assert(Node._strict is True)
+        assert(JinjaRenderer().env.auto_reload is True)
+
+    def test_output_unchanged(self):
+        """ production Forms behave exactly as development ones """
+        data = {'first': 'some', 'color': 'r'}
+        output = TForm().validate_render(data), TForm().json_validate(data)
+        set_production(False)
+        assert(output == (TForm().validate_render(data),
+                          TForm().json_validate(data)))
+
+    def test_checked_once(self):
+        """ the definition is checked by the first construction only """
+        class ProdForm(yota.Form):
+            first = EntryNode()
+        ProdForm()
+        assert(ProdForm.__dict__['_checked'] is False)
+        ProdForm._node_list[0]._attr_name = 'title'
+        ProdForm()
+
+    def test_overlap(self):
+        """ Node names overlapping the Form fail on compile """
+        class OverlapForm(yota.Form):
+            first = EntryNode()
+        OverlapForm._node_list[0]._attr_name = 'title'
+        self.assertRaises(AttributeError, OverlapForm)
+
+    def test_requires(self):
+        """ missing required context values fail on compile """
+        class RequiresForm(yota.Form):
+            color = ListNode()
+        self.assertRaises(InvalidContextException, warmup,
+                          forms=[RequiresForm], freeze=False)
+
+    def test_requires_development(self):
+        """ development mode still allows them to be set after construction,
+        and checks them on render instead """
+        set_production(False)
+
+        class LateForm(yota.Form):
+            color = ListNode()
+        LateForm.compile()
+        self.assertRaises(InvalidContextException, LateForm().render)
+        form = LateForm()
+        form.color.items = [('r', 'Red')]
+        form.render()
+
+    def test_not_callable(self):
+        """ declared callables are checked on compile, and errors raised by
+        them aren't hidden """
+        class CallForm(yota.Form):
+            first = EntryNode(validators=[5])
+        self.assertRaises(NotCallableException, CallForm.compile)
+
+        def broken(target):
+            raise TypeError('broken')
+
+        class BrokenForm(yota.Form):
+            first = EntryNode(validators=broken)
+        self.assertRaises(TypeError, BrokenForm().validate, {'first': ''})
@@ -0,0 +1,71 @@
+import unittest
+import os
+import pstats
+import shutil
+import tempfile
+import yota
+from yota.profiling import SamplingProfiler
+from yota.validators import *
+from yota.nodes import *
+
+
+class TForm(yota.Form):
+    t = EntryNode(validators=MinLengthValidator(5))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """ Opt-in sampled profiling of public Form methods """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        del TForm._profiler
+        shutil.rmtree(self.directory)
+
+    def files(self):
+        folder = os.path.join(self.directory, 'TForm')
+        if not os.path.isdir(folder):
+            return []
+        return sorted(os.listdir(folder))
+
+    def test_sample_rate(self):
+        """ one in every N calls is profiled, nested calls included """
+        TForm._profiler = SamplingProfiler(self.directory, every=3,
+                                           min_interval=0)
+        for i in range(6):
+            TForm().validate_render({'t': 'abc'})
+        files = self.files()
+        # validate_render and its nested render count as one call
+        assert(len(files) == 2)
+        assert(all(f.startswith('validate_render') for f in files))
+        stats = pstats.Stats(os.path.join(self.directory, 'TForm', files[0]))
+        assert(stats.total_calls > 0)
+
+    def test_limits(self):
+        """ file budget and interval limits stop sampling """
+        profiler = SamplingProfiler(self.directory, every=1, max_files=2,
+                                    min_interval=0)
+        TForm._profiler = profiler
+        for i in range(5):
+            TForm().validate({'t': 'abc'})
+        assert(len(self.files()) == 2)
+        assert(profiler.bytes_written > 0)
+
+        TForm._profiler = SamplingProfiler(self.directory, every=1,
+                                           min_interval=3600)
+        for i in range(5):
+            TForm().render()
+        assert(len([f for f in self.files() if f.startswith('render')]) == 1)
+
+    def test_collapsed(self):
+        """ collapsed stacks are written for flamegraphs """
+        TForm._profiler = SamplingProfiler(self.directory, every=1,
+                                           format='collapsed')
+        success, out = TForm().json_validate({'t': 'abc'})
+        path = os.path.join(self.directory, 'TForm', self.files()[0])
+        lines = open(path).read().splitlines()
+        assert(len(lines) > 0)
+        assert(any('_gen_validate' in line for line in lines))
+        assert(all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines))
+        assert(success is False)
@@ -0,0 +1,118 @@
+import unittest
+import hashlib
+import io
+import tempfile
+import yota
+from yota.uploads import *
+from yota.validators import *
+from yota.nodes import *
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 200
+
+
+class FakeStorage(object):
+    """ Stand-in for a framework file object that tracks how much was read """
+    def __init__(self, content, type='image/png', filename='up.png'):
+        self.file = io.BytesIO(content)
+        self.type = type
+        self.filename = filename
+
+    @property
+    def consumed(self):
+        return self.file.tell()
+
+
+class TestUploads(unittest.TestCase):
+    """ Streaming reception of uploaded files """
+
+    def test_sniff(self):
+        """ content types identified from leading bytes """
+        assert(sniff_type(PNG[:16]) == 'image/png')
+        assert(sniff_type(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'image/webp')
+        assert(sniff_type(b'\x00\x00\x00\x18ftypmp42') == 'video/mp4')
+        assert(sniff_type(b'just some text..') is None)
+
+    def test_type_matches(self):
+        """ accept lists support wildcards """
+        assert(type_matches('image/png', 'audio/*,image/*'))
+        assert(type_matches('image/png', ['image/png']))
+        assert(not type_matches('application/pdf', 'image/*'))
+        assert(not type_matches(None, '*/*'))
+
+    def test_receive(self):
+        """ uploads are spooled, measured and hashed """
+        up = receive_upload(FakeStorage(PNG), hash_name='sha1', chunk_size=7)
+        assert(up.size == len(PNG))
+        assert(up.sniffed_type == 'image/png')
+        assert(up.type == 'image/png')
+        assert(up.digest == hashlib.sha1(PNG).hexdigest())
+        assert(up.read() == PNG)
+
+    def test_size_limit_early(self):
+        """ reading stops as soon as the limit is passed """
+        source = FakeStorage(PNG * 100)
+        self.assertRaises(UploadError, receive_upload, source, max_size=100,
+                          chunk_size=50)
+        assert(source.consumed == 150)
+
+    def test_type_mismatch_early(self):
+        """ a disguised file is rejected after the first chunk """
+        source = FakeStorage(b'%PDF-1.4' + b'\x00' * 1000)
+        self.assertRaises(UploadError, receive_upload, source,
+                          accepts='image/*', chunk_size=64)
+        assert(source.consumed == 64)
+
+    def test_file_node(self):
+        """ FileNode rejects uploads with an error and keeps good ones """
+        class TForm(yota.Form):
+            f = FileNode(max_size=1000, check_type=True)
+            _f_type = Check(MimeTypeValidator(['image/png']), 'f')
+
+        test = TForm()
+        success, invalid = test.validate({'f': FakeStorage(PNG)})
+        assert(success is True)
+        assert(test.f.data.size == len(PNG))
+
+        success, invalid = test.validate({'f': FakeStorage(PNG * 10)})
+        assert(success is False)
+        assert('larger' in test.f.errors[0]['message'])
+
+        # claims to be a png but isn't
+        success, invalid = test.validate(
+            {'f': FakeStorage(b'GIF89a' + b'\x00' * 20)})
+        assert(success is False)
+
+        # no file selected
+        success, invalid = test.validate({'f': ''})
+        assert(success is False)
+
+    def test_unidentified_type(self):
+        """ the declared type of an upload isn't trusted when its content
+        couldn't be identified """
+        class TForm(yota.Form):
+            f = FileNode()
+            _f_type = Check(MimeTypeValidator(['image/png']), 'f')
+
+        test = TForm()
+        success, invalid = test.validate(
+            {'f': FakeStorage(b'\x00' * 20, type='image/png')})
+        assert(test.f.data.sniffed_type is None)
+        assert(success is False)
+
+    def test_spool_closed(self):
+        """ the spool is closed when reading the stream fails """
+        class Broken(object):
+            def read(self, size):
+                raise IOError("connection reset")
+        spools = []
+        spooled = tempfile.SpooledTemporaryFile
+
+        def track(*args, **kwargs):
+            spools.append(spooled(*args, **kwargs))
+            return spools[-1]
+        tempfile.SpooledTemporaryFile = track
+        try:
+            self.assertRaises(IOError, receive_upload, Broken())
+        finally:
+            tempfile.SpooledTemporaryFile = spooled
+        assert(spools[0].closed)
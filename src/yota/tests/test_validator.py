@@ -1,8 +1,10 @@
+import re
 import unittest
 import yota
 from yota.validators import *
 from yota.nodes import *
 from yota.exceptions import *
+from yota.choices import ChoiceSet
 
 
 class TestValidators(unittest.TestCase):
@@ -151,6 +153,14 @@ class TestValidators(unittest.TestCase):
         errors = self.run_check({'t': 'asdfsd'}, meth)
         assert(len(errors) > 0)
 
+    def test_integer_stores_value(self):
+        """ integer validator keeps its parsed result """
+        node = EntryNode(_attr_name='t', data='42')
+        c = Check(IntegerValidator(), node)
+        c.resolved = True
+        c()
+        assert(node.value == 42)
+
     def test_required(self):
         """ required validator """
         meth = RequiredValidator(message="Darn")
@@ -160,6 +170,87 @@ class TestValidators(unittest.TestCase):
         errors = self.run_check({'t': ''}, meth)
         assert(len(errors) > 0)
 
+    def test_choice(self):
+        """ choice validator against given and Node choices """
+        meth = ChoiceValidator(ChoiceSet([('a', 'A'), ('b', 'B')]))
+        assert(len(self.run_check({'t': 'a'}, meth)) == 0)
+        assert(len(self.run_check({'t': ''}, meth)) == 0)
+        assert(len(self.run_check({'t': 'c'}, meth)) > 0)
+        assert(len(self.run_check({'t': ['a', 'b']}, meth)) == 0)
+        assert(len(self.run_check({'t': ['a', 'c']}, meth)) > 0)
+
+        node = ListNode(items=[('a', 'A')], data='b')
+        ChoiceValidator()(node)
+        assert(len(node.errors) == 1)
+
+    def test_regex_max_length(self):
+        """ input over the length limit is rejected without matching """
+        meth = RegexValidator(regex='^(a+)+$', max_length=30)
+        errors = self.run_check({'t': 'a' * 40 + '!'}, meth)
+        assert(errors[0].errors[0]['message'] == 'Maximum allowed length 30')
+        assert(len(self.run_check({'t': 'a' * 30}, meth)) == 0)
+        meth = RegexValidator(regex='^a*$')
+        assert(len(self.run_check({'t': 'a' * 5000}, meth)) == 0)
+        meth = UsernameValidator(max_length=30, length_message='{0} at most')
+        errors = self.run_check({'t': 'a' * 40}, meth)
+        assert(errors[0].errors == [{'message': '30 at most'}])
+
+    def test_regex_engine(self):
+        """ engines are named, and missing ones fail on declaration """
+        self.assertRaises(ImportError, RegexValidator, '^a$',
+                          engine='no_such_engine')
+        assert(regex_engine('re') is re)
+        meth = PasswordStrengthValidator()
+        errors = self.run_check({'t': 'ABcd12!xyz'}, meth)
+        assert(errors[0].errors[0]['message'] == 'Password strength is 4')
+        assert(errors[0].errors[0]['block'] is False)
+
+    def test_regex_compiled(self):
+        """ regexes are compiled once, lists into a single alternation """
+        from copy import deepcopy
+        meth = RegexValidator(regex=[r'^\d+$', r'^[a-z]+$'])
+        assert(deepcopy(meth) is meth)
+        assert(len(self.run_check({'t': '123'}, meth)) == 0)
+        assert(len(self.run_check({'t': 'abc'}, meth)) == 0)
+        assert(len(self.run_check({'t': 'abc123'}, meth)) > 0)
+        meth.regex = '^abc123$'
+        assert(len(self.run_check({'t': 'abc123'}, meth)) == 0)
+
+    def test_strength_fused(self):
+        """ fused strength rules score the same as separate matches """
+        rules = PasswordStrengthValidator.default_regex
+        custom = PasswordStrengthValidator(regex=rules + [r'(\w)\1'])
+        default = PasswordStrengthValidator()
+        for password in ['', 'abc', 'AB12!xyz', 'AB12!x\nyzCD34', 'aa',
+                         'Passw0rd!!', '\n' + 'AB12!xyz']:
+            expected = sum(1 for rule in rules if re.match(rule, password))
+            assert(default.strength(password) == expected)
+            assert(custom.strength(password) ==
+                   expected + bool(re.match(r'(\w)\1', password)))
+
+    def test_strength_regex_set(self):
+        """ setting the rules recompiles them """
+        meth = PasswordStrengthValidator()
+        assert(meth.strength('xyz') == 0)
+        meth.regex = ['(?=.*z)']
+        assert(meth.strength('xyz') == 1)
+        assert(meth.strength('ABC12!xy') == 0)
+        meth.regex = list(PasswordStrengthValidator.default_regex)
+        assert(meth.strength('ABC12!xy') == 4)
+        # the list is read when assigned, not when a password is checked
+        meth.regex.append('(?=.*q)')
+        assert(meth.strength('q') == 0)
+
+    def test_strength_native(self):
+        """ native strings, which are bytes on Python 2, and unicode score
+        the same """
+        rules = PasswordStrengthValidator.default_regex
+        meth = PasswordStrengthValidator()
+        for password in ['', 'abc', 'AB12!xyz', 'AB12!x\nyzCD34']:
+            expected = sum(1 for rule in rules if re.match(rule, password))
+            assert(meth.strength(str(password)) == expected)
+            assert(meth.strength(u'' + password) == expected)
+
 class TestCheck(unittest.TestCase):
     def test_key_access_exception(self):
         """ Proper raising of access exception when missing a required piece of
@@ -172,3 +263,84 @@ class TestCheck(unittest.TestCase):
         test.t._null_val = ['test']
         test._gen_validate({})
         assert len(test.t.data) == 1
+
+    def test_timeout(self):
+        """ a pathological regex is stopped at the form's check timeout """
+        import time
+
+        class TForm(yota.Form):
+            t = EntryNode(validators=RegexValidator('^(a+)+$',
+                                                    max_length=None))
+            check_timeout = 0.1
+            timeout_error = {'message': 'Too slow'}
+
+        start = time.time()
+        valid, invalid = TForm().validate({'t': 'a' * 40 + '!'})
+        assert(time.time() - start < 2)
+        assert(valid is False)
+        assert(invalid[0].errors == [{'message': 'Too slow'}])
+
+    def test_timeout_thread(self):
+        """ outside the main thread checks are timed out once they finish,
+        and a check's own timeout overrides the form's """
+        import threading
+        import time
+        slow = Check(lambda node: time.sleep(0.05), 't').within(0.01)
+
+        class TForm(yota.Form):
+            t = EntryNode()
+            _slow = slow
+            check_timeout = 10
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(TForm().validate({'t': 'x'})))
+        thread.start()
+        thread.join()
+        valid, invalid = results[0]
+        assert(valid is False)
+        assert(invalid[0].errors == [TForm.timeout_error])
+
+    def test_timeout_warns_once(self):
+        """ deadlines that can't interrupt a check log a warning once """
+        import logging
+        import threading
+        from yota import timeouts
+
+        def run():
+            with timeouts.deadline(1):
+                pass
+
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        timeouts.log.addHandler(handler)
+        del timeouts._warned[:]
+        try:
+            for i in range(2):
+                thread = threading.Thread(target=run)
+                thread.start()
+                thread.join()
+        finally:
+            timeouts.log.removeHandler(handler)
+        assert(len(records) == 1)
+
+    def test_timeout_chains_alarm(self):
+        """ a SIGALRM that isn't the deadline's goes to the previous handler,
+        which is put back afterwards """
+        import os
+        import signal
+        from yota.timeouts import deadline
+
+        received = []
+
+        def handler(signum, frame):
+            received.append(signum)
+        previous = signal.signal(signal.SIGALRM, handler)
+        try:
+            with deadline(10):
+                os.kill(os.getpid(), signal.SIGALRM)
+            assert(received == [signal.SIGALRM])
+            assert(signal.getsignal(signal.SIGALRM) is handler)
+        finally:
+            signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,72 @@
+from yota.exceptions import CheckTimeout
+from yota.instrumentation import clock
+from contextlib import contextmanager
+import logging
+import signal
+import threading
+
+log = logging.getLogger(__name__)
+# whether the deadline not being enforced off the main thread was logged
+_warned = []
+
+
+def _can_interrupt():
+    """ Whether a running check can be interrupted with an interval timer,
+    which only the main thread receives, and only if no other timer is
+    already running """
+    if not hasattr(signal, 'setitimer'):
+        return False
+    # threading.main_thread is Python 3 only
+    if not isinstance(threading.current_thread(), threading._MainThread):
+        return False
+    return signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@contextmanager
+def deadline(seconds):
+    """ Raises :class:`yota.exceptions.CheckTimeout` from the with block if it
+    runs for longer than seconds.
+
+    In the main thread the block is interrupted with ``SIGALRM`` when its time
+    is up. Python's regex engine checks for signals as it backtracks, so this
+    stops a pathological ``re.match`` part way.
+
+    .. warning::
+
+        Off the main thread the deadline is not enforced. In the worker
+        threads of most WSGI servers signals can't be delivered, so the block
+        always runs to completion and is only reported as timed out
+        afterwards, and a warning is logged the first time this happens.
+        There, give the regex validators a ``max_length`` or use a linear
+        time engine to bound the time taken.
+    """
+    if not _can_interrupt():
+        if not _warned:
+            _warned.append(True)
+            log.warning("Check deadlines can't interrupt checks here, they "
+                        "are only timed out once they finish")
+        start = clock()
+        yield
+        if clock() - start > seconds:
+            raise CheckTimeout()
+        return
+
+    end = clock() + seconds
+
+    def expired(signum, frame):
+        if clock() >= end:
+            raise CheckTimeout()
+        # not our timer, so pass it on to the handler we replaced
+        if callable(previous):
+            previous(signum, frame)
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        # a handler installed outside Python is reported as None, and can't
+        # be put back, so fall back to the default
+        signal.signal(signal.SIGALRM,
+                      signal.SIG_DFL if previous is None else previous)
@@ -0,0 +1,167 @@
+# Leading bytes of common formats and the content type they identify. Formats
+# that need more than a prefix comparison are handled in sniff_type
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'OggS', 'audio/ogg'),
+    (b'fLaC', 'audio/flac'),
+    (b'\x1aE\xdf\xa3', 'video/webm'),
+)
+RIFF_TYPES = {b'WEBP': 'image/webp', b'WAVE': 'audio/wav',
+              b'AVI ': 'video/x-msvideo'}
+SNIFF_LENGTH = 16
+""" The number of leading bytes needed to identify a type """
+
+
+class UploadError(Exception):
+    """ Raised while receiving an upload that should be rejected. The message
+    is intended for the user. """
+    pass
+
+
+def sniff_type(head):
+    """ Identifies the content type of a file from its first bytes, returning
+    None if it isn't recognized. """
+    for signature, mimetype in SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head.startswith(b'RIFF'):
+        return RIFF_TYPES.get(head[8:12])
+    if head[4:8] == b'ftyp':
+        return 'video/mp4'
+    return None
+
+
+def type_matches(mimetype, accepts):
+    """ Checks a content type against an accept list such as the HTML accept
+    attribute 'image/*,application/pdf'. Accepts may be a comma separated
+    string or a list. """
+    if mimetype is None:
+        return False
+    if isinstance(accepts, str):
+        accepts = accepts.split(',')
+    major = mimetype.split('/')[0] + '/*'
+    for pattern in accepts:
+        pattern = pattern.strip()
+        if pattern in (mimetype, major, '*/*'):
+            return True
+    return False
+
+
+class Upload(object):
+    """ An uploaded file that has been streamed into a spooled temporary file.
+    Small uploads stay in memory while larger ones roll over to disk.
+
+    :attr file: The spooled file, positioned at the beginning.
+    :attr filename: The filename reported by the client.
+    :attr type: The content type declared by the client.
+    :attr sniffed_type: The content type identified from the file's bytes,
+        or None if it wasn't recognized.
+    :attr size: The size in bytes.
+    :attr digest: A hex digest of the content if hashing was requested.
+    """
+
+    def __init__(self, file, filename, type, sniffed_type, size, digest):
+        self.file = file
+        self.filename = filename
+        self.type = type
+        self.sniffed_type = sniffed_type
+        self.size = size
+        self.digest = digest
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+    def __repr__(self):
+        return "<Upload {0!r}, type={1}, size={2}>".format(
+            self.filename, self.sniffed_type or self.type, self.size)
+
+
+def _check_type(head, accepts):
+    sniffed = sniff_type(head)
+    if accepts is not None and not type_matches(sniffed, accepts):
+        raise UploadError("File content type is not allowed")
+    return sniffed
+
+
+def receive_upload(source, max_size=None, accepts=None, hash_name=None,
+                   chunk_size=64 * 1024, spool_size=1024 * 1024):
+    """ Streams an uploaded file from a web framework's file object into an
+    :class:`Upload`, reading chunk_size bytes at a time so that the whole
+    upload is never held in memory at once.
+
+    Uploads are rejected by raising :class:`UploadError` as early as possible:
+    before reading at all if the declared length is too large, after the
+    first chunk if the sniffed type doesn't match accepts, and as soon as the
+    running total passes max_size.
+
+    :param source: Anything with a read method, or an object wrapping one as
+        ``stream`` (Werkzeug's FileStorage) or ``file`` (cgi's FieldStorage).
+    :param max_size: The maximum number of bytes accepted.
+    :param accepts: If given, the sniffed type of the content must match it.
+        See :func:`type_matches`.
+    :param hash_name: A hashlib algorithm name to digest the content with.
+    :param spool_size: Uploads larger than this are spooled to disk.
+    """
+    # imported here to keep them out of the cost of importing yota
+    import hashlib
+    import tempfile
+
+    stream = getattr(source, 'stream', None) or \
+        getattr(source, 'file', None) or source
+    declared = getattr(source, 'type', None) or \
+        getattr(source, 'mimetype', None) or \
+        getattr(source, 'content_type', None)
+    filename = getattr(source, 'filename', None)
+
+    declared_length = getattr(source, 'content_length', None)
+    if max_size is not None and declared_length and \
+            declared_length > max_size:
+        raise UploadError("File may not be larger than {0} bytes"
+                          .format(max_size))
+
+    digest = hashlib.new(hash_name) if hash_name else None
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    size = 0
+    head = b''
+    sniffed = None
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if len(head) < SNIFF_LENGTH:
+                head += chunk[:SNIFF_LENGTH - len(head)]
+                if len(head) == SNIFF_LENGTH:
+                    sniffed = _check_type(head, accepts)
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise UploadError("File may not be larger than {0} bytes"
+                                  .format(max_size))
+            if digest is not None:
+                digest.update(chunk)
+            spool.write(chunk)
+        # files shorter than the sniffing window
+        if len(head) < SNIFF_LENGTH:
+            sniffed = _check_type(head, accepts)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return Upload(spool, filename, declared, sniffed, size,
+                  digest.hexdigest() if digest is not None else None)
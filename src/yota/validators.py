@@ -73,8 +73,56 @@ class MatchingValidator(object):
             target2.add_error({'message': self.message})
 
 
+class ChoiceValidator(object):
+    """ Checks that the submitted data is one of the choices of a
+    :class:`yota.nodes.ListNode` or :class:`yota.nodes.RadioNode`, or that
+    every box checked in a :class:`yota.nodes.CheckGroupNode` is one of its
+    boxes. Empty submissions are left to the :class:`RequiredValidator`.
+    Lookups are constant time when the choices are a
+    :class:`yota.choices.ChoiceSet`, and a single lookup by key when they
+    are a :class:`yota.choices.ChoiceProvider`.
+
+    :param choices: The choices to check against, as (value, label) pairs,
+        a ChoiceSet or a ChoiceProvider. Defaults to the choices of the Node
+        being validated.
+
+    :param message: (optional) The message to present to the user upon
+        failure.
+    :type message: string
+    """
+    __slots__ = ["choices", "message"]
+
+    def __init__(self, choices=None, message=None):
+        self.choices = choices
+        self.message = message if message else "Please select a valid option"
+        super(ChoiceValidator, self).__init__()
+
+    def __call__(self, target):
+        data = target.data
+        if data == '' or data is None or data == []:
+            return
+        choices = self.choices
+        if choices is None:
+            choices = target.get_choices()
+        from yota.choices import ChoiceSet, ChoiceProvider
+        if not isinstance(choices, (ChoiceSet, ChoiceProvider)):
+            choices = set(value for value, label in choices)
+        if not isinstance(data, list):
+            data = [data]
+        for value in data:
+            try:
+                found = value in choices
+            except TypeError:
+                found = False
+            if not found:
+                target.add_error({'message': self.message})
+                return
+
+
 class IntegerValidator(object):
-    """ Checks if the value is an integer and converts it to one if it is
+    """ Checks if the value is an integer and converts it to one if it is.
+    The parsed int is stored as the Node's value so it isn't parsed again,
+    and Nodes that already coerce their data are not re-parsed at all.
 
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
@@ -86,9 +134,27 @@ class IntegerValidator(object):
         super(IntegerValidator, self).__init__()
 
     def __call__(self, target):
+        value = getattr(target, 'value', None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return
+        if getattr(target, 'coerce', None) is not None:
+            if value is None:
+                # coercion either reported an error already, or was skipped
+                # for empty input, which isn't a number either
+                if target.data == '' or target.data is None:
+                    target.add_error({'message': self.message})
+                return
+            # coercion produced some other type, checked for integrality
+            try:
+                integral = value == int(value)
+            except (TypeError, ValueError, OverflowError):
+                integral = False
+            if not integral:
+                target.add_error({'message': self.message})
+            return
         try:
-            int(target.data)
-        except ValueError:
+            target.value = int(target.data)
+        except (ValueError, TypeError):
             target.add_error({'message': self.message})
 
 
@@ -118,30 +184,112 @@ class MinMaxValidator(object):
         super(MinMaxValidator, self).__init__()
 
     def __call__(self, target):
-        if len(target.data) < self.min:
+        length = len(target.data)
+        if length < self.min:
             target.add_error({'message': self.minmsg})
-        if len(target.data) > self.max:
+        elif length > self.max:
             target.add_error({'message': self.maxmsg})
 
 
+_engines = {'re': re}
+
+
+def regex_engine(name):
+    """ Returns the regex module with the given name, importing it the first
+    time it's asked for. Validators store the name rather than the module so
+    they can be copied along with their Nodes. """
+    try:
+        return _engines[name]
+    except KeyError:
+        pass
+    import importlib
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        raise ImportError("The regex engine '{0}' isn't installed. For 're2' "
+                          "install the google-re2 package".format(name))
+    _engines[name] = module
+    return module
+
+
 class RegexValidator(object):
     """ Quick and easy check to see if the input
     matches the given regex.
 
-    :param regex: (optional) The regex to run against the input.
-    :type regex: string
+    Given a max_length, longer input is rejected without running the regex,
+    so that a pattern which backtracks badly can only be made to work so
+    hard. For patterns that accept user input of any length, use a linear
+    time engine such as re2, which never backtracks but doesn't support
+    lookaround or backreferences.
+
+    The regex is compiled once, when the validator is made or its regex is
+    set, and the validator is shared rather than copied into each Form.
+
+    :param regex: (optional) The regex to run against the input, or a list of
+        them, any of which may match. A list is compiled into a single
+        alternation so the input is matched once.
+    :type regex: string or list
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
+    :param max_length: (optional) The longest input the regex is run on.
+        Unlimited by default.
+    :type max_length: integer
+    :param engine: (optional) The name of the module providing ``compile``,
+        such as ``'re2'``. Defaults to Python's ``re``.
+    :type engine: string
+    :param length_message: (optional) The message to present to the user when
+        the input is longer than max_length, formatted with max_length.
+    :type length_message: string
     """
-    __slots__ = ["message", "regex"]
+    __slots__ = ["message", "_regex", "_pattern", "max_length", "engine",
+                 "length_message"]
 
-    def __init__(self, regex=None, message=None):
+    def __init__(self, regex=None, message=None, max_length=None, engine='re',
+                 length_message=None):
         self.message = message if message else "Input does not match regex"
+        self.max_length = max_length
+        self.length_message = length_message if length_message else \
+            "Maximum allowed length {0}"
+        # fail on declaration rather than on the first submission
+        regex_engine(engine)
+        self.engine = engine
         self.regex = regex
         super(RegexValidator, self).__init__()
 
+    @property
+    def regex(self):
+        return self._regex
+
+    @regex.setter
+    def regex(self, value):
+        self._regex = value
+        if value is None:
+            self._pattern = None
+            return
+        if isinstance(value, (list, tuple)):
+            value = '|'.join('(?:{0})'.format(regex) for regex in value)
+        self._pattern = regex_engine(self.engine).compile(value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def too_long(self, target):
+        """ Adds an error to target and returns True if its data is longer
+        than max_length """
+        if self.max_length is not None and \
+                len(target.data) > self.max_length:
+            target.add_error({'message': self.length_message
+                              .format(self.max_length)})
+            return True
+        return False
+
     def __call__(self, target=None):
-        if re.match(self.regex, target.data) is None:
+        if self.too_long(target):
+            return
+        if self._pattern.match(target.data) is None:
             target.add_error({'message': self.message})
 
 class PasswordValidator(RegexValidator):
@@ -153,14 +301,21 @@ class PasswordValidator(RegexValidator):
 
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
+    :param max_length: (optional) The longest password accepted.
+    :type max_length: integer
+    :param length_message: (optional) The message to present to the user when
+        the password is longer than max_length.
+    :type length_message: string
     """
-    __slots__ = ["message"]
+    __slots__ = []
 
-    def __init__(self, message=None):
-        self.message = message if message else "Must be 7 characters or longer, contain " \
-                                               "at least one upper and lower case letter, " \
-                                               "a number, a special character, and no spaces"
-        self.regex = '^(?=.*[0-9])(?=.*[a-z])(?=.*[A-Z])(?=.*[@#$%^&+=])(?=\S+$).{7,}$'
+    def __init__(self, message=None, max_length=None, length_message=None):
+        message = message if message else "Must be 7 characters or longer, contain " \
+                                          "at least one upper and lower case letter, " \
+                                          "a number, a special character, and no spaces"
+        super(PasswordValidator, self).__init__(
+            r'^(?=.*[0-9])(?=.*[a-z])(?=.*[A-Z])(?=.*[@#$%^&+=])(?=\S+$).{7,}$',
+            message, max_length, length_message=length_message)
 
 class UsernameValidator(RegexValidator):
     """ Quick and easy check to see if a field
@@ -171,47 +326,161 @@ class UsernameValidator(RegexValidator):
 
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
+    :param max_length: (optional) The longest input the regex is run on.
+    :type max_length: integer
+    :param length_message: (optional) The message to present to the user when
+        the input is longer than max_length.
+    :type length_message: string
     """
-    __slots__ = ["message"]
+    __slots__ = []
 
-    def __init__(self, message=None):
-        self.message = message if message else "Must be 3-20 characters and only " \
-                                               "contain letters, numbers, hyphens and underscores"
-        self.regex = '^[a-zA-Z0-9-_]{3,20}$'
+    def __init__(self, message=None, max_length=None, length_message=None):
+        message = message if message else "Must be 3-20 characters and only " \
+                                          "contain letters, numbers, hyphens and underscores"
+        super(UsernameValidator, self).__init__('^[a-zA-Z0-9-_]{3,20}$',
+                                                message, max_length,
+                                                length_message=length_message)
+
+
+# Each rule of the default PasswordStrengthValidator regexes, as the
+# characters it counts and how many it needs
+_STRENGTH_RULES = (
+    ('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 2),
+    ('!@#$&*', 1),
+    ('0123456789', 2),
+)
+
+
+def _strength_table():
+    """ A unicode translate table mapping the characters of each rule to a
+    marker character, so that one translate and a count per rule measures a
+    password. Characters used as markers are dropped from the input. """
+    table = dict((marker, None) for marker in range(len(_STRENGTH_RULES)))
+    for marker, (chars, needed) in enumerate(_STRENGTH_RULES):
+        for char in chars:
+            table[ord(char)] = marker
+    return table
+
+_STRENGTH_TABLE = _strength_table()
+# the markers as text on both Python 2 and 3
+_STRENGTH_MARKERS = [u'%c' % marker for marker in range(len(_STRENGTH_RULES))]
+_TEXT_TYPE = type(u'')
+
+# Numbered backreferences and conditionals would point at the wrong group once
+# rules are fused into one regex
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?\(')
 
 
 class PasswordStrengthValidator(object):
     """ A validator to check the password strength.
 
+    The default rules are measured by counting characters of each class in a
+    single pass over the password, rather than running a regex per rule.
+    Custom rules are fused into one regex of optional lookaheads, so the
+    password is still only matched once. Byte strings, which can't be
+    translated the same way, are matched against the default rules too.
+
+    The rules are compiled when regex is set, so assign a new list to change
+    them; changing the list in place has no effect.
+
     :param regex: (optional) The regex to run against the input.
     :type regex: list
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
+    :param max_length: (optional) The longest password the regexes are run
+        on. Longer passwords are given a strength of 0. Unlimited by
+        default.
+    :type max_length: integer
+    :param engine: (optional) The name of the regex module to use, see
+        :class:`RegexValidator`.
+    :type engine: string
 
     """
-    __slots__ = ["message", "regex"]
-
-    def __init__(self, regex=None, message=None):
+    __slots__ = ["message", "_regex", "max_length", "engine", "_patterns",
+                 "_fused", "_counted"]
+
+    default_regex = [
+        "(?=.*[A-Z].*[A-Z])",  # Matches 2 uppercase letters
+        "(?=.*[!@#$&*])",  # Matches 1 Special character
+        "(?=.*[0-9].*[0-9])",  # Matches 2 numbers
+        ".{7}"  # Has at least 7 characters
+    ]
+
+    def __init__(self, regex=None, message=None, max_length=None,
+                 engine='re'):
         self.message = message
+        self.max_length = max_length
+        regex_engine(engine)
+        self.engine = engine
         if not isinstance(regex, list):
-            self.regex = [
-                "(?=.*[A-Z].*[A-Z])",  # Matches 2 uppercase letters
-                "(?=.*[!@#$&*])",  # Matches 1 Special character
-                "(?=.*[0-9].*[0-9])",  # Matches 2 numbers
-                ".{7}"  # Has at least 7 characters
-             ]
+            self.regex = list(self.default_regex)
         else:
             self.regex = regex
-        super(StrongPasswordValidator, self).__init__()
+        super(PasswordStrengthValidator, self).__init__()
+
+    @property
+    def regex(self):
+        return self._regex
+
+    @regex.setter
+    def regex(self, value):
+        self._regex = value
+        self._patterns = None
+        self._fused = None
+        # the default rules are counted rather than matched
+        self._counted = value == self.default_regex
+        if not self._counted:
+            self._compile()
+
+    def _compile(self):
+        engine = regex_engine(self.engine)
+        if self.engine == 're' and \
+                not any(_GROUP_REFERENCE.search(regex) for regex in self.regex):
+            # each rule is tried as a lookahead at the start of the input,
+            # just as re.match would, and reports through its own group
+            fused = ''.join('(?:(?=(?P<_rule{0}>{1})))?'.format(i, regex)
+                            for i, regex in enumerate(self.regex))
+            try:
+                self._fused = engine.compile(fused)
+                return
+            except re.error:
+                # inline flags can't be fused
+                pass
+        self._patterns = [engine.compile(regex) for regex in self.regex]
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def strength(self, password):
+        """ The number of rules the password passes """
+        if self.max_length is not None and len(password) > self.max_length:
+            return 0
+        if self._counted and isinstance(password, _TEXT_TYPE):
+            # '.' stops at a newline, so the default rules only see the
+            # first line
+            line = password.partition(u'\n')[0]
+            marked = line.translate(_STRENGTH_TABLE)
+            strength = sum(1 for marker, (chars, needed)
+                           in zip(_STRENGTH_MARKERS, _STRENGTH_RULES)
+                           if marked.count(marker) >= needed)
+            if len(line) >= 7:
+                strength += 1
+            return strength
 
-    def __call__(self, target=None):
-        strength = 0
+        if self._fused is None and self._patterns is None:
+            # the default rules on a byte string, as on Python 2
+            self._compile()
+        if self._fused is not None:
+            groups = self._fused.match(password).groupdict()
+            return sum(1 for value in groups.values() if value is not None)
+        return sum(1 for pattern in self._patterns
+                   if pattern.match(password))
 
-        # Loop through the regex and increment
-        # strength for each successful match
-        for regex in self.regex:
-            if re.match(regex, target.data):
-                strength += 1
+    def __call__(self, target=None):
+        strength = self.strength(target.data)
         target.add_error({'message': "Password strength is " + str(strength),
                           'block': False})
 
@@ -259,7 +528,10 @@ class RequiredValidator(object):
             target.add_error({'message': self.message})
 
 class MimeTypeValidator(object):
-    """ Checks to make sure a posted file is an allowed mime type
+    """ Checks to make sure a posted file is an allowed mime type. For files
+    received by :class:`yota.nodes.FileNode` the content type sniffed from
+    the file itself is checked, and the type declared by the client is
+    ignored, so files whose type couldn't be identified are rejected.
 
     :param message: (optional) The message to present to the user upon failure.
     :type message: string
@@ -274,7 +546,12 @@ class MimeTypeValidator(object):
         super(MimeTypeValidator, self).__init__()
 
     def __call__(self, target=None):
-        if not target.data.type in self.mimetypes:
+        if hasattr(target.data, 'sniffed_type'):
+            # an Upload, which only the sniffed type can be trusted for
+            mimetype = target.data.sniffed_type
+        else:
+            mimetype = getattr(target.data, 'type', None)
+        if not mimetype in self.mimetypes:
             target.add_error({'message': self.message})
 
 class EmailValidator(object):
@@ -331,14 +608,57 @@ class EmailValidator(object):
             target.add_error({'message': self.message})
 
 
+class UniqueValidator(object):
+    """ Checks that the submitted data isn't already taken, such as an email
+    address that is already registered, by looking it up with a
+    :class:`yota.loaders.Loader`. Lookups are deferred, so the data of every
+    Node and every row checked with the same Loader is looked up in a single
+    batch.
+
+    :param loader: A Loader whose values are truthy for keys that are taken.
+
+    :param message: (optional) The message to present to the user upon
+        failure.
+    :type message: string
+    """
+    __slots__ = ["loader", "message"]
+
+    def __init__(self, loader, message=None):
+        self.loader = loader
+        self.message = message if message else "This value is already taken"
+        super(UniqueValidator, self).__init__()
+
+    def __call__(self, target):
+        if target.data == '' or target.data is None:
+            return
+
+        # list data is looked up a value at a time, but reported once
+        reported = []
+
+        def taken(value):
+            if value and not reported:
+                reported.append(value)
+                target.add_error({'message': self.message})
+        if isinstance(target.data, list):
+            return [self.loader.load(value).then(taken)
+                    for value in target.data]
+        return self.loader.load(target.data).then(taken)
+
+
 class ActionWrapper(object):
     """ A base class for Check and Listener. Both are very similar in operation
     since they are both wrappers around called functions. Their primary
     function is to resolve arguments lazily, allowing validators to be added
     for fields that don't exist. """
 
+    _strict = True
+    """ Whether calls are checked for resolved arguments and a callable.
+    Turned off in production mode, where :meth:`Form.compile` checks the
+    callables once, letting errors raised by them propagate untouched. """
+
     def __init__(self, callable, *args, **kwargs):
         self.callable = callable
+        self._owner = None
         if not args:
             self.args = []
         else:
@@ -352,6 +672,35 @@ class ActionWrapper(object):
         self._attr_name = None
         self.resolved = False
 
+    @property
+    def callable(self):
+        """ The wrapped callable. Methods of the Form the wrapper is bound to
+        are rebuilt on access from a weak reference, see
+        :meth:`ActionWrapper.bind`. """
+        if self._owner is None:
+            return self._callable
+        return self._callable.__get__(self._owner())
+
+    @callable.setter
+    def callable(self, value):
+        self._callable = value
+        self._owner = None
+
+    def bind(self, form):
+        """ Called when the wrapper is attached to a Form. If the callable is
+        a method of that same Form, holding on to it would form a reference
+        cycle (form, event list, wrapper, method, form) that only the cycle
+        collector can free. The plain function is kept instead along with a
+        weak reference to the Form, letting discarded Forms be freed by
+        reference counting alone. """
+        if self._owner is not None:
+            return
+        if getattr(self._callable, '__self__', None) is form and \
+                hasattr(self._callable, '__func__'):
+            import weakref
+            self._callable = self._callable.__func__
+            self._owner = weakref.ref(form)
+
     def resolve_attr_names(self, form):
         """ Called internally by the validation methods this resolves all arg
         and kwarg strings to their respective `Node` objects and replaces them
@@ -364,6 +713,8 @@ class ActionWrapper(object):
         if self.resolved:
             return
 
+        self.bind(form)
+
         # Process args
         for key, arg in enumerate(self.args):
             self.args[key] = form.get_by_attr(arg)
@@ -378,6 +729,8 @@ class ActionWrapper(object):
         """ Called by the validation routines. Allows the Check to specify
         parameters that will be passed to our Validation method.
         """
+        if not self._strict:
+            return self.callable(*self.args, **self.kwargs)
 
         if not self.resolved:
             raise ValueError("Check args are not resolved. This should not happen")
@@ -410,6 +763,65 @@ class Check(ActionWrapper):
     `Check` objects are designed to be declared in your form subclass.
     """
 
+    timeout = None
+    """ The time in seconds the Check is allowed to run for, overriding the
+    :attr:`Form.check_timeout` of the Form it's on. A Check that runs out of
+    time gives its first Node the Form's :attr:`Form.timeout_error`. Set it
+    with :meth:`Check.within`. """
+
+    active_when = None
+    """ A :class:`yota.conditions.When`, or the attribute name of a Node,
+    that must hold for the Check to run. Checks are also skipped while any
+    of their Nodes is inactive. Set it with :meth:`Check.when`. """
+
+    depends_on = ()
+    """ The attribute names of the Checks and Nodes the Check depends on, see
+    :meth:`Check.after`. """
+
+    def after(self, *names):
+        """ Declares what the Check depends on, and returns it. Each name is
+        the attribute name of another Check on the Form, or of a Node. The
+        Check runs after the Checks it depends on, and after every other
+        Check involving a Node it depends on. It's skipped if any of them
+        failed or were skipped, or if such a Node has a blocking error.
+
+        .. code-block:: python
+
+            class SignupForm(yota.Form):
+                password = EntryNode(validators=PasswordValidator())
+                confirm = EntryNode(validators=RequiredValidator())
+                _match = Check(MatchingValidator(), 'password',
+                               'confirm').after('password', 'confirm')
+
+        Skipped Checks are listed in :attr:`Form.skipped_checks` after
+        validation. """
+        self.depends_on = tuple(self.depends_on) + names
+        return self
+
+    def when(self, condition):
+        """ Sets the condition the Check runs under, see
+        :attr:`Check.active_when`, and returns it.
+
+        .. code-block:: python
+
+            class PaymentForm(yota.Form):
+                payment = RadioNode(buttons=[('card', 'Card'),
+                                             ('bank', 'Bank')])
+                reference = EntryNode()
+                _reference = Check(RequiredValidator(),
+                                   'reference').when(When('payment', 'bank'))
+        """
+        self.active_when = condition
+        return self
+
+    def within(self, seconds):
+        """ Sets the time the Check is allowed to run for, see
+        :attr:`Check.timeout`, and returns it. Only the main thread can
+        interrupt a Check part way, elsewhere it is timed out once it
+        finishes, see :func:`yota.timeouts.deadline`. """
+        self.timeout = seconds
+        return self
+
     def node_visited(self, visited):
         """ Used by piecewise validation to determine if all the Nodes involved
         in the validator have been "visited" and thus are ready for the
@@ -446,6 +858,53 @@ class Check(ActionWrapper):
         return "<Check at {0}, args: {1}, kwargs: {2}>".format(id(self), self.args, self.kwargs)
 
 
+class RowCheck(Check):
+    """ Runs a Check declared for the rows of a
+    :class:`yota.nodes.RepeatNode` against every row. A single RowCheck
+    serves all the rows of the group: its arguments are the attribute names
+    of Nodes within a row, and are looked up in each row as it's checked
+    rather than a Check being built for every row. RowChecks are made by the
+    RepeatNode from the Checks of its row definition.
+
+    :param list row_args: The attribute names within a row of the Nodes to
+        pass to the validator.
+
+    :param dict row_kwargs: Same as row_args, passed as keyword arguments.
+    """
+
+    def __init__(self, callable, row_args=(), row_kwargs=None):
+        Check.__init__(self, callable)
+        self.row_args = list(row_args)
+        self.row_kwargs = dict(row_kwargs or {})
+        self._visited = None
+
+    def node_visited(self, visited):
+        """ The rows are checked one at a time when the RowCheck is run, and
+        only those in which every Node has been visited are validated """
+        self._visited = visited
+        return True
+
+    def __call__(self):
+        """ Runs the validator for each row of the RepeatNode it's resolved
+        to """
+        visited, self._visited = self._visited, None
+        func = self.callable
+        results = []
+        for row in self.args[0].rows:
+            args = [row[name] for name in self.row_args]
+            kwargs = dict((key, row[name])
+                          for key, name in self.row_kwargs.items())
+            if visited is not None:
+                nodes = args + list(kwargs.values())
+                if not all(node.name in visited for node in nodes):
+                    continue
+            result = func(*args, **kwargs)
+            if result is not None:
+                results.append(result)
+        # deferred lookups of every row are loaded together
+        return results
+
+
 class Listener(ActionWrapper):
     """ The class that wraps actions triggered by events. Essentially this just
     holds reference to a callable along with some metadata and a lazy loader